@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+RX text decode throughput on ANSI-heavy console output: the previous
+per-chunk UartTab._decode_bytes pipeline against StreamDecoder, fed per chunk
+and per flush batch.
+
+    python benchmarks/bench_decode.py [--chunk 64 1024]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.decoder import StreamDecoder  # noqa: E402
+
+
+class PerChunkDecoder:
+    """The decode path UartTab used before StreamDecoder, kept for comparison."""
+
+    def __init__(self):
+        self.ansi_carry = ""
+
+    def decode(self, data):
+        text = data.decode("utf-8", errors="ignore")
+        text = self._strip_ansi_with_carry(text)
+        return self._normalize_cr_bs(text)
+
+    def _strip_ansi_with_carry(self, text):
+        if self.ansi_carry:
+            text = self.ansi_carry + text
+            self.ansi_carry = ""
+        last_esc = text.rfind("\x1b")
+        if last_esc != -1:
+            tail = text[last_esc:]
+            if not self._ansi_sequence_complete(tail):
+                self.ansi_carry = tail
+                text = text[:last_esc]
+        return self._strip_ansi(text)
+
+    def _ansi_sequence_complete(self, text):
+        if not text.startswith("\x1b"):
+            return True
+        patterns = [
+            r"^\x1B\[[0-?]*[ -/]*[@-~]",
+            r"^\x1B\][^\x07]*(?:\x07|\x1B\\)",
+            r"^\x1B[@-Z\\-_]",
+            r"^\x1B7",
+            r"^\x1B8",
+        ]
+        for pat in patterns:
+            if re.match(pat, text):
+                return True
+        return False
+
+    def _strip_ansi(self, text):
+        ansi_re = re.compile(
+            r"\x1B\[[0-?]*[ -/]*[@-~]|"
+            r"\x1B\][^\x07]*(?:\x07|\x1B\\)|"
+            r"\x1B[@-Z\\-_]|"
+            r"\x1B7|\x1B8"
+        )
+        text = ansi_re.sub("", text)
+        return text.replace("\r\n", "\n")
+
+    def _normalize_cr_bs(self, text):
+        text = text.replace("\r", "")
+        out = []
+        for ch in text:
+            if ch == "\b":
+                if out:
+                    out.pop()
+            else:
+                out.append(ch)
+        return "".join(out)
+
+
+def boot_log(size):
+    """Colourised Linux/U-Boot style console output."""
+    rnd = random.Random(1)
+    words = ["usb", "mmc0", "eth0", "link up", "probe", "done", "systemd", "Started", "Reached target",
+             "Mounted", "ttyS0", "0x8000_0000", "clk", "regulator", "OK", "FAILED", "°C", "µs"]
+    lines = []
+    n = 0
+    while n < size:
+        t = rnd.random() * 100
+        status = rnd.choice(["\x1b[0;32m  OK  \x1b[0m", "\x1b[0;1;31mFAILED\x1b[0m", "\x1b[1;33m WARN \x1b[0m"])
+        body = " ".join(rnd.choice(words) for _ in range(rnd.randint(4, 10)))
+        line = "[{:12.6f}] [{}] \x1b[1m{}\x1b[0m\r\n".format(t, status, body)
+        if rnd.random() < 0.05:
+            line = "login: roo\bot\r\n"
+        lines.append(line)
+        n += len(line)
+    return "".join(lines).encode("utf-8")
+
+
+def render(pieces):
+    """Join decoder output the way the RX pane applies leading backspaces."""
+    out = []
+    for text in pieces:
+        body = text.lstrip("\b")
+        for _ in range(len(text) - len(body)):
+            out.pop()
+        out.extend(body)
+    return "".join(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='RX decode throughput')
+    parser.add_argument('--chunk', nargs='+', type=int, default=[64, 1024])
+    parser.add_argument('--total', type=int, default=1 << 20)
+    parser.add_argument('--batch', type=int, default=16, help='chunks per flush')
+    args = parser.parse_args(argv)
+
+    blob = boot_log(args.total)
+    ref = StreamDecoder().decode(blob)
+    for size in args.chunk:
+        chunks = [blob[i:i + size] for i in range(0, len(blob), size)]
+        batches = [chunks[i:i + args.batch] for i in range(0, len(chunks), args.batch)]
+        d = StreamDecoder()
+        assert render(d.decode(c) for c in chunks) == ref
+
+        def run_old():
+            d = PerChunkDecoder()
+            for c in chunks:
+                d.decode(c)
+
+        def run_chunk():
+            d = StreamDecoder()
+            for c in chunks:
+                d.decode(c)
+
+        def run_batch():
+            d = StreamDecoder()
+            for b in batches:
+                d.decode_batch(b)
+
+        def run_styled():
+            d = StreamDecoder(ansi_color=True)
+            for b in batches:
+                d.decode_styled_batch(b)
+
+        d = StreamDecoder(ansi_color=True)
+        styled = [d.decode_styled_batch(b) for b in batches]
+        assert render("".join(t for t, _ in runs) for runs in styled) == ref
+
+        base = None
+        for name, fn in (('previous per-chunk', run_old), ('stream per-chunk', run_chunk),
+                         ('stream per-flush', run_batch), ('styled per-flush', run_styled)):
+            rate = len(blob) / min(timeit.repeat(fn, number=1, repeat=5)) / 1e6
+            base = base or rate
+            print('chunk {:>5} B  {:<20} {:7.1f} MB/s  ({:.1f}x)'.format(size, name, rate, rate / base))
+
+
+if __name__ == '__main__':
+    main()
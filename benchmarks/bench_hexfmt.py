@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Hex formatting throughput: the old per-byte HEX_TABLE join against the bulk
+parse_bytes_to_hex_str and the streaming HexDumper layouts. Row layouts are
+also timed per flush (--batch chunks joined), which is how the GUI and the
+headless writer feed them.
+
+    python benchmarks/bench_hexfmt.py [--chunk 64 1024 4096] [--batch 16]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.hexfmt import HexDumper  # noqa: E402
+from uarttool.utils import HEX_TABLE, parse_bytes_to_hex_str  # noqa: E402
+
+
+def per_byte_join(data):
+    return ' '.join(HEX_TABLE[b] for b in data)
+
+
+def measure(fn, chunks, total):
+    runs = timeit.repeat(lambda: [fn(c) for c in chunks], number=3, repeat=5)
+    return total * 3 / min(runs) / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='hex formatting throughput')
+    parser.add_argument('--chunk', nargs='+', type=int, default=[64, 1024, 4096])
+    parser.add_argument('--total', type=int, default=1 << 20, help='bytes formatted per run')
+    parser.add_argument('--batch', type=int, default=16, help='chunks joined per flush')
+    args = parser.parse_args(argv)
+
+    blob = os.urandom(args.total)
+    for size in args.chunk:
+        chunks = [blob[i:i + size] for i in range(0, len(blob), size)]
+        step = size * args.batch
+        flushes = [blob[i:i + step] for i in range(0, len(blob), step)]
+        base = measure(per_byte_join, chunks, len(blob))
+        print('chunk {:>5} B: per-byte join {:7.1f} MB/s'.format(size, base))
+        cases = [
+            ('0x per chunk', parse_bytes_to_hex_str, chunks),
+            ('0x 16/row', HexDumper(16).feed, chunks),
+            ('0x 16/row flush', HexDumper(16).feed, flushes),
+            ('hexdump 16/row', HexDumper(16, style='plain', offset=True, ascii=True).feed, chunks),
+            ('hexdump flush', HexDumper(16, style='plain', offset=True, ascii=True).feed, flushes),
+        ]
+        for name, fn, inputs in cases:
+            rate = measure(fn, inputs, len(blob))
+            print('              {:<16} {:7.1f} MB/s  ({:.1f}x)'.format(name, rate, rate / base))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Idle cost of many open ports.
+
+Opens N pty ports through UartController (as the GUI does: run_no_stdin()
+and an on_rx callback) and reports the thread count and the CPU time the
+process burns while nothing is received, then the latency of one byte
+written to each port.
+
+    python benchmarks/bench_idle.py --ports 32
+"""
+
+import argparse
+import os
+import pty
+import sys
+import threading
+import tty
+from time import perf_counter, process_time, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.bufpool import release_all  # noqa: E402
+from uarttool.uart import UartController  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='idle cost of many open ports')
+    parser.add_argument('--ports', type=int, default=32)
+    parser.add_argument('--idle', type=float, default=3.0, help='seconds to measure while idle')
+    args = parser.parse_args(argv)
+
+    threads0 = threading.active_count()
+    ports = []
+    for _ in range(args.ports):
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        ctrl = UartController(os.ttyname(slave), 115200)
+        got = threading.Event()
+        ctrl.on_rx = got.set
+        ctrl.run_no_stdin()
+        ports.append((master, slave, ctrl, got))
+    sleep(0.5)
+    cpu0 = process_time()
+    sleep(args.idle)
+    cpu = process_time() - cpu0
+    print('{} ports: {} extra threads, {:.1f} ms CPU per idle second'.format(
+        args.ports, threading.active_count() - threads0, cpu * 1000.0 / args.idle))
+
+    latencies = []
+    for master, _slave, ctrl, got in ports:
+        t = perf_counter()
+        os.write(master, b'x')
+        got.wait(1.0)
+        latencies.append(perf_counter() - t)
+        release_all(ctrl.log_queue.get_batch(timeout=1.0))
+    latencies.sort()
+    print('first-byte latency: p50 {:.3f} ms  max {:.3f} ms'.format(
+        latencies[len(latencies) // 2] * 1000.0, latencies[-1] * 1000.0))
+
+    for master, slave, ctrl, _got in ports:
+        ctrl.stop()
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == '__main__':
+    main()
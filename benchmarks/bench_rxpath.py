@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Allocation churn of the RX read path.
+
+Pushes data through a pty as fast as it will go into a headless
+UartController (reader thread -> log_queue -> log_serial_data -> /dev/null)
+and compares the previous read()-per-chunk reader with the pooled readinto
+reader. Reported per MB: payload buffers allocated (one bytes object per
+read before, new slabs after), gen-0 GC collections and CPU seconds.
+Payload bytes objects are not tracked by the cyclic GC, so gen-0 counts do
+not move with them; CPU per MB varies by about 20% from run to run.
+
+    python benchmarks/bench_rxpath.py --mb 64
+"""
+
+import argparse
+import gc
+import os
+import pty
+import sys
+import threading
+import tty
+from time import monotonic, process_time, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.uart import UartController  # noqa: E402
+
+
+class CountingController(UartController):
+    chunks = 0
+
+    def format_batch(self, batch):
+        self.chunks += len(batch)
+        return super().format_batch(batch)
+
+
+class ReadController(CountingController):
+    """The reader as it was: a new bytes object from ser.read() per chunk."""
+
+    def read_ser_response_continuously(self):
+        ser = self.ser
+        queue_rx = self._queue_rx
+        max_read = 4096
+        while not self.stop_event.is_set():
+            try:
+                waiting = ser.in_waiting
+                if waiting:
+                    data = ser.read(min(waiting, max_read))
+                else:
+                    data = ser.read(1024)
+                if data:
+                    self._record_rx(data)
+                    queue_rx(data)
+            except Exception:
+                sleep(1e-2)
+        self.stop()
+
+
+def run(cls, total):
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    ctrl = cls(os.ttyname(slave), 4000000, timeout=0.05)
+    blob = bytes(range(256)) * 64
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == 'start' and info['generation'] == 0:
+            collections[0] += 1
+
+    def writer():
+        sent = 0
+        view = memoryview(blob)
+        while sent < total:
+            sent += os.write(master, view)
+
+    devnull = open(os.devnull, 'wb')
+    gc.callbacks.append(on_gc)
+    cpu0 = process_time()
+    t0 = monotonic()
+    ctrl.run(out=devnull, read_stdin=False)
+    wt = threading.Thread(target=writer, daemon=True)
+    wt.start()
+    wt.join()
+    while ctrl.rx_bytes < total and monotonic() - t0 < 60:
+        sleep(0.01)
+    ctrl.stop()
+    ctrl.log_thread.join()
+    elapsed = monotonic() - t0
+    cpu = process_time() - cpu0
+    gc.callbacks.remove(on_gc)
+    devnull.close()
+    os.close(master)
+    os.close(slave)
+    mb = ctrl.rx_bytes / 1e6
+    pool = getattr(ctrl, 'rx_pool', None)
+    buffers = ctrl.chunks if cls is ReadController else pool.allocated
+    return {
+        'mb_per_s': mb / elapsed,
+        'chunks_per_mb': ctrl.chunks / mb,
+        'buffers_per_mb': buffers / mb,
+        'gc0_per_mb': collections[0] / mb,
+        'cpu_s_per_mb': cpu / mb,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='RX read path allocation churn')
+    parser.add_argument('--mb', type=float, default=32, help='megabytes pushed per variant')
+    args = parser.parse_args(argv)
+    total = int(args.mb * 1e6)
+    for name, cls in (('read() per chunk', ReadController), ('pooled readinto', CountingController)):
+        r = run(cls, total)
+        print('{:<18} {:7.1f} MB/s  {:7.1f} chunks/MB  {:7.2f} buffers/MB  {:6.2f} gc0/MB  {:.4f} cpu s/MB'.format(
+            name, r['mb_per_s'], r['chunks_per_mb'], r['buffers_per_mb'], r['gc0_per_mb'], r['cpu_s_per_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+PortServer fan-out and wakeup stress.
+
+Feeds a PortServer from a stand-in controller in bursts of small RX chunks,
+with the interpreter switching threads as often as it can, so the reading
+thread's wakeup races the server thread draining it. After every burst all
+clients must have received every byte within --stall seconds; a server that
+lost a wakeup sits in select() and the run fails. Reports the delivered rate.
+
+    python benchmarks/bench_server.py --clients 4 --bursts 2000
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+from time import monotonic, perf_counter, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.server import PortServer  # noqa: E402
+
+
+class FakeController:
+    """Just the parts of UartController that PortServer uses."""
+
+    def __init__(self):
+        self.rx_taps = []
+
+    def send_batch(self, chunks, block=True):
+        pass
+
+    def rx(self, data):
+        for tap in list(self.rx_taps):
+            tap(data)
+
+
+class Reader(threading.Thread):
+    def __init__(self, address):
+        super().__init__(daemon=True)
+        self.sock = socket.create_connection(address)
+        self.received = 0
+
+    def run(self):
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    return
+                self.received += len(data)
+        except OSError:
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PortServer fan-out and wakeup stress')
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--bursts', type=int, default=2000)
+    parser.add_argument('--chunk', type=int, default=64, help='bytes per RX chunk')
+    parser.add_argument('--burst', type=int, default=16, help='chunks per burst')
+    parser.add_argument('--stall', type=float, default=2.0, help='seconds a burst may take to arrive')
+    args = parser.parse_args(argv)
+
+    sys.setswitchinterval(1e-6)
+    ctrl = FakeController()
+    server = PortServer(ctrl, '127.0.0.1:0')
+    host, port = server.address.rsplit(':', 1)
+    readers = [Reader((host, int(port))) for _ in range(args.clients)]
+    for reader in readers:
+        reader.start()
+    while len(server.clients) < args.clients:
+        sleep(0.01)
+
+    chunk = os.urandom(args.chunk)
+    total = 0
+    t0 = perf_counter()
+    try:
+        for burst in range(args.bursts):
+            for _ in range(args.burst):
+                ctrl.rx(chunk)
+            total += args.burst * args.chunk
+            deadline = monotonic() + args.stall
+            while min(reader.received for reader in readers) < total:
+                if monotonic() > deadline:
+                    print('STALL after burst {}: {} of {} bytes delivered, wake pending {}'.format(
+                        burst + 1, min(reader.received for reader in readers), total, server._wake_pending))
+                    return 1
+                sleep(0)
+        elapsed = perf_counter() - t0
+        print('{} clients, {} bursts of {} x {} B: {:.1f} MB/s per client, no stalls'.format(
+            args.clients, args.bursts, args.burst, args.chunk, total / elapsed / 1e6))
+        return 0
+    finally:
+        server.close()
+        for reader in readers:
+            reader.sock.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
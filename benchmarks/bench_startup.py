@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+GUI startup cost.
+
+Times the app from creating the Tk root to its first drawn frame, then the
+cost of each new tab (as the "+" tab does) and of the first settings window
+of a tab. Per-tab times should stay flat however many tabs are open. Needs a
+display (e.g. run under xvfb-run on a headless machine).
+
+    python benchmarks/bench_startup.py --tabs 20
+"""
+
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import tkinter as tk  # noqa: E402
+
+from uarttool.gui import UartGuiApp  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='GUI startup cost')
+    parser.add_argument('--tabs', type=int, default=20, help='new tabs to open after startup')
+    args = parser.parse_args(argv)
+
+    t0 = perf_counter()
+    root = tk.Tk()
+    app = UartGuiApp(root)
+    t_app = perf_counter()
+    root.update()
+    t_frame = perf_counter()
+    print('first frame: {:.1f} ms (app built in {:.1f} ms)'.format((t_frame - t0) * 1000.0, (t_app - t0) * 1000.0))
+
+    times = []
+    for _ in range(args.tabs):
+        t = perf_counter()
+        app._new_tab()
+        root.update()
+        times.append(perf_counter() - t)
+    if times:
+        print('new tab: first {:.1f} ms  median {:.1f} ms  last {:.1f} ms  ({} tabs)'.format(
+            times[0] * 1000.0, sorted(times)[len(times) // 2] * 1000.0, times[-1] * 1000.0, len(app.tabs)))
+
+    tab = app.tabs[-1]
+    t = perf_counter()
+    tab.show_settings_popup(root.winfo_rootx(), root.winfo_rooty())
+    root.update()
+    print('first settings window: {:.1f} ms'.format((perf_counter() - t) * 1000.0))
+
+    root.destroy()
+
+
+if __name__ == '__main__':
+    main()
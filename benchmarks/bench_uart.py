@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Throughput / latency benchmark for the RX path.
+
+Drives UartController over pyserial's loop:// and a Linux pty pair at a
+controlled data rate, in hex and string mode, and pushes every chunk through
+the same formatting and scrollback work the GUI does (minus Tk itself).
+
+    python benchmarks/bench_uart.py --out before.json
+    python benchmarks/bench_uart.py --out after.json --compare before.json
+
+Reported per scenario: delivered bytes/s, write-to-render latency
+percentiles, CPU seconds per MB (whole process, writer included) and the
+process peak RSS so far (run a single scenario for an isolated figure).
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import resource
+import subprocess
+import sys
+import threading
+from collections import deque
+from time import monotonic, perf_counter, process_time, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.bufpool import release_all  # noqa: E402
+from uarttool.decoder import StreamDecoder  # noqa: E402
+from uarttool.hexfmt import HexDumper  # noqa: E402
+from uarttool.scrollback import Scrollback  # noqa: E402
+from uarttool.uart import UartController  # noqa: E402
+
+PACKET = 256
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, int(round(p / 100.0 * (len(sorted_vals) - 1))))
+    return sorted_vals[k]
+
+
+class Renderer:
+    """GUI-equivalent consumer: batch, format, append to a scrollback."""
+
+    def __init__(self, hex_mode):
+        self.hex_mode = hex_mode
+        self.scrollback = Scrollback()
+        self.dumper = HexDumper()
+        self.decoder = StreamDecoder()
+
+    def render(self, batch):
+        if self.hex_mode:
+            text = ''.join(self.dumper.feed(data) for data in batch)
+        else:
+            text = self.decoder.decode_batch(batch)
+            body = text.lstrip('\b')
+            self.scrollback.backspace(len(text) - len(body))
+            text = body
+        self.scrollback.append(text)
+        release_all(batch)
+
+
+def open_transport(kind, baud):
+    """Return (controller, write_fn, close_fn)."""
+    if kind == 'loop':
+        ctrl = UartController('loop://', baud, timeout=0.05)
+        return ctrl, ctrl.ser.write, lambda: None
+    if kind == 'pty':
+        import pty
+        import tty
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        ctrl = UartController(os.ttyname(slave), baud, timeout=0.05)
+
+        def write(data):
+            view = memoryview(data)
+            while view:
+                n = os.write(master, view)
+                view = view[n:]
+
+        def close():
+            os.close(master)
+            os.close(slave)
+        return ctrl, write, close
+    raise ValueError('unknown transport {}'.format(kind))
+
+
+def payload_for(mode):
+    if mode == 'hex':
+        return bytes(range(256)) * (PACKET // 256 or 1)
+    line = b'[  12.345678] bench: the quick brown fox jumps over the lazy dog\r\n'
+    return (line * (PACKET // len(line) + 1))[:PACKET]
+
+
+def run_scenario(kind, mode, rate, duration):
+    ctrl, write, close = open_transport(kind, rate * 10)
+    ctrl.hex_mode = mode == 'hex'
+    renderer = Renderer(ctrl.hex_mode)
+    packet = payload_for(mode)
+    sent_marks = deque()  # (cumulative bytes after packet, write time)
+    latencies = []
+    state = {'sent': 0, 'rendered': 0}
+    writer_done = threading.Event()
+
+    def writer():
+        interval = len(packet) / float(rate)
+        start = monotonic()
+        n = 0
+        while True:
+            due = start + n * interval
+            now = monotonic()
+            if now - start >= duration:
+                break
+            if due > now:
+                sleep(due - now)
+            t = perf_counter()
+            write(packet)
+            state['sent'] += len(packet)
+            sent_marks.append((state['sent'], t))
+            n += 1
+        writer_done.set()
+
+    ctrl.run_no_stdin()
+    cpu0 = process_time()
+    t0 = monotonic()
+    wt = threading.Thread(target=writer, daemon=True)
+    wt.start()
+    get = ctrl.log_queue.get
+    get_nowait = ctrl.log_queue.get_nowait
+    idle_deadline = None
+    while True:
+        try:
+            batch = [get(timeout=0.05)]
+        except queue.Empty:
+            if writer_done.is_set():
+                if state['rendered'] >= state['sent']:
+                    break
+                idle_deadline = idle_deadline or monotonic() + 1.0
+                if monotonic() > idle_deadline:
+                    break
+            continue
+        try:
+            while True:
+                batch.append(get_nowait())
+        except queue.Empty:
+            pass
+        size = sum(len(b) for b in batch)
+        renderer.render(batch)
+        now = perf_counter()
+        state['rendered'] += size
+        while sent_marks and sent_marks[0][0] <= state['rendered']:
+            latencies.append(now - sent_marks.popleft()[1])
+    elapsed = monotonic() - t0
+    cpu = process_time() - cpu0
+    ctrl.stop()
+    close()
+    latencies.sort()
+    mb = state['rendered'] / 1e6
+    return {
+        'transport': kind,
+        'mode': mode,
+        'target_bytes_per_s': rate,
+        'sent_bytes': state['sent'],
+        'rendered_bytes': state['rendered'],
+        'bytes_per_s': state['rendered'] / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': _ms(percentile(latencies, 50)),
+            'p90': _ms(percentile(latencies, 90)),
+            'p99': _ms(percentile(latencies, 99)),
+            'max': _ms(latencies[-1] if latencies else None),
+        },
+        'cpu_s_per_mb': cpu / mb if mb else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def _ms(v):
+    return None if v is None else round(v * 1000.0, 3)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def scenario_key(r):
+    return '{transport}/{mode}/{target_bytes_per_s}'.format(**r)
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {scenario_key(r): r for r in json.load(f)['results']}
+    print('\ncompared with {}:'.format(baseline_path))
+    for r in results:
+        old = baseline.get(scenario_key(r))
+        if not old:
+            continue
+        parts = []
+        for name, new_v, old_v in (
+            ('bytes/s', r['bytes_per_s'], old['bytes_per_s']),
+            ('p99 ms', r['latency_ms']['p99'], old['latency_ms']['p99']),
+            ('cpu s/MB', r['cpu_s_per_mb'], old['cpu_s_per_mb']),
+        ):
+            if new_v is None or not old_v:
+                continue
+            parts.append('{} {:+.1f}%'.format(name, (new_v - old_v) * 100.0 / old_v))
+        print('  {:<28} {}'.format(scenario_key(r), ', '.join(parts)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transport', nargs='+', default=['loop', 'pty'], choices=['loop', 'pty'])
+    parser.add_argument('--mode', nargs='+', default=['hex', 'str'], choices=['hex', 'str'])
+    parser.add_argument('--rate', nargs='+', type=int, default=[11520, 92160, 400000],
+                        help='target bytes/s (baud / 10); default 115200, 921600 and 4M baud')
+    parser.add_argument('--duration', type=float, default=3.0, help='seconds per scenario')
+    parser.add_argument('--out', help='write JSON results here')
+    parser.add_argument('--compare', help='JSON results of an earlier run to diff against')
+    args = parser.parse_args(argv)
+
+    results = []
+    for kind in args.transport:
+        for mode in args.mode:
+            for rate in args.rate:
+                r = run_scenario(kind, mode, rate, args.duration)
+                results.append(r)
+                lat = r['latency_ms']
+                print('{:<28} {:>10.0f} B/s  p50 {} ms  p99 {} ms  cpu {} s/MB  rss {} KB'.format(
+                    scenario_key(r), r['bytes_per_s'], lat['p50'], lat['p99'],
+                    None if r['cpu_s_per_mb'] is None else round(r['cpu_s_per_mb'], 4), r['peak_rss_kb']))
+    if args.out:
+        doc = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'duration_s': args.duration,
+            'results': results,
+        }
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(doc, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
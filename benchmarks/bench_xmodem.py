@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+XMODEM/YMODEM throughput against a local peer.
+
+Joins two pty ports with a relay thread that paces bytes to the line rate of
+--baud (10 bits per byte; 0 for as fast as the ptys go), opens a
+UartController on each end and sends a random file from one to the other
+with every protocol, checking that it arrives intact. Reports the rate and
+its share of the line rate.
+
+    python benchmarks/bench_xmodem.py --baud 921600 --kb 512
+"""
+
+import argparse
+import os
+import pty
+import shutil
+import sys
+import tempfile
+import threading
+import tty
+from time import monotonic, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from uarttool.uart import UartController  # noqa: E402
+from uarttool.xmodem import PROTOCOLS, ModemReceiver, ModemSender  # noqa: E402
+
+
+def relay(src, dst, bytes_per_s):
+    due = monotonic()
+    while True:
+        try:
+            data = os.read(src, 4096)
+        except OSError:
+            return
+        if bytes_per_s:
+            # The wire is busy until `due`; the next bytes follow it
+            due = max(due, monotonic()) + len(data) / bytes_per_s
+            wait = due - monotonic()
+            if wait > 0:
+                sleep(wait)
+        try:
+            os.write(dst, data)
+        except OSError:
+            return
+
+
+def open_pair(bytes_per_s):
+    ends = []
+    for _ in range(2):
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        ends.append((master, slave))
+    for (a, _sa), (b, _sb) in (ends, ends[::-1]):
+        threading.Thread(target=relay, args=(a, b, bytes_per_s), daemon=True).start()
+    ctrls = []
+    for _master, slave in ends:
+        ctrl = UartController(os.ttyname(slave), 921600, hex_mode=True)
+        ctrl.run_no_stdin()
+        ctrls.append(ctrl)
+    return ctrls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='XMODEM/YMODEM throughput against a local peer')
+    parser.add_argument('--baud', type=int, default=921600, help='simulated line rate (0: unlimited)')
+    parser.add_argument('--kb', type=int, default=512, help='file size in KiB')
+    parser.add_argument('--protocol', choices=PROTOCOLS, action='append', help='protocols to run (default: all)')
+    args = parser.parse_args(argv)
+
+    bytes_per_s = args.baud / 10.0
+    sender, receiver = open_pair(bytes_per_s)
+    work = tempfile.mkdtemp(prefix='bench_xmodem')
+    src = os.path.join(work, 'image.bin')
+    data = os.urandom(args.kb * 1024)
+    with open(src, 'wb') as f:
+        f.write(data)
+    try:
+        for protocol in args.protocol or PROTOCOLS:
+            batch = protocol.startswith('ymodem')
+            dest = os.path.join(work, protocol if batch else protocol + '.bin')
+            tx = ModemSender(sender, src, protocol).start()
+            rx = ModemReceiver(receiver, dest, protocol).start()
+            tx.done.wait()
+            rx.done.wait()
+            with open(os.path.join(dest, 'image.bin') if batch else dest, 'rb') as f:
+                got = f.read()
+            ok = got == data if batch else got.rstrip(b'\x1a') == data.rstrip(b'\x1a')
+            line = '{:10s} {:7.1f} KiB/s'.format(protocol, rx.rate / 1024)
+            if bytes_per_s:
+                line += '  {:5.1%} of line rate'.format(rx.rate / bytes_per_s)
+            line += '  retries {}  {}'.format(tx.retries + rx.retries, 'ok' if ok else 'CORRUPT: ' + str(rx.error or tx.error))
+            print(line)
+    finally:
+        sender.stop()
+        receiver.stop()
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
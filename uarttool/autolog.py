@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Continuous logging of every RX and TX byte to rotating capture files.
+
+write() runs in the reading (and sending) thread and only queues a copy of
+the chunk with its timestamp; it never blocks. The queue is a ByteQueue with
+the drop-newest policy, so when the disk stalls the backlog stops at
+`queue_bytes` and the excess is counted in dropped_bytes instead of growing.
+A writer thread drains the queue in batches into CaptureWriter files named
+`<prefix>_YYYYmmdd_HHMMSS.ucap` in `directory`, fsyncs them every
+SYNC_INTERVAL seconds and starts a new file once `max_bytes` or
+`max_seconds` is reached. Finished files are gzip-compressed (the .idx is
+dropped; it is rebuilt when the capture is opened after gunzip) and all but
+the newest `keep` finished files deleted by a separate housekeeping thread,
+so neither slows the writer.
+
+close() only tells the writer to stop, so stopping a port never waits for
+the disk. The writer keeps writing out the backlog for CLOSE_TIMEOUT_S,
+counts what is still queued then in lost_bytes and closes the file; at
+interpreter exit loggers that are still closing get that long to finish.
+"""
+
+import atexit
+import glob
+import gzip
+import os
+import queue
+import shutil
+import threading
+from datetime import datetime
+from time import monotonic
+
+from uarttool.bytequeue import ByteQueue, POLICY_DROP_NEWEST
+from uarttool.capture import CaptureWriter
+from uarttool.stats import format_size
+
+DEFAULT_ROTATE_BYTES = 64 * 1024 * 1024
+DEFAULT_QUEUE_BYTES = 8 * 1024 * 1024
+# Most bytes written per batch
+WRITE_BATCH = 1024 * 1024
+# Seconds between fsyncs of the current file
+SYNC_INTERVAL = 1.0
+# Seconds before opening a new file after a write error
+RETRY_S = 1.0
+# Seconds the writer keeps writing out the backlog after close()
+CLOSE_TIMEOUT_S = 2.0
+# Extra seconds join() allows past that to close the file
+CLOSE_GRACE_S = 1.0
+
+# Closed loggers whose writer has not finished yet
+_unfinished = set()
+
+
+class AutoLogger:
+    def __init__(self, directory: str, prefix='uart', max_bytes=DEFAULT_ROTATE_BYTES, max_seconds=None,
+                 compress=False, keep=None, queue_bytes=DEFAULT_QUEUE_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.compress = compress
+        self.keep = keep
+        self.path = None
+        self.files = 0
+        self.written_bytes = 0
+        self.lost_bytes = 0  # taken off the queue but not written (disk errors, close deadline)
+        self.error = None
+        self._queue = ByteQueue(queue_bytes, POLICY_DROP_NEWEST)
+        self._writer = None
+        self._opened = 0.0
+        self._retry_at = 0.0
+        self._closing = False
+        self._close_by = 0.0
+        self._lock = threading.Lock()
+        self._done = queue.Queue()  # finished files for the housekeeping thread
+        self._housekeeper = None
+        self._thread = threading.Thread(target=self._run, daemon=True, name='uart-autolog')
+        self._thread.start()
+
+    def write(self, direction: int, data, port='', ts=0):
+        """Queue one chunk; drops it (counted) if the writer is too far behind."""
+        if not self._closing:
+            self._queue.put_nowait((direction, bytes(data), port), size=len(data), ts=ts)
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self._queue.dropped_bytes + self.lost_bytes
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._queue.nbytes
+
+    def flush(self):
+        """Make what was written so far readable in `path` (the current file)."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.flush()
+
+    def close(self, timeout=CLOSE_TIMEOUT_S):
+        """
+        Stop taking data and return at once. The writer thread writes out what
+        is queued for up to `timeout` seconds, counts the rest in lost_bytes,
+        closes the current file and hands it to housekeeping.
+        """
+        if self._closing:
+            return
+        self._close_by = monotonic() + timeout
+        _unfinished.add(self)
+        self._closing = True
+
+    def join(self, timeout=None) -> bool:
+        """
+        Wait for the writer to finish after close(), by default until
+        CLOSE_GRACE_S past its deadline. False if it is still busy (a write
+        stuck on the disk).
+        """
+        if timeout is None:
+            timeout = max(0.0, self._close_by - monotonic()) + CLOSE_GRACE_S
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        get_batch = self._queue.get_batch
+        times = []
+        next_sync = monotonic() + SYNC_INTERVAL
+        while True:
+            try:
+                batch = get_batch(timeout=0.2, max_bytes=WRITE_BATCH, times=times)
+            except queue.Empty:
+                batch = ()
+            now = monotonic()
+            if batch:
+                if self._closing and now >= self._close_by:
+                    # Past the close deadline: the rest will not reach the disk
+                    self.lost_bytes += sum(len(item[1]) for item in batch)
+                else:
+                    self._write_batch(batch, times, now)
+                times.clear()
+            elif self._closing:
+                break
+            if now >= next_sync:
+                next_sync = now + SYNC_INTERVAL
+                self._sync()
+        self._close_file()
+        if self._housekeeper is not None:
+            self._done.put(None)
+        _unfinished.discard(self)
+
+    def _write_batch(self, batch, times, now):
+        writer = self._writer
+        if writer is not None and (writer.size >= self.max_bytes
+                                   or (self.max_seconds and now - self._opened >= self.max_seconds)):
+            self._close_file()
+            writer = None
+        if writer is None:
+            if now < self._retry_at:
+                self.lost_bytes += sum(len(item[1]) for item in batch)
+                return
+            writer = self._open_file(now)
+            if writer is None:
+                self.lost_bytes += sum(len(item[1]) for item in batch)
+                return
+        total = sum(len(item[1]) for item in batch)
+        done = 0
+        try:
+            for (direction, data, port), ts in zip(batch, times):
+                writer.write(direction, data, port, ts or None)
+                done += len(data)
+        except Exception as e:
+            self.lost_bytes += total - done
+            self._fail(e, now)
+        self.written_bytes += done
+
+    def _open_file(self, now):
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        path = os.path.join(self.directory, '{}_{}.ucap'.format(self.prefix, stamp))
+        n = 1
+        while os.path.exists(path) or os.path.exists(path + '.gz'):
+            n += 1
+            path = os.path.join(self.directory, '{}_{}_{}.ucap'.format(self.prefix, stamp, n))
+        try:
+            writer = CaptureWriter(path)
+        except Exception as e:
+            self._fail(e, now)
+            return None
+        with self._lock:
+            self._writer = writer
+        self.path = path
+        self.files += 1
+        self._opened = now
+        self.error = None
+        return writer
+
+    def _fail(self, err, now):
+        self.error = err
+        self._retry_at = now + RETRY_S
+        self._close_file()
+
+    def _sync(self):
+        writer = self._writer
+        if writer is None:
+            return
+        try:
+            writer.flush(sync=True)
+        except Exception as e:
+            self._fail(e, monotonic())
+
+    def _close_file(self):
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        try:
+            writer.close()
+        except Exception as e:
+            self.error = e
+        if self.compress or self.keep:
+            self._done.put(writer.path)
+            if self._housekeeper is None:
+                # Not a daemon: compression of the last file finishes before exit
+                self._housekeeper = threading.Thread(target=self._housekeep, name='uart-autolog-gzip')
+                self._housekeeper.start()
+
+    def _housekeep(self):
+        while True:
+            path = self._done.get()
+            if path is None:
+                return
+            try:
+                if self.compress:
+                    compress_file(path)
+                if self.keep:
+                    self._prune()
+            except Exception as e:
+                self.error = e
+
+    def _prune(self):
+        writer = self._writer
+        current = writer.path if writer is not None else None
+        pattern = os.path.join(self.directory, glob.escape(self.prefix) + '_*.ucap*')
+        names = sorted(p for p in glob.glob(pattern)
+                       if not p.endswith(('.idx', '.tmp')) and p != current)
+        for old in names[:max(0, len(names) - self.keep)]:
+            for p in (old, old + '.idx'):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    def format_summary(self) -> str:
+        """Short line for the stats strip / headless report."""
+        line = 'log {} in {} file{}'.format(format_size(self.written_bytes), self.files,
+                                             '' if self.files == 1 else 's')
+        if self.dropped_bytes:
+            line += ' dropped {}'.format(format_size(self.dropped_bytes))
+        if self.error is not None:
+            line += ' error: {}'.format(self.error)
+        return line
+
+
+@atexit.register
+def _join_unfinished():
+    for log in list(_unfinished):
+        log.join()
+
+
+def compress_file(path: str):
+    """gzip `path` to `path`.gz next to it, then remove it and its index."""
+    tmp = path + '.gz.tmp'
+    with open(path, 'rb') as src, gzip.open(tmp, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp, path + '.gz')
+    for p in (path, path + '.idx'):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
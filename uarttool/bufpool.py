@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Recycled RX buffers.
+
+The reader reads straight into large preallocated bytearray slabs and hands
+consumers memoryview slices of them instead of one new bytes object per
+read. Every slice keeps its slab checked out; once the last one is given
+back with release() (and the reader has moved on to another slab) the slab
+returns to the pool for reuse. Chunks that do not come from a pool (plain
+bytes, e.g. from a replay) are ignored by release(), so consumers can call
+it on anything they were handed.
+"""
+
+import threading
+
+SLAB_SIZE = 256 * 1024
+# Free slabs kept for reuse; more than this are left to the garbage collector
+MAX_FREE_SLABS = 64
+
+
+class _Slab(bytearray):
+    """A pool buffer; memoryview(...).obj leads back here from any slice."""
+
+    def __init__(self, size, pool):
+        super().__init__(size)
+        self.pool = pool
+        self.refs = 0
+
+
+class SlabPool:
+    def __init__(self, slab_size=SLAB_SIZE, max_free=MAX_FREE_SLABS):
+        self.slab_size = slab_size
+        self.max_free = max_free
+        self.allocated = 0  # slabs ever created, for diagnostics
+        self._free = []
+        self._lock = threading.Lock()
+        self._slab = None
+        self._view = None
+        self._pos = 0
+
+    def _new_slab(self):
+        with self._lock:
+            if self._free:
+                slab = self._free.pop()
+            else:
+                slab = _Slab(self.slab_size, self)
+                self.allocated += 1
+            slab.refs = 1  # held by the writer until it moves on
+            old = self._slab
+            self._slab = slab
+        self._view = memoryview(slab)
+        self._pos = 0
+        if old is not None:
+            self._unref(old)
+
+    def reserve(self, size: int) -> memoryview:
+        """Writable view of `size` free bytes for the next read (single reader only)."""
+        if self._slab is None or self._pos + size > len(self._slab):
+            self._new_slab()
+        return self._view[self._pos:self._pos + size]
+
+    def commit(self, n: int) -> memoryview:
+        """Hand out the first n bytes of the last reservation as a chunk."""
+        slab = self._slab
+        with self._lock:
+            slab.refs += 1
+        start = self._pos
+        self._pos = start + n
+        return self._view[start:start + n]
+
+    def _unref(self, slab):
+        with self._lock:
+            slab.refs -= 1
+            if slab.refs == 0 and len(self._free) < self.max_free:
+                self._free.append(slab)
+
+    def close(self):
+        """Drop the current slab; chunks still out are released as usual."""
+        slab, self._slab, self._view = self._slab, None, None
+        if slab is not None:
+            self._unref(slab)
+
+
+def release(chunk):
+    """Give a chunk back to its pool; no-op for anything that is not a pool slice."""
+    try:
+        slab = chunk.obj
+    except (AttributeError, ValueError):
+        # Not a memoryview, or one that was already released
+        return
+    if type(slab) is _Slab:
+        try:
+            chunk.release()
+        except BufferError:
+            pass
+        slab.pool._unref(slab)
+
+
+def release_all(chunks):
+    for chunk in chunks:
+        release(chunk)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import queue
+import threading
+from collections import deque
+from time import monotonic
+
+POLICY_BLOCK = 'block'
+POLICY_DROP_OLDEST = 'drop-oldest'
+POLICY_DROP_NEWEST = 'drop-newest'
+POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST)
+
+DEFAULT_QUEUE_BYTES = 16 * 1024 * 1024
+
+
+class ByteQueue:
+    """
+    FIFO bounded by the total size of its items rather than their count.
+
+    When a put would exceed max_bytes the policy decides: POLICY_BLOCK waits
+    for room (raising queue.Full on timeout, like queue.Queue), POLICY_DROP_OLDEST
+    evicts queued items and POLICY_DROP_NEWEST discards the new one. Dropped
+    items are counted in dropped_bytes / dropped_chunks and passed to on_drop
+    (outside the lock). An item larger than the whole budget is still accepted
+    into an empty queue so it cannot stall. Each item may carry a timestamp,
+    handed back alongside it by get_batch(times=...).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_QUEUE_BYTES, policy=POLICY_BLOCK, on_drop=None):
+        if policy not in POLICIES:
+            raise ValueError('unknown queue policy {}'.format(policy))
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.on_drop = on_drop
+        self.nbytes = 0
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+        self._items = deque()  # (item, size, ts)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def set_limits(self, max_bytes=None, policy=None):
+        with self._lock:
+            if max_bytes:
+                self.max_bytes = max_bytes
+            if policy:
+                if policy not in POLICIES:
+                    raise ValueError('unknown queue policy {}'.format(policy))
+                self.policy = policy
+            self._not_full.notify_all()
+
+    def _fits(self, size: int) -> bool:
+        return not self._items or self.nbytes + size <= self.max_bytes
+
+    def put(self, item, block=True, timeout=None, size=None, ts=0):
+        """Queue `item`; `size` defaults to len(item). Returns False if it was dropped."""
+        if size is None:
+            size = len(item)
+        dropped = []
+        accepted = True
+        with self._lock:
+            if not self._fits(size):
+                policy = self.policy
+                if policy == POLICY_DROP_NEWEST:
+                    accepted = False
+                    dropped.append(item)
+                elif policy == POLICY_DROP_OLDEST:
+                    items = self._items
+                    while not self._fits(size):
+                        old, old_size, _ts = items.popleft()
+                        self.nbytes -= old_size
+                        dropped.append(old)
+                        self.dropped_bytes += old_size
+                        self.dropped_chunks += 1
+                elif not block:
+                    raise queue.Full
+                else:
+                    deadline = None if timeout is None else monotonic() + timeout
+                    while not self._fits(size):
+                        remaining = None if deadline is None else deadline - monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise queue.Full
+                        self._not_full.wait(remaining)
+            if accepted:
+                self._items.append((item, size, ts))
+                self.nbytes += size
+                self._not_empty.notify()
+            else:
+                self.dropped_bytes += size
+                self.dropped_chunks += 1
+        if dropped and self.on_drop is not None:
+            for old in dropped:
+                self.on_drop(old)
+        return accepted
+
+    def put_nowait(self, item, size=None, ts=0):
+        return self.put(item, block=False, size=size, ts=ts)
+
+    def get(self, block=True, timeout=None):
+        return self.get_batch(block, timeout, max_items=1)[0]
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def get_batch(self, block=True, timeout=None, max_bytes=None, max_items=None, times=None) -> list:
+        """
+        Wait for at least one item, then take everything queued (up to
+        max_bytes / max_items, always at least one item) under a single lock.
+        If `times` is a list, the items' timestamps are appended to it.
+        """
+        with self._lock:
+            if not self._items:
+                if not block:
+                    raise queue.Empty
+                if not self._not_empty.wait_for(lambda: self._items, timeout):
+                    raise queue.Empty
+            items = self._items
+            out = []
+            taken = 0
+            while items:
+                size = items[0][1]
+                if out and ((max_bytes is not None and taken + size > max_bytes)
+                            or (max_items is not None and len(out) >= max_items)):
+                    break
+                item, _size, ts = items.popleft()
+                out.append(item)
+                if times is not None:
+                    times.append(ts)
+                taken += size
+            self.nbytes -= taken
+            self._not_full.notify_all()
+            return out
+
+    def reset_stats(self):
+        self.dropped_bytes = 0
+        self.dropped_chunks = 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def clear(self):
+        with self._lock:
+            items = [item for item, _size, _ts in self._items]
+            self._items.clear()
+            self.nbytes = 0
+            self._not_full.notify_all()
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Append-only capture files.
+
+Layout of `<name>`:
+    header  : MAGIC, wall clock ns, monotonic ns at creation
+    records : <u32 length><i64 monotonic ns><u8 direction><u8 port id> payload
+
+A port-name record (direction DIR_PORT) defines each port id before its first
+use. The sidecar `<name>.idx` is a sparse index of <u8 kind><i64 ts><u64 offset>
+entries: a sync point roughly every `index_every` bytes plus one entry per
+port-name record, so a reader can mmap the capture and bisect to any time
+without scanning it. A missing or short index is rebuilt from the records.
+"""
+
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_right
+from time import monotonic_ns, time_ns
+
+MAGIC = b'UARTCAP\x01'
+IDX_MAGIC = b'UARTIDX\x01'
+HEADER = struct.Struct('<8sqq')
+RECORD = struct.Struct('<IqBB')
+INDEX_ENTRY = struct.Struct('<Bqq')
+
+DIR_RX = 0
+DIR_TX = 1
+DIR_PORT = 0xFF
+
+IDX_SYNC = 0
+IDX_PORT = 1
+
+
+class CaptureWriter:
+    def __init__(self, path: str, index_every=64 * 1024, buffering=1 << 20):
+        self.path = path
+        self.index_every = index_every
+        self.wall_ns = time_ns()
+        self.mono_ns = monotonic_ns()
+        self._lock = threading.Lock()
+        self._ports = {}
+        self._f = open(path, 'wb', buffering=buffering)
+        self._idx = open(path + '.idx', 'wb')
+        self._f.write(HEADER.pack(MAGIC, self.wall_ns, self.mono_ns))
+        self._idx.write(IDX_MAGIC)
+        self._offset = HEADER.size
+        self._next_sync = self._offset
+        self._last_ts = self.mono_ns
+        self.closed = False
+
+    def write(self, direction: int, data, port='', ts=None):
+        """Append one record; safe to call from the RX and TX threads at once."""
+        if ts is None:
+            ts = monotonic_ns()
+        with self._lock:
+            if self.closed:
+                return
+            pid = self._ports.get(port)
+            if pid is None:
+                pid = self._add_port(port, ts)
+            # Index timestamps must not go backwards even if the threads race.
+            if ts > self._last_ts:
+                self._last_ts = ts
+            if self._offset >= self._next_sync:
+                self._idx.write(INDEX_ENTRY.pack(IDX_SYNC, self._last_ts, self._offset))
+                self._next_sync = self._offset + self.index_every
+            self._f.write(RECORD.pack(len(data), ts, direction, pid))
+            self._f.write(data)
+            self._offset += RECORD.size + len(data)
+
+    def _add_port(self, port: str, ts: int) -> int:
+        pid = len(self._ports)
+        if pid > 0xFF:
+            raise ValueError('too many ports in one capture')
+        self._ports[port] = pid
+        name = port.encode('utf-8')
+        self._idx.write(INDEX_ENTRY.pack(IDX_PORT, ts, self._offset))
+        self._f.write(RECORD.pack(len(name), ts, DIR_PORT, pid))
+        self._f.write(name)
+        self._offset += RECORD.size + len(name)
+        return pid
+
+    @property
+    def size(self) -> int:
+        return self._offset
+
+    def flush(self, sync=False):
+        """Hand buffered records to the OS; with `sync`, also wait until they are on disk."""
+        with self._lock:
+            if not self.closed:
+                self._f.flush()
+                self._idx.flush()
+                if sync:
+                    os.fsync(self._f.fileno())
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._f.close()
+            self._idx.close()
+
+
+class CaptureReader:
+    """Read a capture through mmap; payloads are returned as memoryviews."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, 'rb')
+        size = os.fstat(self._f.fileno()).st_size
+        if size < HEADER.size:
+            self._f.close()
+            raise ValueError('not a capture file: {}'.format(path))
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.wall_ns, self.mono_ns = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError('not a capture file: {}'.format(path))
+        self.size = size
+        self.ports = {}
+        self._sync_ts = []
+        self._sync_off = []
+        self._load_index()
+
+    def _load_index(self):
+        entries = None
+        try:
+            with open(self.path + '.idx', 'rb') as f:
+                raw = f.read()
+            if raw[:len(IDX_MAGIC)] == IDX_MAGIC:
+                body = raw[len(IDX_MAGIC):]
+                body = body[:len(body) - len(body) % INDEX_ENTRY.size]
+                entries = list(INDEX_ENTRY.iter_unpack(body))
+        except OSError:
+            pass
+        if entries is None:
+            entries = self.build_index()
+        else:
+            # The index may lag the data after a crash; scan only the tail.
+            last = max((off for _k, _ts, off in entries), default=HEADER.size)
+            entries.extend(self.build_index(start=last, skip_first=bool(entries)))
+        mm = self._mm
+        for kind, ts, off in entries:
+            if kind == IDX_PORT:
+                length, _ts, _d, pid = RECORD.unpack_from(mm, off)
+                start = off + RECORD.size
+                self.ports[pid] = bytes(mm[start:start + length]).decode('utf-8', errors='replace')
+            else:
+                self._sync_ts.append(ts)
+                self._sync_off.append(off)
+        if not self._sync_off:
+            self._sync_ts.append(self.mono_ns)
+            self._sync_off.append(HEADER.size)
+
+    def build_index(self, start=HEADER.size, every=64 * 1024, skip_first=False):
+        """Scan record headers from `start` and return index entries for them."""
+        entries = []
+        mm = self._mm
+        size = self.size
+        off = start
+        next_sync = off if not skip_first else off + every
+        last_ts = self.mono_ns
+        while off + RECORD.size <= size:
+            length, ts, direction, _pid = RECORD.unpack_from(mm, off)
+            if off + RECORD.size + length > size:
+                break
+            last_ts = max(last_ts, ts)
+            if direction == DIR_PORT and not (skip_first and off == start):
+                entries.append((IDX_PORT, ts, off))
+            elif off >= next_sync:
+                entries.append((IDX_SYNC, last_ts, off))
+                next_sync = off + every
+            off += RECORD.size + length
+        return entries
+
+    def offset_for_time(self, ts: int) -> int:
+        """Offset of the first record with timestamp >= ts (monotonic ns)."""
+        i = bisect_right(self._sync_ts, ts) - 1
+        start = self._sync_off[max(i, 0)]
+        for off, rec_ts, _d, _p, _data in self.records(start):
+            if rec_ts >= ts:
+                return off
+        return self.size
+
+    def records(self, start=HEADER.size, include_ports=False):
+        """Yield (offset, ts, direction, port, payload) from a record boundary."""
+        mm = self._mm
+        view = memoryview(mm)
+        size = self.size
+        ports = self.ports
+        off = start
+        try:
+            while off + RECORD.size <= size:
+                length, ts, direction, pid = RECORD.unpack_from(mm, off)
+                data_off = off + RECORD.size
+                end = data_off + length
+                if end > size:
+                    break
+                if direction == DIR_PORT:
+                    if include_ports:
+                        yield off, ts, direction, ports.get(pid, ''), view[data_off:end]
+                else:
+                    yield off, ts, direction, ports.get(pid, ''), view[data_off:end]
+                off = end
+        finally:
+            view.release()
+
+    def records_from_time(self, ts: int):
+        return self.records(self.offset_for_time(ts))
+
+    def __iter__(self):
+        return self.records()
+
+    @property
+    def first_ts(self) -> int:
+        for _off, ts, _d, _p, _data in self.records():
+            return ts
+        return self.mono_ns
+
+    def to_wall_ns(self, ts: int) -> int:
+        return self.wall_ns + (ts - self.mono_ns)
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
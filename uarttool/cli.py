@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
+import argparse
 import signal
+import sys
+from time import strftime
 from serial.tools import list_ports
 
 
@@ -30,7 +33,219 @@ def list_serial_ports():
         print(uart_dsc)
 
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='uart-tool',
+        description='Without --port the GUI is started; with --port RX data is captured headless.')
+    parser.add_argument('-p', '--port', help='serial port or pyserial URL (e.g. /dev/ttyUSB0, COM3, loop://)')
+    parser.add_argument('-b', '--baudrate', type=int, default=115200)
+    parser.add_argument('-x', '--hex', action='store_true', help='print RX data as hex, one line per read')
+    parser.add_argument('-s', '--print-str', action='store_true', help='in hex mode, also print the decoded string')
+    parser.add_argument('-w', '--hex-width', type=int, choices=[8, 16, 32],
+                        help='hex rows of N bytes instead of one line per read (implies --hex)')
+    parser.add_argument('--hexdump', action='store_true', help='classic offset/hex/ASCII rows (implies --hex)')
+    parser.add_argument('-f', '--frame', metavar='SPEC',
+                        help='split RX into frames, one hex line each: slip, cobs, delim:0d0a or '
+                             'len:HEADER:OFFSET:SIZE[:le|be[:ADJUST]] (e.g. len:5aa4:2:2:le:2)')
+    parser.add_argument('-e', '--end', default='\\r', help='line ending appended to stdin commands (default: \\r)')
+    parser.add_argument('-o', '--output', help='write RX data to this file instead of stdout')
+    parser.add_argument('-c', '--capture', help='also record timestamped RX/TX records to this capture file')
+    parser.add_argument('--autolog', metavar='DIR',
+                        help='log every RX/TX byte to rotating capture files in DIR')
+    parser.add_argument('--rotate-mb', type=float, default=64, help='autolog: start a new file after N MiB')
+    parser.add_argument('--rotate-min', type=float, help='autolog: start a new file after N minutes')
+    parser.add_argument('--gzip', action='store_true', help='autolog: gzip finished files in the background')
+    parser.add_argument('--keep', type=int, help='autolog: keep only the newest N finished files')
+    parser.add_argument('--reconnect', action='store_true',
+                        help='reopen the port when it disappears, finding it again by USB serial number or path')
+    parser.add_argument('--serve', metavar='ADDR',
+                        help='share the port with TCP clients on HOST:PORT (or unix:PATH): RX goes to every '
+                             'client, client TX is written to the port')
+    parser.add_argument('--serve-kb', type=int, default=1024,
+                        help='serve: how far (KiB) a client may fall behind before its policy applies')
+    parser.add_argument('--serve-policy', choices=['drop-oldest', 'disconnect'], default='drop-oldest',
+                        help='serve: skip a lagging client forward or disconnect it (default: drop-oldest)')
+    parser.add_argument('-i', '--stdin', action='store_true', help='send lines typed on stdin to the port')
+    parser.add_argument('--script', metavar='FILE',
+                        help='send the commands in FILE (one per line, hex with -x) and report cmd/s and RTT')
+    parser.add_argument('--send-file', metavar='FILE',
+                        help='stream FILE to the port in chunks while RX keeps being read, then report and exit')
+    parser.add_argument('--tx-rate', type=int, metavar='BPS',
+                        help='pace all TX to BPS bytes/s (for devices without flow control)')
+    parser.add_argument('--xfer-send', nargs='+', metavar='FILE',
+                        help='send FILE(s) to a receiver waiting on the port with --xfer-proto, then exit')
+    parser.add_argument('--xfer-recv', metavar='PATH',
+                        help='receive with --xfer-proto into PATH (a file for xmodem, a directory for ymodem)')
+    parser.add_argument('--xfer-proto', choices=['xmodem', 'xmodem-1k', 'ymodem', 'ymodem-g'], default='ymodem',
+                        help='file transfer protocol (default: ymodem)')
+    parser.add_argument('--delay', type=float, default=0.0, help='script: seconds between commands')
+    parser.add_argument('--expect', metavar='REGEX',
+                        help="script/latency: response pattern that answers a command ('hex:5aa5' for literal bytes)")
+    parser.add_argument('--expect-timeout', type=float, default=1.0,
+                        help='script/latency: seconds to wait for a response')
+    parser.add_argument('--repeat', type=int, default=1, help='script: run the command list N times')
+    parser.add_argument('--window', type=int, default=1, help='script: commands in flight at once with --expect')
+    parser.add_argument('--latency', nargs='?', const='', metavar='FILE',
+                        help='measure command round-trip latency, print per-command percentiles on exit '
+                             'and write them to FILE (.csv, or .json with the histogram buckets)')
+    parser.add_argument('-t', '--duration', type=float, help='stop after this many seconds')
+    parser.add_argument('--timeout', type=float, default=0.1, help='serial read timeout in seconds')
+    parser.add_argument('--queue-mb', type=float, default=16, help='RX queue budget in MiB (default: 16)')
+    parser.add_argument('--stats', type=float, metavar='SECONDS',
+                        help='print RX/TX rates, chunk sizes and queue depth to stderr every SECONDS')
+    parser.add_argument('--overflow', choices=['block', 'drop-oldest', 'drop-newest'], default='block',
+                        help='what a full RX queue does: stall the reader or drop data (default: block)')
+    return parser.parse_args(argv)
+
+
+def wait_headless(ctrl, duration=None, stats_interval=None, done=None, progress=None):
+    """
+    Block until stopped, `duration` elapsed or `done` is set, printing stats
+    if asked. `progress` returns a status line shown every second on a tty.
+    """
+    from time import monotonic
+    from uarttool.stats import format_stats
+    deadline = None if duration is None else monotonic() + duration
+    next_stats = monotonic() + stats_interval if stats_interval else None
+    if progress is not None and not sys.stderr.isatty():
+        progress = None
+    next_progress = monotonic() + 1.0 if progress is not None else None
+    while done is None or not done.is_set():
+        now = monotonic()
+        if deadline is not None and now >= deadline:
+            break
+        if next_stats is not None and now >= next_stats:
+            sys.stderr.write(format_stats(ctrl.stats_snapshot()) + '\n')
+            next_stats += stats_interval
+        if next_progress is not None and now >= next_progress:
+            sys.stderr.write('\r' + progress() + '\033[K')
+            next_progress += 1.0
+        wait = 0.1 if done is not None else None
+        for t in (deadline, next_stats, next_progress):
+            if t is not None:
+                wait = t - now if wait is None else min(wait, t - now)
+        if ctrl.stop_event.wait(wait):
+            break
+    if progress is not None:
+        sys.stderr.write('\r\033[K')
+
+
+def run_headless(args):
+    from uarttool.uart import UartController
+    hex_mode = args.hex or args.hexdump or bool(args.hex_width)
+    ctrl = UartController(port=args.port, baudrate=args.baudrate, hex_mode=hex_mode, timeout=args.timeout,
+                          print_str=args.print_str, end=args.end, queue_bytes=int(args.queue_mb * 1024 * 1024),
+                          queue_policy=args.overflow)
+    register_exit_handler(ctrl.stop)
+    ctrl.on_event = lambda text: sys.stderr.write('[{}] {}\n'.format(strftime('%H:%M:%S'), text))
+    if args.reconnect:
+        ctrl.set_reconnect()
+    if args.tx_rate:
+        ctrl.tx_queue.rate = args.tx_rate
+    if args.hex_width or args.hexdump:
+        from uarttool.hexfmt import HexDumper
+        width = args.hex_width or 16
+        ctrl.hex_dumper = HexDumper(width=width, style='plain' if args.hexdump else '0x', offset=args.hexdump,
+                                    ascii=args.hexdump or args.print_str)
+    if args.frame:
+        from uarttool.framer import make_framer
+        try:
+            ctrl.framer = make_framer(args.frame)
+        except ValueError as e:
+            ctrl.stop()
+            sys.exit('uart-tool: {}'.format(e))
+    tracker = None
+    if args.latency is not None:
+        from uarttool.latency import LatencyTracker
+        tracker = LatencyTracker(expect=args.expect, timeout=args.expect_timeout).attach(ctrl)
+    runner = None
+    if args.script:
+        from uarttool.script import ScriptRunner, load_script
+        try:
+            end = ctrl.end.encode('utf-8') if ctrl.end and not hex_mode else b''
+            commands = load_script(args.script, hex_mode=hex_mode, end=end)
+            runner = ScriptRunner(ctrl, commands, delay=args.delay, expect=args.expect, timeout=args.expect_timeout,
+                                  repeat=args.repeat, window=args.window)
+        except (OSError, ValueError) as e:
+            ctrl.stop()
+            sys.exit('uart-tool: {}'.format(e))
+    xfer = None
+    if args.xfer_send or args.xfer_recv:
+        from uarttool.xmodem import ModemReceiver, ModemSender
+        try:
+            if args.xfer_send:
+                xfer = ModemSender(ctrl, args.xfer_send, args.xfer_proto)
+            else:
+                xfer = ModemReceiver(ctrl, args.xfer_recv, args.xfer_proto)
+        except (OSError, ValueError) as e:
+            ctrl.stop()
+            sys.exit('uart-tool: {}'.format(e))
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    autolog = None
+    server = None
+    try:
+        if args.capture:
+            ctrl.start_capture(args.capture)
+        if args.autolog:
+            ctrl.start_autolog(args.autolog, max_bytes=int(args.rotate_mb * 1024 * 1024),
+                               max_seconds=args.rotate_min * 60 if args.rotate_min else None,
+                               compress=args.gzip, keep=args.keep)
+        autolog = ctrl.autolog
+        if args.serve:
+            server = ctrl.start_server(args.serve, client_bytes=args.serve_kb * 1024, policy=args.serve_policy)
+            sys.stderr.write('serving {} on {}\n'.format(args.port, server.address))
+        if xfer is not None:
+            # Hooked before the reader starts, so the peer's first request is not missed
+            xfer.start()
+        ctrl.run(out=out, read_stdin=args.stdin)
+        if runner is not None:
+            runner.start()
+        tx_job = None
+        if args.send_file:
+            try:
+                tx_job = ctrl.send_file(args.send_file)
+            except OSError as e:
+                sys.exit('uart-tool: {}'.format(e))
+        wait_headless(ctrl, args.duration, args.stats,
+                      (runner and runner.done) or (tx_job and tx_job.done) or (xfer and xfer.done),
+                      xfer and xfer.format_progress)
+        if runner is not None:
+            runner.stop()
+            runner.join(1.0)
+            sys.stderr.write(runner.format_report() + '\n')
+        if tx_job is not None:
+            if not tx_job.done.is_set():
+                # Stopped by --duration or the port going away before it was all written
+                tx_job.cancel()
+                tx_job.done.wait(1.0)
+            sys.stderr.write(tx_job.format_report() + '\n')
+        if xfer is not None:
+            xfer.cancel()
+            xfer.join(1.0)
+            sys.stderr.write(xfer.format_report() + '\n')
+        if tracker is not None:
+            sys.stderr.write(tracker.format_report() + '\n')
+            if args.latency:
+                tracker.export(args.latency)
+    finally:
+        ctrl.stop()
+        if ctrl.log_thread:
+            ctrl.log_thread.join()
+        if args.output:
+            out.close()
+        sys.stderr.write(ctrl.throughput_report() + '\n')
+        if autolog is not None:
+            autolog.join()
+            sys.stderr.write(autolog.format_summary() + '\n')
+        if server is not None:
+            sys.stderr.write(server.format_summary() + '\n')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.port:
+        run_headless(args)
+        return
     from uarttool import gui
     gui.run_gui()
 
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import codecs
+import re
+
+# CSI and OSC sequences, 2-byte escapes, DECSC/DECRC
+ANSI_RE = re.compile(
+    r"\x1B\[[0-?]*[ -/]*[@-~]|"  # CSI ... Cmd
+    r"\x1B\][^\x07]*(?:\x07|\x1B\\)|"  # OSC ... BEL or ST
+    r"\x1B[@-Z\\-_]|"  # 2-byte sequences
+    r"\x1B7|\x1B8"  # DECSC/DECRC
+)
+# A tail that can still grow into one of the sequences above
+ANSI_PREFIX_RE = re.compile(r"\x1B(?:\[[0-?]*[ -/]*|\][^\x07]*\x1B?)?\Z")
+# Longest unterminated escape carried over to the next chunk
+MAX_ESCAPE_CARRY = 4096
+
+# xterm palette for SGR 30-37 / 90-97 (and the first 16 of 256-colour mode)
+ANSI_PALETTE = (
+    "#000000", "#cd0000", "#00cd00", "#cdcd00", "#0000ee", "#cd00cd", "#00cdcd", "#e5e5e5",
+    "#7f7f7f", "#ff0000", "#00ff00", "#ffff00", "#5c5cff", "#ff00ff", "#00ffff", "#ffffff",
+)
+# style = (fg, bg, bold, underline, inverse); DEFAULT_STYLE renders untagged
+DEFAULT_STYLE = (None, None, False, False, False)
+# tag name -> style for every SGR tag handed out so far
+SGR_TAG_STYLES = {}
+# (style, params) -> (new style, tag); consoles reuse a handful of transitions
+_SGR_CACHE = {}
+
+
+def _color_256(n: int) -> str:
+    if n < 16:
+        return ANSI_PALETTE[n]
+    if n < 232:
+        n -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return "#{:02x}{:02x}{:02x}".format(levels[n // 36], levels[n // 6 % 6], levels[n % 6])
+    v = 8 + (n - 232) * 10
+    return "#{0:02x}{0:02x}{0:02x}".format(v)
+
+
+def apply_sgr(style, params: str):
+    """Return the style after an SGR parameter string such as '1;31'."""
+    fg, bg, bold, underline, inverse = style
+    codes = [int(p) if p.isdigit() else 0 for p in params.replace(":", ";").split(";")]
+    i = 0
+    while i < len(codes):
+        c = codes[i]
+        if c == 0:
+            fg, bg, bold, underline, inverse = DEFAULT_STYLE
+        elif c == 1:
+            bold = True
+        elif c == 4:
+            underline = True
+        elif c == 7:
+            inverse = True
+        elif c == 22:
+            bold = False
+        elif c == 24:
+            underline = False
+        elif c == 27:
+            inverse = False
+        elif 30 <= c <= 37:
+            fg = ANSI_PALETTE[c - 30]
+        elif 90 <= c <= 97:
+            fg = ANSI_PALETTE[c - 90 + 8]
+        elif c == 39:
+            fg = None
+        elif 40 <= c <= 47:
+            bg = ANSI_PALETTE[c - 40]
+        elif 100 <= c <= 107:
+            bg = ANSI_PALETTE[c - 100 + 8]
+        elif c == 49:
+            bg = None
+        elif c in (38, 48) and i + 1 < len(codes):
+            color = None
+            if codes[i + 1] == 5 and i + 2 < len(codes):
+                color = _color_256(codes[i + 2] & 0xFF)
+                i += 2
+            elif codes[i + 1] == 2 and i + 4 < len(codes):
+                color = "#{:02x}{:02x}{:02x}".format(*(v & 0xFF for v in codes[i + 2:i + 5]))
+                i += 4
+            if c == 38:
+                fg = color
+            else:
+                bg = color
+        i += 1
+    return fg, bg, bold, underline, inverse
+
+
+def sgr_tag(style):
+    """Stable Text tag name for a style; None for the default style."""
+    if style == DEFAULT_STYLE:
+        return None
+    fg, bg, bold, underline, inverse = style
+    name = "sgr:{}:{}:{}{}{}".format(fg or "", bg or "", int(bold), int(underline), int(inverse))
+    SGR_TAG_STYLES[name] = style
+    return name
+
+
+class StreamDecoder:
+    """
+    Bytes -> display text for one RX stream.
+
+    Built once per settings change and fed every chunk (or a whole batch) in
+    order. State carried between calls: the incremental codec (so multi-byte
+    characters split across reads survive), an unterminated escape sequence,
+    and the column of the current line so a backspace at the start of a chunk
+    can still erase text emitted earlier. Such backspaces are returned as
+    leading '\\b' characters for the caller to apply to what it already shows.
+    """
+
+    def __init__(self, encoding="utf-8", strip_ansi=True, normalize_ctrl=True, ansi_color=False):
+        try:
+            factory = codecs.getincrementaldecoder(encoding or "utf-8")
+        except LookupError:
+            factory = codecs.getincrementaldecoder("utf-8")
+        self._codec = factory(errors="ignore")
+        self.encoding = encoding
+        self.strip_ansi = strip_ansi
+        self.normalize_ctrl = normalize_ctrl
+        self.ansi_color = ansi_color
+        self._carry = ""
+        self._col = 0
+        self._style = DEFAULT_STYLE
+        self._tag = None
+
+    def reset(self):
+        self._codec.reset()
+        self._carry = ""
+        self._col = 0
+        self._style = DEFAULT_STYLE
+        self._tag = None
+
+    def decode(self, data) -> str:
+        text = self._codec.decode(data)
+        if self.strip_ansi:
+            text = self._strip_ansi(text)
+        if self.normalize_ctrl:
+            text = text.replace("\r", "")
+            if "\b" in text:
+                return self._apply_backspaces(text)
+        self._advance_col(text)
+        return text
+
+    def decode_batch(self, chunks) -> str:
+        return self.decode(b"".join(chunks))
+
+    def decode_styled(self, data) -> list:
+        """
+        Decode keeping SGR colours: returns [(text, tag)] with adjacent runs of
+        the same style merged (tag None = default style). Other escape
+        sequences are dropped. Leading '\\b's have the same meaning as in decode().
+        """
+        text = self._take_carry(self._codec.decode(data))
+        segments = []
+        style = self._style
+        tag = self._tag
+        pos = 0
+        if "\x1b" in text:
+            for m in ANSI_RE.finditer(text):
+                start = m.start()
+                if start > pos:
+                    segments.append([text[pos:start], tag])
+                seq = m.group()
+                if seq[-1] == "m" and seq[1] == "[":
+                    key = (style, seq)
+                    hit = _SGR_CACHE.get(key)
+                    if hit is None:
+                        if len(_SGR_CACHE) > 4096:
+                            _SGR_CACHE.clear()
+                        new_style = apply_sgr(style, seq[2:-1])
+                        hit = _SGR_CACHE[key] = (new_style, sgr_tag(new_style))
+                    style, tag = hit
+                pos = m.end()
+        if pos < len(text):
+            segments.append([text[pos:], tag])
+        self._style = style
+        self._tag = tag
+        col_done = False
+        if self.normalize_ctrl:
+            for seg in segments:
+                seg[0] = seg[0].replace("\r", "")
+            if any("\b" in seg[0] for seg in segments):
+                segments = self._apply_backspaces_styled(segments)
+                col_done = True
+        else:
+            for seg in segments:
+                seg[0] = seg[0].replace("\r\n", "\n")
+        out = []
+        for seg_text, seg_tag in segments:
+            if not seg_text:
+                continue
+            if out and out[-1][1] == seg_tag:
+                out[-1] = (out[-1][0] + seg_text, seg_tag)
+            else:
+                out.append((seg_text, seg_tag))
+        if not col_done:
+            self._advance_col("".join(t for t, _ in out))
+        return out
+
+    def decode_styled_batch(self, chunks) -> list:
+        return self.decode_styled(b"".join(chunks))
+
+    def _apply_backspaces_styled(self, segments) -> list:
+        # Same rules as _apply_backspaces, but erasing may cross style runs.
+        out = []
+        reach_back = 0
+        for seg_text, seg_tag in segments:
+            parts = seg_text.split("\b")
+            for n, part in enumerate(parts):
+                if n:
+                    while out and not out[-1][0]:
+                        out.pop()
+                    if out:
+                        last = out[-1][0]
+                        if last[-1] != "\n":
+                            out[-1][0] = last[:-1]
+                    elif reach_back < self._col:
+                        reach_back += 1
+                if part:
+                    out.append([part, seg_tag])
+        body = "".join(t for t, _ in out)
+        self._col -= reach_back
+        self._advance_col(body)
+        if reach_back:
+            out.insert(0, ["\b" * reach_back, None])
+        return out
+
+    def _take_carry(self, text: str) -> str:
+        if self._carry:
+            text = self._carry + text
+            self._carry = ""
+        last_esc = text.rfind("\x1b")
+        if last_esc != -1 and len(text) - last_esc <= MAX_ESCAPE_CARRY and ANSI_PREFIX_RE.match(text, last_esc):
+            # Incomplete trailing sequence: keep it for the next chunk
+            self._carry = text[last_esc:]
+            text = text[:last_esc]
+        return text
+
+    def _strip_ansi(self, text: str) -> str:
+        text = self._take_carry(text)
+        if "\x1b" in text:
+            text = ANSI_RE.sub("", text)
+        # Normalize stray carriage returns
+        return text.replace("\r\n", "\n")
+
+    def _apply_backspaces(self, text: str) -> str:
+        parts = text.split("\b")
+        out = [parts[0]] if parts[0] else []
+        reach_back = 0
+        for part in parts[1:]:
+            if out:
+                last = out[-1]
+                # A backspace never crosses a line break
+                if last[-1] != "\n":
+                    if len(last) == 1:
+                        out.pop()
+                    else:
+                        out[-1] = last[:-1]
+            elif reach_back < self._col:
+                reach_back += 1
+            if part:
+                out.append(part)
+        body = "".join(out)
+        self._col -= reach_back
+        self._advance_col(body)
+        return "\b" * reach_back + body
+
+    def _advance_col(self, text: str):
+        nl = text.rfind("\n")
+        if nl == -1:
+            self._col += len(text)
+        else:
+            self._col = len(text) - nl - 1
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Background export of the RX history.
+
+The Tk thread only decides what to write: Scrollback.snapshot() pieces (which
+never change) for rendered text, or a capture file for raw bytes and hex. An
+ExportJob then writes it from a worker thread a chunk at a time, so neither
+the UI nor peak memory depends on the size of the history. Both sources can
+be limited to a wall-clock span, which is also how a selection in the RX pane
+maps onto capture records.
+"""
+
+import os
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from time import localtime, strftime
+
+from uarttool.capture import CaptureReader, DIR_RX
+from uarttool.hexfmt import HexDumper
+
+FORMAT_TEXT = 'text'
+FORMAT_RAW = 'raw'
+FORMAT_HEX = 'hex'
+FORMATS = (FORMAT_TEXT, FORMAT_RAW, FORMAT_HEX)
+
+TS_ABSOLUTE = 'Absolute'
+TS_SINCE_PREV = 'Since Prev Line'
+TS_SINCE_TX = 'Since TX'
+
+# Bytes gathered from a capture before each write
+CHUNK_BYTES = 1024 * 1024
+
+
+def time_label(mode: str, ts: int, base=0) -> str:
+    """Timestamp prefix of a line read at `ts` (wall ns); `base` is the previous line or TX time."""
+    if not ts:
+        return ''
+    if mode == TS_ABSOLUTE:
+        sec, ns = divmod(ts, 1000000000)
+        return '[{}.{:03d}]'.format(strftime('%H:%M:%S', localtime(sec)), ns // 1000000)
+    if not base:
+        return ''
+    return '[+{:.3f}]'.format((ts - base) / 1e9)
+
+
+def parse_time(text: str, ref_ns: int):
+    """
+    Wall ns for 'HH:MM:SS[.fff]' on the local date of `ref_ns`, or for a full
+    'YYYY-MM-DD HH:MM:SS[.fff]'; None for an empty string.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    for fmt in ('%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%H:%M:%S.%f', '%H:%M:%S'):
+        try:
+            t = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if not fmt.startswith('%Y'):
+            ref = datetime.fromtimestamp(ref_ns / 1e9)
+            t = t.replace(year=ref.year, month=ref.month, day=ref.day)
+        return int(t.timestamp()) * 1000000000 + t.microsecond * 1000
+    raise ValueError('bad time {!r} (use HH:MM:SS[.fff])'.format(text))
+
+
+def text_chunks(pieces, start, end, partial=None, times=None, times_first=0, mode=None, tx_times=None,
+                span=None):
+    """
+    Yield (text, progress) for lines [start, end) held by Scrollback.snapshot()
+    pieces, followed by the unterminated `partial` line if given.
+
+    `times` is a copy of the line times from line `times_first` on; it is only
+    needed for timestamp prefixes (`mode`, with `tx_times` for 'Since TX') and
+    for a `span` of (from, to) wall ns, which keeps lines read in [from, to).
+    A line with no time of its own counts as read with the line before it.
+    """
+    total = max(1, end - start + (1 if partial is not None else 0))
+    per_line = mode is not None or span is not None
+    t0, t1 = span if span is not None else (None, None)
+    last = 0
+
+    def line_ts(index):
+        i = index - times_first
+        return times[i] if times is not None and 0 <= i < len(times) else 0
+
+    def render(index, lines):
+        nonlocal last
+        out = []
+        for line in lines:
+            ts = line_ts(index)
+            if ts:
+                last = ts
+            if (t0 is None or last >= t0) and (t1 is None or last < t1):
+                if mode is not None:
+                    if mode == TS_SINCE_PREV:
+                        base = line_ts(index - 1)
+                    elif mode == TS_SINCE_TX:
+                        base = tx_before(tx_times, ts)
+                    else:
+                        base = 0
+                    label = time_label(mode, ts, base)
+                    if label:
+                        line = label + ' ' + line
+                out.append(line + '\n')
+            index += 1
+        return ''.join(out)
+
+    if per_line and start > times_first:
+        last = line_ts(start - 1)
+    for first, text, offsets in pieces:
+        nlines = len(offsets) - 1
+        k0 = max(0, start - first)
+        k1 = min(nlines, end - first)
+        if k0 >= k1:
+            continue
+        body = text[offsets[k0]:offsets[k1] - 1]
+        if per_line:
+            yield render(first + k0, body.split('\n')), (first + k1 - start) / total
+        else:
+            yield body + '\n', (first + k1 - start) / total
+    if partial is not None:
+        yield render(end, [partial]) if per_line else partial + '\n', 1.0
+
+
+def tx_before(tx_times, ts: int) -> int:
+    """Latest TX time at or before `ts`; 0 if there is none."""
+    if not tx_times or not ts:
+        return 0
+    i = bisect_right(tx_times, ts)
+    return tx_times[i - 1] if i else 0
+
+
+def capture_chunks(path, fmt=FORMAT_RAW, span=None, port=None):
+    """
+    Yield (data, progress) for the RX bytes of a capture, optionally only one
+    port's and only those read within a `span` of (from, to) wall ns. Raw
+    bytes come out as bytes, hex as 16-byte rows with offsets and ASCII.
+    """
+    reader = CaptureReader(path)
+    try:
+        to_mono = reader.mono_ns - reader.wall_ns
+        t0 = span[0] if span else None
+        t1 = span[1] if span else None
+        records = reader.records() if t0 is None else reader.records_from_time(t0 + to_mono)
+        stop = None if t1 is None else t1 + to_mono
+        dumper = HexDumper(16, 'plain', offset=True, ascii=True) if fmt == FORMAT_HEX else None
+        size = max(1, reader.size)
+        buf = bytearray()
+        for off, ts, direction, name, data in records:
+            if stop is not None and ts >= stop:
+                break
+            if direction != DIR_RX or (port and name != port):
+                continue
+            buf += data
+            if len(buf) >= CHUNK_BYTES:
+                yield (dumper.feed(buf) if dumper else bytes(buf)), off / size
+                buf.clear()
+        if dumper:
+            yield dumper.feed(buf) + dumper.flush(), 1.0
+        elif buf:
+            yield bytes(buf), 1.0
+    finally:
+        reader.close()
+
+
+class ExportJob:
+    """
+    Writes the chunks of a text_chunks() / capture_chunks() generator to
+    `path` on a worker thread. Poll `progress` (0..1) and `done` from Tk;
+    cancel() stops after the current chunk and removes the partial file.
+    """
+
+    def __init__(self, path: str, chunks, binary=False):
+        self.path = path
+        self.chunks = chunks
+        self.binary = binary
+        self.progress = 0.0
+        self.written = 0
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rx-export')
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            if self.binary:
+                f = open(self.path, 'wb')
+            else:
+                f = open(self.path, 'w', encoding='utf-8', newline='')
+            with f:
+                for data, progress in self.chunks:
+                    if self.cancelled:
+                        break
+                    f.write(data)
+                    self.written += len(data)
+                    self.progress = progress
+            if self.cancelled:
+                os.remove(self.path)
+        except Exception as e:
+            self.error = e
+        finally:
+            close = getattr(self.chunks, 'close', None)
+            if close is not None:
+                close()
+            self.done.set()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Streaming frame parsers for binary protocols.
+
+Every framer takes RX chunks of any size through feed() and returns the
+frames completed so far as (frame, error) pairs; error is None for a good
+frame, otherwise a short reason and frame holds the offending raw bytes.
+Unconsumed bytes are kept, and the next feed() resumes the search where the
+previous one stopped, so no byte is scanned twice. flush() hands out a
+trailing partial frame (flagged 'incomplete').
+
+make_framer() builds one from a spec string, as used by the CLI and GUI:
+    delim:0d0a                      frames end with the given bytes
+    len:5aa4:2:2:le:2               header, length offset, size, byte order,
+                                    adjust (frame = length field end + value + adjust)
+    slip                            RFC 1055 SLIP, payload un-escaped
+    cobs                            COBS with 0x00 delimiters, payload decoded
+"""
+
+from uarttool.utils import parse_bytes_to_hex_str
+
+# A frame that grows past this is cut and flagged instead of buffered forever
+MAX_FRAME = 64 * 1024
+
+SLIP_END = 0xC0
+SLIP_ESC = 0xDB
+
+
+class DelimiterFramer:
+    def __init__(self, delimiter=b'\n', max_len=MAX_FRAME):
+        if not delimiter:
+            raise ValueError('empty frame delimiter')
+        self.delimiter = bytes(delimiter)
+        self.max_len = max_len
+        self.reset()
+
+    def reset(self):
+        self._buf = bytearray()
+        self._scan = 0
+
+    def feed(self, data) -> list:
+        buf = self._buf
+        buf += data
+        delim = self.delimiter
+        dlen = len(delim)
+        frames = []
+        start = 0
+        scan = self._scan
+        while True:
+            end = buf.find(delim, scan)
+            if end == -1:
+                break
+            end += dlen
+            frames.append((bytes(buf[start:end]), None))
+            start = scan = end
+        if len(buf) - start > self.max_len:
+            frames.append((bytes(buf[start:]), 'too long'))
+            start = len(buf)
+        del buf[:start]
+        # A delimiter may straddle this chunk and the next one.
+        self._scan = max(0, len(buf) - dlen + 1)
+        return frames
+
+    def flush(self) -> list:
+        frames = [(bytes(self._buf), 'incomplete')] if self._buf else []
+        self.reset()
+        return frames
+
+
+class LengthFramer:
+    """
+    Frames starting with a fixed header and carrying a length field.
+
+    The frame is length_offset + length_size + value + length_adjust bytes
+    long, e.g. the 0x5A 0xA4 commands use header=b'\\x5a\\xa4', length_offset=2,
+    length_size=2, little endian and length_adjust=2 for the trailing CRC.
+    Bytes that do not start with the header are reported as one 'no header'
+    frame before the parser resynchronises on the next header.
+    """
+
+    def __init__(self, header=b'', length_offset=0, length_size=1, byteorder='little', length_adjust=0,
+                 max_len=MAX_FRAME):
+        if length_size not in (1, 2, 4):
+            raise ValueError('length field must be 1, 2 or 4 bytes')
+        if byteorder not in ('little', 'big'):
+            raise ValueError('byte order must be little or big')
+        self.header = bytes(header)
+        self.length_offset = length_offset
+        self.length_size = length_size
+        self.byteorder = byteorder
+        self.length_adjust = length_adjust
+        self.max_len = max_len
+        self.reset()
+
+    def reset(self):
+        self._buf = bytearray()
+        self._need = 0  # total length of the frame at the start of _buf, once known
+        self._hunt = 0  # where the next header search resumes
+
+    def feed(self, data) -> list:
+        buf = self._buf
+        buf += data
+        header = self.header
+        hlen = len(header)
+        len_end = self.length_offset + self.length_size
+        frames = []
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            if hlen and not self._need:
+                hit = buf.find(header, max(pos, self._hunt))
+                if hit == -1:
+                    # Keep a possible header prefix at the end, report the rest
+                    keep = max(pos, n - hlen + 1)
+                    if keep > pos:
+                        frames.append((bytes(buf[pos:keep]), 'no header'))
+                        pos = keep
+                    self._hunt = pos
+                    break
+                if hit > pos:
+                    frames.append((bytes(buf[pos:hit]), 'no header'))
+                    pos = hit
+            if not self._need:
+                if n - pos < len_end:
+                    self._hunt = pos
+                    break
+                value = int.from_bytes(buf[pos + self.length_offset:pos + len_end], self.byteorder)
+                need = len_end + value + self.length_adjust
+                if need < max(len_end, hlen, 1) or need > self.max_len:
+                    # Implausible length: drop the header's first byte and hunt again
+                    frames.append((bytes(buf[pos:pos + 1]), 'bad length'))
+                    pos += 1
+                    self._hunt = pos
+                    continue
+                self._need = need
+            if n - pos < self._need:
+                break
+            end = pos + self._need
+            frames.append((bytes(buf[pos:end]), None))
+            pos = end
+            self._need = 0
+            self._hunt = pos
+        del buf[:pos]
+        self._hunt -= pos
+        return frames
+
+    def flush(self) -> list:
+        frames = [(bytes(self._buf), 'incomplete')] if self._buf else []
+        self.reset()
+        return frames
+
+
+class SlipFramer:
+    """RFC 1055 SLIP: frames end with 0xC0; 0xDB 0xDC / 0xDB 0xDD escape END / ESC."""
+
+    def __init__(self, max_len=MAX_FRAME):
+        self.max_len = max_len
+        self.reset()
+
+    def reset(self):
+        self._buf = bytearray()
+        self._scan = 0
+
+    @staticmethod
+    def decode(raw):
+        """Un-escape one frame; returns None if it holds an invalid escape."""
+        esc = raw.count(SLIP_ESC)
+        if esc:
+            if esc != raw.count(b'\xdb\xdc') + raw.count(b'\xdb\xdd'):
+                return None
+            # An escape's second byte is never 0xDB, so the order is safe.
+            raw = raw.replace(b'\xdb\xdc', b'\xc0').replace(b'\xdb\xdd', b'\xdb')
+        return bytes(raw)
+
+    def feed(self, data) -> list:
+        buf = self._buf
+        buf += data
+        frames = []
+        start = 0
+        while True:
+            end = buf.find(SLIP_END, self._scan)
+            if end == -1:
+                break
+            if end > start:
+                raw = buf[start:end]
+                payload = self.decode(raw)
+                frames.append((bytes(raw), 'bad escape') if payload is None else (payload, None))
+            start = self._scan = end + 1
+        if len(buf) - start > self.max_len:
+            frames.append((bytes(buf[start:]), 'too long'))
+            start = len(buf)
+        del buf[:start]
+        self._scan = len(buf)
+        return frames
+
+    def flush(self) -> list:
+        frames = [(bytes(self._buf), 'incomplete')] if self._buf else []
+        self.reset()
+        return frames
+
+
+class CobsFramer(SlipFramer):
+    """Consistent Overhead Byte Stuffing with a 0x00 delimiter after each frame."""
+
+    @staticmethod
+    def decode(raw):
+        """Decode one frame (without its 0x00); returns None if it is malformed."""
+        out = bytearray()
+        i = 0
+        n = len(raw)
+        while i < n:
+            code = raw[i]
+            end = i + code
+            if code == 0 or end > n:
+                return None
+            out += raw[i + 1:end]
+            i = end
+            if code != 0xFF and i < n:
+                out.append(0)
+        return bytes(out)
+
+    def feed(self, data) -> list:
+        buf = self._buf
+        buf += data
+        frames = []
+        start = 0
+        while True:
+            end = buf.find(0, self._scan)
+            if end == -1:
+                break
+            if end > start:
+                raw = buf[start:end]
+                payload = self.decode(raw)
+                frames.append((bytes(raw), 'bad COBS') if payload is None else (payload, None))
+            start = self._scan = end + 1
+        if len(buf) - start > self.max_len:
+            frames.append((bytes(buf[start:]), 'too long'))
+            start = len(buf)
+        del buf[:start]
+        self._scan = len(buf)
+        return frames
+
+
+FRAMING_EXAMPLES = ('slip', 'cobs', 'delim:0d0a', 'len:5aa4:2:2:le:2')
+
+
+def make_framer(spec: str):
+    """Build a framer from a spec string (see the module docstring); '' or 'none' gives None."""
+    spec = (spec or '').strip()
+    if not spec or spec.lower() == 'none':
+        return None
+    kind, _sep, rest = spec.partition(':')
+    kind = kind.lower()
+    try:
+        if kind == 'slip':
+            return SlipFramer()
+        if kind == 'cobs':
+            return CobsFramer()
+        if kind == 'delim':
+            return DelimiterFramer(bytes.fromhex(rest))
+        if kind == 'len':
+            fields = rest.split(':')
+            header = bytes.fromhex(fields[0]) if fields[0] else b''
+            offset = int(fields[1]) if len(fields) > 1 and fields[1] else len(header)
+            size = int(fields[2]) if len(fields) > 2 and fields[2] else 1
+            order = {'le': 'little', 'be': 'big'}.get(fields[3].lower() if len(fields) > 3 else 'le')
+            adjust = int(fields[4]) if len(fields) > 4 and fields[4] else 0
+            if order is None:
+                raise ValueError('byte order must be le or be')
+            return LengthFramer(header, offset, size, order, adjust)
+    except (ValueError, IndexError) as e:
+        raise ValueError('bad framing spec {!r}: {}'.format(spec, e))
+    raise ValueError('unknown framing {!r} (try {})'.format(spec, ', '.join(FRAMING_EXAMPLES)))
+
+
+def format_frame(frame, error=None, print_str=False) -> str:
+    """One display line per frame; bad frames end with '  !<reason>'."""
+    line = parse_bytes_to_hex_str(frame)
+    if print_str:
+        line += '  |' + frame.decode('utf-8', errors='replace').replace('\n', ' ').replace('\r', ' ') + '|'
+    if error:
+        line += '  !' + error
+    return line + '\n'
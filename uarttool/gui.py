@@ -3,42 +3,136 @@
 
 import tkinter as tk
 import os
+import re
 import traceback
+from bisect import bisect_left, bisect_right
+from collections import deque
 from datetime import datetime
+from time import monotonic_ns, perf_counter_ns, time_ns
 import queue
-import threading
-import re
 from tkinter import ttk, messagebox, filedialog
 from typing import Optional
 from tkinter import font as tkfont
 
-from serial.tools import list_ports
 
 from uarttool.uart import UartController
-from uarttool.utils import convert_cmd_to_bytes, parse_bytes_to_hex_str, get_str_info
+from uarttool.bufpool import release_all
+from uarttool.bytequeue import DEFAULT_QUEUE_BYTES, POLICY_BLOCK, POLICY_DROP_NEWEST, POLICY_DROP_OLDEST
+from uarttool.replay import ReplayController
+from uarttool.script import ScriptRunner, load_script
+from uarttool.search import RxSearch
+from uarttool.scrollback import Scrollback, line_start_times, times_at
+from uarttool.stats import format_size, format_stats
+from uarttool.export import (
+    FORMAT_HEX, FORMAT_RAW, FORMAT_TEXT, ExportJob, capture_chunks, parse_time, text_chunks, time_label,
+)
+from uarttool.decoder import ANSI_PALETTE, SGR_TAG_STYLES, StreamDecoder, sgr_tag
+from uarttool.framer import FRAMING_EXAMPLES, format_frame, make_framer
+from uarttool.ports import get_registry
+from uarttool.server import SERVER_POLICIES
+from uarttool.hexfmt import HexDumper
+from uarttool.latency import LatencyTracker
+from uarttool.xmodem import PROTOCOLS, ModemReceiver, ModemSender
+from uarttool.timeline import END, KIND_TX, format_tx, rows_before, rows_from, time_bounds
+from uarttool.utils import convert_cmd_to_bytes, get_str_info
 from uarttool.cli import register_exit_handler
 
 
+HEX_ROW_CHOICES = ["Chunk", "8", "16", "32"]
+# Hexdump rows with an ASCII gutter wait for a full row; show a partial one
+# after this much RX silence.
+HEX_IDLE_FLUSH_MS = 300
+STATS_INTERVAL_MS = 1000
+SCRIPT_POLL_MS = 200
+TX_POLL_MS = 200
+# Bad frames are drawn in bold bright red
+BAD_FRAME_TAG = sgr_tag((ANSI_PALETTE[9], None, True, False, False))
+# Port lost / reconnected notices in bold bright blue
+PORT_EVENT_TAG = sgr_tag((ANSI_PALETTE[12], None, True, False, False))
+
+# Current search hit in the RX pane; the search is fed new lines this often
+SEARCH_TAG = "search_hit"
+SEARCH_POLL_MS = 200
+EXPORT_POLL_MS = 100
+TIMELINE_POLL_MS = 500
+# One colour per tab in the merged timeline
+TIMELINE_COLORS = ["#1f77b4", "#d62728", "#2ca02c", "#9467bd", "#ff7f0e", "#17becf", "#8c564b", "#e377c2"]
+TIMELINE_TX_BG = "#f0f0f0"
+NO_CAPTURE_MSG = "Raw bytes and hex dumps read a capture: Record, replay or turn on Auto Log first."
+
+# RX line timestamps, drawn in a gutter left of the RX pane
+TIMESTAMP_MODES = ["Off", "Absolute", "Since Prev Line", "Since TX"]
+TIMESTAMP_FG = "#7f7f7f"
+
+OVERFLOW_POLICIES = {
+    "Block": POLICY_BLOCK,
+    "Drop Oldest": POLICY_DROP_OLDEST,
+    "Drop Newest": POLICY_DROP_NEWEST,
+}
+
+REPLAY_SPEEDS = {
+    "Original": 1.0,
+    "2x": 2.0,
+    "10x": 10.0,
+    "100x": 100.0,
+    "Max": 0,
+}
+
+
 class UartTab(ttk.Frame):
+    # Monospace family for every tab, looked up by the first one
+    _mono_family = None
+
     def __init__(self, app: "UartGuiApp", notebook: ttk.Notebook, label: str):
         super().__init__(notebook)
         self.app = app
         self.notebook = notebook
         self.label = label
         self.mono_font = self._init_mono_font()
+        self.bold_font = tkfont.Font(family=self.mono_font.cget("family"), size=self.mono_font.cget("size"), weight="bold")
         self.app.apply_global_font(self.mono_font)
         self.rx_font_size = tk.IntVar(value=12)
 
         self.controller: Optional[UartController] = None
         self.tx_history = []
         self.tx_history_index = 0
-        self.rx_thread_stop = None
         self.rx_update_pending = False
-        self.rx_gui_queue = queue.Queue()
-        self.ansi_carry = ""
+        # Set by the reading thread once it has posted <<RxData>>, with the
+        # time of that first read since the last flush (for the lag counter)
+        self._rx_notified = False
+        self._rx_notify_ns = 0
+        # (wall ns, text) port events from the controller, shown at the next flush
+        self._port_events = deque()
+        # Latest PortStats snapshot shown in the stats strip
+        self.last_stats = None
+        self._stats_job = None
+        self.hex_dumper = HexDumper()
+        self._hex_idle_job = None
+        self.framer = None
+        self.script_runner = None
+        self.tx_job = None
+        self.xfer = None
+        self.latency_tracker = None
+        self._latency_params = None
         self.rx_autoscroll = True
         self.rx_force_scroll_once = False
         self._rx_internal_scroll = False
+        # Full RX history lives in the scrollback; rx_text only holds a window
+        # of rx_view_lines lines starting at absolute line rx_view_start.
+        self.scrollback = Scrollback()
+        self.rx_view_lines = 5000
+        self.rx_view_start = 0
+        self._rx_edge_check_pending = False
+        self._sgr_tags = set()
+        self._ts_gutter_job = None
+        self.search = None
+        self._search_key = None
+        self._search_line = None
+        self._search_job = None
+        self._search_poll_job = None
+        self.filter_window = None
+        self.export_window = None
+        self._last_capture = None
 
         self._build_ui()
         self._apply_rx_font_size()
@@ -57,8 +151,9 @@ class UartTab(ttk.Frame):
         main = ttk.Frame(self, padding=3)
         main.pack(fill=tk.BOTH, expand=True)
 
-        # Right-click the tab header to open settings (port/baud/connect/options).
-        self._build_settings_window()
+        # Right-click the tab header to open settings (port/baud/connect/options);
+        # the window itself is only built on the first right-click.
+        self._init_settings_vars()
 
         io = ttk.Frame(main)
         io.pack(fill=tk.BOTH, expand=True, pady=(0, 0))
@@ -70,7 +165,41 @@ class UartTab(ttk.Frame):
         rx_header.pack(fill=tk.X, pady=(0, 1))
         ttk.Label(rx_header, text="RX Log").pack(side=tk.LEFT)
         ttk.Button(rx_header, text="Export", command=self._export_rx).pack(side=tk.RIGHT, padx=(6, 0))
+        ttk.Button(rx_header, text="Timeline", command=self.app.open_timeline).pack(side=tk.RIGHT, padx=(6, 0))
+        self.record_btn = ttk.Button(rx_header, text="Record", command=self._toggle_capture)
+        self.record_btn.pack(side=tk.RIGHT, padx=(6, 0))
         ttk.Button(rx_header, text="Clear", command=self._clear_rx).pack(side=tk.RIGHT)
+        self.ts_mode_entry = ttk.Combobox(
+            rx_header,
+            textvariable=self.ts_mode_var,
+            width=15,
+            values=TIMESTAMP_MODES,
+            state="readonly",
+        )
+        self.ts_mode_entry.pack(side=tk.RIGHT, padx=(0, 12))
+        self.ts_mode_entry.bind("<<ComboboxSelected>>", lambda _e: self._apply_ts_mode())
+        ttk.Label(rx_header, text="Time").pack(side=tk.RIGHT, padx=(0, 4))
+
+        search_bar = ttk.Frame(rx_frame)
+        search_bar.pack(fill=tk.X, pady=(0, 1))
+        ttk.Label(search_bar, text="Find").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_bar, textvariable=self.search_var, width=32, font=self.mono_font)
+        self.search_entry.pack(side=tk.LEFT, padx=6)
+        self.search_entry.bind("<Return>", lambda _e: self._search_step())
+        self.search_entry.bind("<Shift-Return>", lambda _e: self._search_step(backward=True))
+        self.search_entry.bind("<Escape>", self._clear_search)
+        self.search_regex_var = tk.BooleanVar(value=False)
+        self.search_case_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_bar, text="Regex", variable=self.search_regex_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(search_bar, text="Match Case", variable=self.search_case_var).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(search_bar, text="Prev", command=lambda: self._search_step(backward=True)).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(search_bar, text="Next", command=self._search_step).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(search_bar, text="Filter", command=self._open_filter_window).pack(side=tk.LEFT, padx=(6, 0))
+        self.search_status_var = tk.StringVar(value="")
+        ttk.Label(search_bar, textvariable=self.search_status_var).pack(side=tk.LEFT, padx=(10, 0))
+        self.rx_drop_var = tk.StringVar(value="")
+        ttk.Label(rx_header, textvariable=self.rx_drop_var, foreground="#cd0000").pack(side=tk.RIGHT, padx=(0, 12))
         spacer = tk.Frame(rx_header, width=30)
         spacer.pack(side=tk.RIGHT)
         ttk.Button(
@@ -79,15 +208,19 @@ class UartTab(ttk.Frame):
             command=self._confirm_close_tab,
         ).pack(side=tk.RIGHT, padx=(32, 0))
 
+        self.rx_ts_canvas = tk.Canvas(rx_frame, width=0, highlightthickness=0)
         self.rx_text = tk.Text(rx_frame, wrap="word", height=18, state="disabled", font=self.mono_font)
         self.rx_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        rx_scroll = ttk.Scrollbar(rx_frame, command=self._on_rx_scrollbar)
-        rx_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-        self.rx_text.configure(yscrollcommand=rx_scroll.set)
+        self.rx_text.bind("<Configure>", lambda _e: self._schedule_ts_gutter(), add="+")
+        self.rx_scroll = ttk.Scrollbar(rx_frame, command=self._on_rx_scrollbar)
+        self.rx_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rx_text.configure(yscrollcommand=self._on_rx_yscroll)
         self.rx_text.bind("<MouseWheel>", self._on_rx_user_scroll)
         self.rx_text.bind("<Button-4>", self._on_rx_user_scroll)
         self.rx_text.bind("<Button-5>", self._on_rx_user_scroll)
         self.rx_text.bind("<KeyRelease>", self._on_rx_user_scroll)
+        self.rx_text.bind("<Control-f>", self._focus_search)
+        self.rx_text.tag_configure(SEARCH_TAG, background="#ffff66", foreground="#000000")
 
         tx_frame = ttk.Labelframe(io, text="TX", padding=4)
         tx_frame.pack(fill=tk.X, pady=(10, 0))
@@ -99,26 +232,81 @@ class UartTab(ttk.Frame):
         self.tx_entry.bind("<Up>", self._on_tx_history_up)
         self.tx_entry.bind("<Down>", self._on_tx_history_down)
         ttk.Button(tx_frame, text="Send", command=self._send_tx).pack(side=tk.LEFT, padx=6)
-
-        note = ttk.Label(main, text="Tip: Select RX text and press Ctrl+C to copy selection.")
-        note.pack(anchor="w", pady=(8, 0))
-
-    def _build_settings_window(self):
-        """Create the floating settings window shown when right-clicking the tab header."""
-        # Shared variables across widgets
+        self.script_btn = ttk.Button(tx_frame, text="Script...", command=self._toggle_script)
+        self.script_btn.pack(side=tk.LEFT)
+        self.send_file_btn = ttk.Button(tx_frame, text="Send File...", command=self._toggle_send_file)
+        self.send_file_btn.pack(side=tk.LEFT, padx=(6, 0))
+        self.xfer_var = tk.StringVar(value="raw")
+        ttk.Combobox(
+            tx_frame,
+            textvariable=self.xfer_var,
+            values=["raw"] + list(PROTOCOLS),
+            state="readonly",
+            width=9,
+        ).pack(side=tk.LEFT, padx=(6, 0))
+        self.recv_file_btn = ttk.Button(tx_frame, text="Receive...", command=self._toggle_receive_file)
+        self.recv_file_btn.pack(side=tk.LEFT, padx=(6, 0))
+
+        status = ttk.Frame(main)
+        status.pack(fill=tk.X, pady=(8, 0))
+        note = ttk.Label(status, text="Tip: Select RX text and press Ctrl+C to copy selection.")
+        note.pack(side=tk.LEFT)
+        self.stats_var = tk.StringVar(value="")
+        ttk.Label(status, textvariable=self.stats_var).pack(side=tk.RIGHT)
+        self.script_var = tk.StringVar(value="")
+        ttk.Label(status, textvariable=self.script_var).pack(side=tk.RIGHT, padx=(0, 12))
+        self.tx_file_var = tk.StringVar(value="")
+        ttk.Label(status, textvariable=self.tx_file_var).pack(side=tk.RIGHT, padx=(0, 12))
+
+    def _init_settings_vars(self):
+        """Variables behind the settings window; they exist (and work) before it is built."""
         self.port_var = tk.StringVar()
         self.baud_var = tk.StringVar(value="115200")
         self.timeout_var = tk.StringVar(value="0.1")
         self.wtimeout_var = tk.StringVar(value="1.0")
+        self.tx_rate_var = tk.StringVar(value="")
+        self.tx_rate_var.trace_add("write", lambda *_a: self._apply_tx_rate())
+        self.reconnect_var = tk.BooleanVar(value=False)
         self.end_var = tk.StringVar(value="\\r")
         self.poll_ms_var = tk.StringVar(value="50")
         self.rx_color_var = tk.StringVar(value="Default")
         self.hex_var = tk.BooleanVar(value=False)
         self.print_str_var = tk.BooleanVar(value=False)
+        self.hex_row_var = tk.StringVar(value="Chunk")
+        self.hexdump_var = tk.BooleanVar(value=False)
         self.encoding_var = tk.StringVar(value="utf-8")
         self.strip_ansi_var = tk.BooleanVar(value=True)
         self.normalize_ctrl_var = tk.BooleanVar(value=True)
+        self.ansi_color_var = tk.BooleanVar(value=False)
+        for var in (self.encoding_var, self.strip_ansi_var, self.normalize_ctrl_var, self.ansi_color_var):
+            var.trace_add("write", self._rebuild_decoder)
+        self._rebuild_decoder()
+        self.history_lines_var = tk.StringVar(value="2000000")
+        self.history_mb_var = tk.StringVar(value="256")
+        self.replay_speed_var = tk.StringVar(value="Original")
+        self.framing_var = tk.StringVar(value="None")
+        self.queue_mb_var = tk.StringVar(value=str(DEFAULT_QUEUE_BYTES >> 20))
+        self.overflow_var = tk.StringVar(value="Block")
+        self.ts_mode_var = tk.StringVar(value="Off")
+        self.script_delay_var = tk.StringVar(value="0")
+        self.script_expect_var = tk.StringVar(value="")
+        self.script_timeout_var = tk.StringVar(value="1000")
+        self.script_repeat_var = tk.StringVar(value="1")
+        self.script_window_var = tk.StringVar(value="1")
+        self.latency_var = tk.BooleanVar(value=False)
+        self.autolog_var = tk.BooleanVar(value=False)
+        self.autolog_dir_var = tk.StringVar(value=os.path.join(os.path.expanduser("~"), "uarttool_logs"))
+        self.autolog_mb_var = tk.StringVar(value="64")
+        self.autolog_min_var = tk.StringVar(value="")
+        self.autolog_gzip_var = tk.BooleanVar(value=False)
+        self.serve_var = tk.BooleanVar(value=False)
+        self.serve_addr_var = tk.StringVar(value="127.0.0.1:7000")
+        self.serve_kb_var = tk.StringVar(value="1024")
+        self.serve_policy_var = tk.StringVar(value=POLICY_DROP_OLDEST)
+        self.settings_win = None
 
+    def _build_settings_window(self):
+        """Create the floating settings window shown when right-clicking the tab header."""
         self.settings_win = tk.Toplevel(self)
         self.settings_win.withdraw()
         self.settings_win.title("UART Settings")
@@ -135,7 +323,7 @@ class UartTab(ttk.Frame):
         ttk.Label(top, text="Port").pack(side=tk.LEFT)
         self.port_combo = ttk.Combobox(top, textvariable=self.port_var, width=24, state="readonly")
         self.port_combo.pack(side=tk.LEFT, padx=6)
-        ttk.Button(top, text="Refresh", command=self._refresh_ports).pack(side=tk.LEFT)
+        ttk.Button(top, text="Refresh", command=lambda: get_registry().refresh(0)).pack(side=tk.LEFT)
 
         ttk.Label(top, text="Baud").pack(side=tk.LEFT, padx=(14, 0))
         self.baud_entry = ttk.Combobox(
@@ -169,6 +357,12 @@ class UartTab(ttk.Frame):
 
         self.connect_btn = ttk.Button(top, text="Connect", command=self._toggle_connect)
         self.connect_btn.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Checkbutton(
+            top,
+            text="Auto Reconnect",
+            variable=self.reconnect_var,
+            command=self._apply_reconnect,
+        ).pack(side=tk.LEFT, padx=(10, 0))
 
         cfg = ttk.Labelframe(frame, text="Options", padding=10)
         cfg.pack(fill=tk.X, pady=(10, 0))
@@ -178,6 +372,15 @@ class UartTab(ttk.Frame):
         self.print_str_chk = ttk.Checkbutton(cfg, text="Print String", variable=self.print_str_var, command=self._on_print_str_toggle)
         self.print_str_chk.pack(side=tk.LEFT, padx=10)
 
+        ttk.Label(cfg, text="Hex Row").pack(side=tk.LEFT, padx=(4, 0))
+        self.hex_row_entry = ttk.Combobox(cfg, textvariable=self.hex_row_var, width=6, values=HEX_ROW_CHOICES, state="readonly")
+        self.hex_row_entry.pack(side=tk.LEFT, padx=6)
+        self.hex_row_entry.bind("<<ComboboxSelected>>", lambda _e: self._rebuild_hex_dumper())
+        self.hexdump_chk = ttk.Checkbutton(cfg, text="Hexdump", variable=self.hexdump_var, command=self._rebuild_hex_dumper)
+        self.hexdump_chk.pack(side=tk.LEFT, padx=(4, 0))
+        self.ansi_color_chk = ttk.Checkbutton(cfg, text="ANSI Color", variable=self.ansi_color_var)
+        self.ansi_color_chk.pack(side=tk.LEFT, padx=(10, 0))
+
         ttk.Label(cfg, text="Timeout").pack(side=tk.LEFT, padx=(14, 0))
         self.timeout_entry = ttk.Entry(cfg, textvariable=self.timeout_var, width=8)
         self.timeout_entry.pack(side=tk.LEFT, padx=6)
@@ -186,6 +389,9 @@ class UartTab(ttk.Frame):
         self.wtimeout_entry = ttk.Entry(cfg, textvariable=self.wtimeout_var, width=8)
         self.wtimeout_entry.pack(side=tk.LEFT, padx=6)
 
+        ttk.Label(cfg, text="TX B/s").pack(side=tk.LEFT, padx=(14, 0))
+        ttk.Entry(cfg, textvariable=self.tx_rate_var, width=8).pack(side=tk.LEFT, padx=6)
+
         ttk.Label(cfg, text="End").pack(side=tk.LEFT, padx=(14, 0))
         self.end_entry = ttk.Combobox(
             cfg,
@@ -225,6 +431,122 @@ class UartTab(ttk.Frame):
         self.rx_color_entry.pack(side=tk.LEFT, padx=6)
         self.rx_color_entry.bind("<<ComboboxSelected>>", lambda _e: self._apply_rx_color())
 
+        hist = ttk.Labelframe(frame, text="History", padding=10)
+        hist.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(hist, text="Max Lines").pack(side=tk.LEFT)
+        self.history_lines_entry = ttk.Entry(hist, textvariable=self.history_lines_var, width=10)
+        self.history_lines_entry.pack(side=tk.LEFT, padx=6)
+        self.history_lines_entry.bind("<KeyRelease>", lambda _e: self._apply_history_limits())
+        ttk.Label(hist, text="Max MB").pack(side=tk.LEFT, padx=(14, 0))
+        self.history_mb_entry = ttk.Entry(hist, textvariable=self.history_mb_var, width=8)
+        self.history_mb_entry.pack(side=tk.LEFT, padx=6)
+        self.history_mb_entry.bind("<KeyRelease>", lambda _e: self._apply_history_limits())
+
+        buffers = ttk.Labelframe(frame, text="RX Queues", padding=10)
+        buffers.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(buffers, text="Max MB").pack(side=tk.LEFT)
+        self.queue_mb_entry = ttk.Entry(buffers, textvariable=self.queue_mb_var, width=8)
+        self.queue_mb_entry.pack(side=tk.LEFT, padx=6)
+        self.queue_mb_entry.bind("<KeyRelease>", lambda _e: self._apply_queue_limits())
+        ttk.Label(buffers, text="When Full").pack(side=tk.LEFT, padx=(14, 0))
+        self.overflow_entry = ttk.Combobox(
+            buffers,
+            textvariable=self.overflow_var,
+            width=12,
+            values=list(OVERFLOW_POLICIES),
+            state="readonly",
+        )
+        self.overflow_entry.pack(side=tk.LEFT, padx=6)
+        self.overflow_entry.bind("<<ComboboxSelected>>", lambda _e: self._apply_queue_limits())
+
+        framing = ttk.Labelframe(frame, text="Framing", padding=10)
+        framing.pack(fill=tk.X, pady=(10, 0))
+        self.framing_entry = ttk.Combobox(
+            framing,
+            textvariable=self.framing_var,
+            width=24,
+            values=["None"] + list(FRAMING_EXAMPLES),
+        )
+        self.framing_entry.pack(side=tk.LEFT)
+        self.framing_entry.bind("<<ComboboxSelected>>", lambda _e: self._rebuild_framer())
+        self.framing_entry.bind("<Return>", lambda _e: self._rebuild_framer())
+        self.framing_entry.bind("<FocusOut>", lambda _e: self._rebuild_framer())
+        ttk.Label(framing, text="One hex line per frame; len:HEADER:OFFSET:SIZE:le|be:ADJUST").pack(side=tk.LEFT, padx=(10, 0))
+
+        script = ttk.Labelframe(frame, text="Script", padding=10)
+        script.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(script, text="Delay ms").pack(side=tk.LEFT)
+        ttk.Entry(script, textvariable=self.script_delay_var, width=6).pack(side=tk.LEFT, padx=6)
+        ttk.Label(script, text="Expect").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(script, textvariable=self.script_expect_var, width=14).pack(side=tk.LEFT, padx=6)
+        ttk.Label(script, text="Timeout ms").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(script, textvariable=self.script_timeout_var, width=6).pack(side=tk.LEFT, padx=6)
+        ttk.Label(script, text="Repeat").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(script, textvariable=self.script_repeat_var, width=6).pack(side=tk.LEFT, padx=6)
+        ttk.Label(script, text="Window").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(script, textvariable=self.script_window_var, width=4).pack(side=tk.LEFT, padx=6)
+
+        latency = ttk.Labelframe(frame, text="Latency", padding=10)
+        latency.pack(fill=tk.X, pady=(10, 0))
+        ttk.Checkbutton(
+            latency,
+            text="Track Round-Trip",
+            variable=self.latency_var,
+            command=self._apply_latency,
+        ).pack(side=tk.LEFT)
+        ttk.Button(latency, text="Reset", command=self._reset_latency).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(latency, text="Export...", command=self._export_latency).pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(latency, text="Answer = Script Expect match (any RX if empty)").pack(side=tk.LEFT, padx=(10, 0))
+
+        autolog = ttk.Labelframe(frame, text="Auto Log", padding=10)
+        autolog.pack(fill=tk.X, pady=(10, 0))
+        ttk.Checkbutton(
+            autolog,
+            text="Log to Disk",
+            variable=self.autolog_var,
+            command=self._apply_autolog,
+        ).pack(side=tk.LEFT)
+        ttk.Entry(autolog, textvariable=self.autolog_dir_var, width=22).pack(side=tk.LEFT, padx=6)
+        ttk.Button(autolog, text="...", width=3, command=self._choose_autolog_dir).pack(side=tk.LEFT)
+        ttk.Label(autolog, text="Rotate MB").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(autolog, textvariable=self.autolog_mb_var, width=5).pack(side=tk.LEFT, padx=6)
+        ttk.Label(autolog, text="Min").pack(side=tk.LEFT)
+        ttk.Entry(autolog, textvariable=self.autolog_min_var, width=5).pack(side=tk.LEFT, padx=6)
+        ttk.Checkbutton(autolog, text="Gzip", variable=self.autolog_gzip_var).pack(side=tk.LEFT)
+
+        share = ttk.Labelframe(frame, text="Share", padding=10)
+        share.pack(fill=tk.X, pady=(10, 0))
+        ttk.Checkbutton(
+            share,
+            text="Serve",
+            variable=self.serve_var,
+            command=self._apply_server,
+        ).pack(side=tk.LEFT)
+        ttk.Entry(share, textvariable=self.serve_addr_var, width=20).pack(side=tk.LEFT, padx=6)
+        ttk.Label(share, text="Lag KB").pack(side=tk.LEFT, padx=(8, 0))
+        ttk.Entry(share, textvariable=self.serve_kb_var, width=6).pack(side=tk.LEFT, padx=6)
+        ttk.Combobox(
+            share,
+            textvariable=self.serve_policy_var,
+            values=list(SERVER_POLICIES),
+            state="readonly",
+            width=11,
+        ).pack(side=tk.LEFT)
+
+        replay = ttk.Labelframe(frame, text="Replay", padding=10)
+        replay.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(replay, text="Speed").pack(side=tk.LEFT)
+        self.replay_speed_entry = ttk.Combobox(
+            replay,
+            textvariable=self.replay_speed_var,
+            width=10,
+            values=list(REPLAY_SPEEDS),
+            state="readonly",
+        )
+        self.replay_speed_entry.pack(side=tk.LEFT, padx=6)
+        self.replay_btn = ttk.Button(replay, text="Open Capture...", command=self._start_replay)
+        self.replay_btn.pack(side=tk.LEFT, padx=(10, 0))
+
         btn_row = ttk.Frame(frame)
         btn_row.pack(fill=tk.X, pady=(12, 0))
         ttk.Button(btn_row, text="Close", command=self.settings_win.withdraw).pack(side=tk.RIGHT)
@@ -233,10 +555,12 @@ class UartTab(ttk.Frame):
     def show_settings_popup(self, x_root: int, y_root: int):
         """Show the settings window near the mouse pointer when the tab is right-clicked."""
         try:
-            if not self.settings_win.winfo_exists():
-                self._build_settings_window()
+            exists = self.settings_win is not None and self.settings_win.winfo_exists()
         except Exception:
+            exists = False
+        if not exists:
             self._build_settings_window()
+            self._sync_settings_state()
         self._refresh_ports()
         self.settings_win.deiconify()
         self.settings_win.lift()
@@ -244,14 +568,25 @@ class UartTab(ttk.Frame):
         self.settings_win.focus_force()
 
     def _init_mono_font(self):
-        candidates = ["DejaVu Sans Mono", "Consolas", "Cascadia Mono", "Courier New"]
-        available = set(tkfont.families())
-        for name in candidates:
-            if name in available:
-                return tkfont.Font(family=name, size=10)
-        return tkfont.Font(family="TkFixedFont", size=10)
+        # tkfont.families() lists every installed font: ask once per process
+        if UartTab._mono_family is None:
+            candidates = ["DejaVu Sans Mono", "Consolas", "Cascadia Mono", "Courier New"]
+            available = set(tkfont.families())
+            UartTab._mono_family = next((name for name in candidates if name in available), "TkFixedFont")
+        return tkfont.Font(family=UartTab._mono_family, size=10)
 
     def _set_connected(self, connected: bool):
+        recording = bool(self.controller and self.controller.capture)
+        self.record_btn.configure(text="Stop Rec" if recording else "Record")
+        self.hex_var.set(self.hex_var.get())
+        self.print_str_var.set(self.print_str_var.get())
+        self._sync_settings_state()
+
+    def _sync_settings_state(self):
+        """Match the settings widgets to the connection state, once the window exists."""
+        if self.settings_win is None:
+            return
+        connected = self.controller is not None
         state = "disabled" if connected else "normal"
         self.port_combo.configure(state="disabled" if connected else "readonly")
         self.baud_entry.configure(state=state)
@@ -262,16 +597,16 @@ class UartTab(ttk.Frame):
         # end can be toggled while connected
         self.end_entry.configure(state="normal")
         self.poll_ms_entry.configure(state=state)
+        self.replay_btn.configure(state=state)
         # encoding/strip/normalize are fixed defaults (no UI)
         self.connect_btn.configure(text="Disconnect" if connected else "Connect")
-        self.hex_var.set(self.hex_var.get())
-        self.print_str_var.set(self.print_str_var.get())
         self._apply_hex_child_state()
 
     def _refresh_ports(self):
-        ports = []
-        for p in list_ports.comports():
-            ports.append(p.device)
+        if self.settings_win is None:
+            return
+        # The registry's cached list: no enumeration on the Tk thread
+        ports = [p.device for p in get_registry().ports(0)]
         self.port_combo["values"] = ports
         if ports and not self.port_var.get():
             self.port_var.set(ports[0])
@@ -287,13 +622,44 @@ class UartTab(ttk.Frame):
         self.baud_var.set(other.baud_var.get())
         self.timeout_var.set(other.timeout_var.get())
         self.wtimeout_var.set(other.wtimeout_var.get())
+        self.tx_rate_var.set(other.tx_rate_var.get())
+        self.reconnect_var.set(other.reconnect_var.get())
         self.hex_var.set(other.hex_var.get())
         self.print_str_var.set(other.print_str_var.get())
+        self.hex_row_var.set(other.hex_row_var.get())
+        self.hexdump_var.set(other.hexdump_var.get())
+        self.ansi_color_var.set(other.ansi_color_var.get())
         self.end_var.set(other.end_var.get())
         self.poll_ms_var.set(other.poll_ms_var.get())
         self.rx_color_var.set(other.rx_color_var.get())
+        self.replay_speed_var.set(other.replay_speed_var.get())
+        self.framing_var.set(other.framing_var.get())
+        self.history_lines_var.set(other.history_lines_var.get())
+        self.history_mb_var.set(other.history_mb_var.get())
+        self.queue_mb_var.set(other.queue_mb_var.get())
+        self.overflow_var.set(other.overflow_var.get())
+        self.ts_mode_var.set(other.ts_mode_var.get())
+        self.script_delay_var.set(other.script_delay_var.get())
+        self.script_expect_var.set(other.script_expect_var.get())
+        self.script_timeout_var.set(other.script_timeout_var.get())
+        self.script_repeat_var.set(other.script_repeat_var.get())
+        self.script_window_var.set(other.script_window_var.get())
+        self.latency_var.set(other.latency_var.get())
+        self.autolog_var.set(other.autolog_var.get())
+        self.autolog_dir_var.set(other.autolog_dir_var.get())
+        self.autolog_mb_var.set(other.autolog_mb_var.get())
+        self.autolog_min_var.set(other.autolog_min_var.get())
+        self.autolog_gzip_var.set(other.autolog_gzip_var.get())
+        self.serve_addr_var.set(other.serve_addr_var.get())
+        self.serve_kb_var.set(other.serve_kb_var.get())
+        self.serve_policy_var.set(other.serve_policy_var.get())
         self._apply_hex_child_state()
+        self._apply_queue_limits()
         self._apply_rx_color()
+        self._apply_history_limits()
+        self._apply_ts_mode()
+        self._rebuild_hex_dumper()
+        self._rebuild_framer()
 
     def _connect(self):
         port = self.port_var.get().strip()
@@ -307,6 +673,7 @@ class UartTab(ttk.Frame):
         except ValueError:
             messagebox.showerror("UART Tool", "Invalid baudrate/timeout value.")
             return
+        queue_bytes, queue_policy = self._queue_limits()
 
         try:
             self.controller = UartController(
@@ -317,6 +684,8 @@ class UartTab(ttk.Frame):
                 write_timeout=wtimeout,
                 print_str=self.print_str_var.get(),
                 end=self.end_var.get(),
+                queue_bytes=queue_bytes,
+                queue_policy=queue_policy,
             )
             self.controller.run_no_stdin()
         except Exception as e:
@@ -325,20 +694,65 @@ class UartTab(ttk.Frame):
             messagebox.showerror("UART Tool", f"Open port failed: {e}\nDetails in uarttool_gui_error.log")
             return
 
-        self._start_rx_thread()
+        self._attach_rx()
+        self._apply_reconnect()
+        self._apply_tx_rate()
+        self._apply_latency()
+        self._apply_autolog()
+        self._apply_server()
         self._set_connected(True)
         self.app.rename_tab(self, port)
 
+    def _start_replay(self):
+        """Play a capture file through this tab as if it were a live port."""
+        if self.controller:
+            return
+        path = filedialog.askopenfilename(
+            title="Open Capture",
+            filetypes=[("UART Captures", "*.ucap"), ("All Files", "*.*")],
+        )
+        if not path:
+            return
+        queue_bytes, queue_policy = self._queue_limits()
+        try:
+            self.controller = ReplayController(
+                path,
+                speed=REPLAY_SPEEDS.get(self.replay_speed_var.get(), 1.0),
+                hex_mode=self.hex_var.get(),
+                print_str=self.print_str_var.get(),
+                queue_bytes=queue_bytes,
+                queue_policy=queue_policy,
+            )
+            self.controller.run_no_stdin()
+        except Exception as e:
+            self.controller = None
+            self.app.log_error("open_capture", e)
+            messagebox.showerror("UART Tool", f"Open capture failed: {e}\nDetails in uarttool_gui_error.log")
+            return
+
+        self._attach_rx()
+        self._set_connected(True)
+        self.app.rename_tab(self, self.controller.port)
+
     def _disconnect(self):
+        self._stop_script()
+        self._stop_send_file()
+        self._stop_xfer()
+        if self.latency_tracker is not None:
+            self.latency_tracker.detach()
         if self.controller:
+            self.controller.on_rx = None
             try:
                 self.controller.stop()
             except Exception:
                 pass
         self.controller = None
-        if self.rx_thread_stop is not None:
-            self.rx_thread_stop.set()
-        self.rx_thread_stop = None
+        self._port_events.clear()
+        self.rx_decoder.reset()
+        if self.framer is not None:
+            styles = self._frame_lines(self.framer.flush())
+            if styles:
+                self._append_rx("".join(seg for seg, _tag in styles), styles)
         self._set_connected(False)
 
     def _send_tx(self):
@@ -353,6 +767,279 @@ class UartTab(ttk.Frame):
         self.tx_var.set("")
         self.tx_history_index = len(self.tx_history)
 
+    def _toggle_script(self):
+        if self.script_runner is not None:
+            self._stop_script()
+            return
+        if not self.controller or isinstance(self.controller, ReplayController):
+            messagebox.showwarning("UART Tool", "Not connected.")
+            return
+        path = filedialog.askopenfilename(
+            title="Open Script",
+            filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")],
+        )
+        if not path or not self.controller:
+            return
+        end_str = self.end_var.get()
+        end = bytes(end_str, "utf-8").decode("unicode_escape").encode("utf-8") if end_str else b""
+        try:
+            commands = load_script(path, hex_mode=self.controller.hex_mode, end=end)
+            runner = ScriptRunner(
+                self.controller,
+                commands,
+                delay=float(self.script_delay_var.get() or 0) / 1000.0,
+                expect=self.script_expect_var.get(),
+                timeout=float(self.script_timeout_var.get() or 1000) / 1000.0,
+                repeat=int(self.script_repeat_var.get() or 1),
+                window=int(self.script_window_var.get() or 1),
+            )
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Load script failed: {e}")
+            return
+        if not commands:
+            messagebox.showwarning("UART Tool", "Script has no commands.")
+            return
+        self.script_runner = runner.start()
+        self.script_btn.configure(text="Stop Script")
+        self.script_var.set("")
+        self.after(SCRIPT_POLL_MS, self._poll_script)
+
+    def _stop_script(self):
+        runner = self.script_runner
+        if runner is not None:
+            runner.stop()
+            runner.join(1.0)
+            self._poll_script()
+
+    def _poll_script(self):
+        # The runner reports from its own thread; Tk is only touched from here.
+        runner = self.script_runner
+        if runner is None:
+            return
+        if runner.done.is_set():
+            self.script_runner = None
+            self.script_btn.configure(text="Script...")
+            self.script_var.set(runner.format_report())
+            return
+        self.script_var.set(f"script {runner.sent}/{runner.total}")
+        self.after(SCRIPT_POLL_MS, self._poll_script)
+
+    def _toggle_send_file(self):
+        if self.tx_job is not None:
+            self._stop_send_file()
+            return
+        if self.xfer is not None:
+            self._stop_xfer()
+            return
+        if not self.controller or isinstance(self.controller, ReplayController):
+            messagebox.showwarning("UART Tool", "Not connected.")
+            return
+        if self.xfer_var.get() != "raw":
+            self._start_xfer(send=True)
+            return
+        path = filedialog.askopenfilename(title="Send File", filetypes=[("All Files", "*.*")])
+        if not path or not self.controller:
+            return
+        try:
+            self.tx_job = self.controller.send_file(path)
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Send file failed: {e}")
+            return
+        self.send_file_btn.configure(text="Cancel Send")
+        self.tx_file_var.set("")
+        self.after(TX_POLL_MS, self._poll_send_file)
+
+    def _stop_send_file(self):
+        job = self.tx_job
+        if job is not None:
+            job.cancel()
+            job.done.wait(1.0)
+            self._poll_send_file()
+
+    def _poll_send_file(self):
+        # The job advances on the TX thread; Tk is only touched from here.
+        job = self.tx_job
+        if job is None:
+            return
+        if job.done.is_set():
+            self.tx_job = None
+            self.send_file_btn.configure(text="Send File...")
+            self.tx_file_var.set(job.format_report())
+            return
+        self.tx_file_var.set(f"tx {format_size(job.sent)}/{format_size(job.size)} ({job.progress:.0%})")
+        self.after(TX_POLL_MS, self._poll_send_file)
+
+    def _toggle_receive_file(self):
+        if self.xfer is not None:
+            self._stop_xfer()
+            return
+        if not self.controller or isinstance(self.controller, ReplayController):
+            messagebox.showwarning("UART Tool", "Not connected.")
+            return
+        if self.xfer_var.get() == "raw":
+            messagebox.showwarning("UART Tool", "Choose XMODEM or YMODEM to receive a file.")
+            return
+        self._start_xfer(send=False)
+
+    def _start_xfer(self, send: bool):
+        """XMODEM/YMODEM transfer on the open port; RX display pauses while it runs."""
+        protocol = self.xfer_var.get()
+        batch = protocol.startswith("ymodem")
+        if send and batch:
+            dest = filedialog.askopenfilenames(title="Send Files")
+        elif send:
+            dest = filedialog.askopenfilename(title="Send File")
+        elif batch:
+            dest = filedialog.askdirectory(title="Receive Into Folder")
+        else:
+            dest = filedialog.asksaveasfilename(title="Receive As")
+        if not dest or not self.controller or self.tx_job is not None:
+            return
+        try:
+            if send:
+                self.xfer = ModemSender(self.controller, dest, protocol).start()
+            else:
+                self.xfer = ModemReceiver(self.controller, dest, protocol).start()
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Transfer failed: {e}")
+            return
+        (self.send_file_btn if send else self.recv_file_btn).configure(text="Cancel")
+        (self.recv_file_btn if send else self.send_file_btn).configure(state="disabled")
+        self.tx_file_var.set(f"{protocol}: waiting for the other side")
+        self.after(TX_POLL_MS, self._poll_xfer)
+
+    def _stop_xfer(self):
+        xfer = self.xfer
+        if xfer is not None:
+            xfer.cancel()
+            xfer.done.wait(1.0)
+            self._poll_xfer()
+
+    def _poll_xfer(self):
+        # The transfer runs on its own thread; Tk is only touched from here.
+        xfer = self.xfer
+        if xfer is None:
+            return
+        if xfer.done.is_set():
+            self.xfer = None
+            self.send_file_btn.configure(text="Send File...", state="normal")
+            self.recv_file_btn.configure(text="Receive...", state="normal")
+            self.tx_file_var.set(xfer.format_report())
+            return
+        if xfer.started is not None:
+            self.tx_file_var.set(xfer.format_progress())
+        self.after(TX_POLL_MS, self._poll_xfer)
+
+    def _apply_tx_rate(self):
+        """Pace writes to the TX B/s setting for devices without flow control; empty is unlimited."""
+        ctrl = self.controller
+        if not ctrl or isinstance(ctrl, ReplayController):
+            return
+        try:
+            rate = int(float(self.tx_rate_var.get() or 0))
+        except ValueError:
+            return
+        ctrl.tx_queue.rate = max(0, rate)
+
+    def _apply_latency(self):
+        """Attach/detach the RTT tracker; a changed Expect pattern or timeout starts a fresh one."""
+        if not self.latency_var.get():
+            if self.latency_tracker is not None:
+                self.latency_tracker.detach()
+            return
+        params = (self.script_expect_var.get(), self.script_timeout_var.get())
+        if self.latency_tracker is None or params != self._latency_params:
+            try:
+                tracker = LatencyTracker(expect=params[0], timeout=float(params[1] or 1000) / 1000.0)
+            except Exception as e:
+                messagebox.showerror("UART Tool", f"Invalid expect pattern/timeout: {e}")
+                self.latency_var.set(False)
+                return
+            if self.latency_tracker is not None:
+                self.latency_tracker.detach()
+            self.latency_tracker = tracker
+            self._latency_params = params
+        if self.controller and not isinstance(self.controller, ReplayController):
+            self.latency_tracker.attach(self.controller)
+
+    def _reset_latency(self):
+        if self.latency_tracker is not None:
+            self.latency_tracker.reset()
+        self._apply_latency()
+
+    def _export_latency(self):
+        if self.latency_tracker is None:
+            messagebox.showwarning("UART Tool", "No latency data; enable Track Round-Trip first.")
+            return
+        port = self.port_var.get().strip() or "uart"
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = filedialog.asksaveasfilename(
+            title="Export Latency",
+            defaultextension=".csv",
+            initialfile=f"{os.path.basename(port)}_latency_{ts}.csv",
+            filetypes=[("CSV Files", "*.csv"), ("JSON Files", "*.json"), ("All Files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            self.latency_tracker.export(path)
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Export failed: {e}")
+
+    def _apply_autolog(self):
+        """Start or stop logging the connected port to disk; new settings take effect on the next start."""
+        ctrl = self.controller
+        if not ctrl or isinstance(ctrl, ReplayController):
+            return
+        if not self.autolog_var.get():
+            ctrl.stop_autolog()
+            return
+        if ctrl.autolog is not None:
+            return
+        try:
+            minutes = float(self.autolog_min_var.get() or 0)
+            ctrl.start_autolog(
+                self.autolog_dir_var.get().strip(),
+                max_bytes=int(float(self.autolog_mb_var.get() or 64) * 1024 * 1024),
+                max_seconds=minutes * 60 if minutes > 0 else None,
+                compress=self.autolog_gzip_var.get(),
+            )
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Auto log failed: {e}")
+            self.autolog_var.set(False)
+
+    def _apply_reconnect(self):
+        """Reopen the port by itself when it disappears (board reset, USB re-enumeration)."""
+        ctrl = self.controller
+        if not ctrl or isinstance(ctrl, ReplayController):
+            return
+        ctrl.set_reconnect(self.reconnect_var.get())
+
+    def _apply_server(self):
+        """Share the connected port over TCP / a Unix socket while Serve is on."""
+        ctrl = self.controller
+        if not ctrl or isinstance(ctrl, ReplayController):
+            return
+        if not self.serve_var.get():
+            ctrl.stop_server()
+            return
+        if ctrl.server is not None:
+            return
+        try:
+            ctrl.start_server(
+                self.serve_addr_var.get(),
+                client_bytes=int(float(self.serve_kb_var.get() or 1024) * 1024),
+                policy=self.serve_policy_var.get(),
+            )
+        except Exception as e:
+            messagebox.showerror("UART Tool", f"Serve failed: {e}")
+            self.serve_var.set(False)
+
+    def _choose_autolog_dir(self):
+        path = filedialog.askdirectory(title="Auto Log Folder", initialdir=self.autolog_dir_var.get())
+        if path:
+            self.autolog_dir_var.set(path)
+
     def _send_payload(self, text: str):
         end_str = self.end_var.get()
         if self.controller.hex_mode:
@@ -366,13 +1053,20 @@ class UartTab(ttk.Frame):
                     return
                 if end_str:
                     payload += bytes(end_str, "utf-8").decode("unicode_escape").encode("utf-8")
-                self.controller.send_cmd(payload)
             except Exception as e:
                 messagebox.showerror("UART Tool", f"Send hex failed: {e}")
+                return
         else:
             if end_str:
                 text = text + bytes(end_str, "utf-8").decode("unicode_escape")
-            self.controller.send_cmd(text)
+            payload = text
+        # Never wait on the port here: the TX thread writes it, failures arrive as port events
+        try:
+            self.controller.send_cmd(payload, block=False)
+        except queue.Full:
+            messagebox.showwarning("UART Tool", "TX queue full; the port is not keeping up.")
+        except RuntimeError as e:
+            messagebox.showerror("UART Tool", f"Send failed: {e}")
 
     def _apply_rx_font_size(self):
         try:
@@ -381,8 +1075,10 @@ class UartTab(ttk.Frame):
         except Exception:
             return
         self.mono_font.configure(size=size)
+        self.bold_font.configure(size=size)
         self.rx_text.configure(font=self.mono_font)
         self.tx_entry.configure(font=self.mono_font)
+        self._apply_ts_mode()
 
     def _on_end_change(self):
         if self.controller:
@@ -396,49 +1092,86 @@ class UartTab(ttk.Frame):
         if self.controller:
             self.controller.hex_mode = self.hex_var.get()
             self.controller.print_str = self.print_str_var.get()
+        self._rebuild_hex_dumper()
 
     def _on_print_str_toggle(self):
         if self.controller:
             self.controller.print_str = self.print_str_var.get()
+        self._rebuild_hex_dumper()
 
     def _apply_hex_child_state(self):
-        if self.hex_var.get():
-            self.print_str_chk.configure(state="normal")
-        else:
-            self.print_str_chk.configure(state="disabled")
+        if self.settings_win is None:
+            return
+        state = "normal" if self.hex_var.get() else "disabled"
+        self.print_str_chk.configure(state=state)
+        self.hex_row_entry.configure(state="readonly" if self.hex_var.get() else "disabled")
+        self.hexdump_chk.configure(state=state)
+
+    def _rebuild_hex_dumper(self):
+        """Recreate the hex formatter after a layout change; the stream offset restarts at 0."""
+        row = self.hex_row_var.get()
+        width = int(row) if row.isdigit() else None
+        hexdump = self.hexdump_var.get()
+        if hexdump and width is None:
+            width = 16
+        # In row layouts Print String becomes the ASCII gutter.
+        ascii_gutter = hexdump or (width is not None and self.print_str_var.get())
+        pending = self.hex_dumper.flush()
+        if pending:
+            self._append_rx(pending)
+        self.hex_dumper = HexDumper(
+            width=width,
+            style="plain" if hexdump else "0x",
+            offset=hexdump,
+            ascii=ascii_gutter,
+        )
 
-    def _start_rx_thread(self):
+    def _attach_rx(self):
+        """Let the controller wake the Tk loop when it has queued RX data."""
         if not self.controller:
             return
-        if self.rx_thread_stop is not None:
-            self.rx_thread_stop.set()
-        self.rx_thread_stop = threading.Event()
-        ctrl = self.controller
-        stop_evt = self.rx_thread_stop
-
-        def _worker():
-            while not stop_evt.is_set():
-                try:
-                    data = ctrl.log_queue.get(timeout=0.5)
-                except queue.Empty:
-                    continue
-                batch = [data]
-                try:
-                    while True:
-                        batch.append(ctrl.log_queue.get_nowait())
-                except queue.Empty:
-                    pass
-                try:
-                    self.rx_gui_queue.put_nowait(batch)
-                except queue.Full:
-                    pass
-                try:
-                    self.event_generate("<<RxData>>", when="tail")
-                except Exception:
-                    pass
-
-        t = threading.Thread(target=_worker, daemon=True, name="uart-gui-rx")
-        t.start()
+        self._rx_notified = False
+        self.controller.on_rx = self._notify_rx
+        self.controller.on_event = self._on_port_event
+        if self._stats_job is None:
+            self._stats_job = self.after(STATS_INTERVAL_MS, self._update_stats)
+
+    def _update_stats(self):
+        self._stats_job = None
+        if not self.controller:
+            self.stats_var.set("")
+            return
+        self.last_stats = self.controller.stats_snapshot()
+        text = format_stats(self.last_stats)
+        tracker = self.latency_tracker
+        if tracker is not None and self.controller.latency is tracker:
+            summary = tracker.format_summary()
+            if summary:
+                text += "  " + summary
+        autolog = self.controller.autolog
+        if autolog is not None:
+            text += "  " + autolog.format_summary()
+        server = self.controller.server
+        if server is not None:
+            text += "  " + server.format_summary()
+        self.stats_var.set(text)
+        self._stats_job = self.after(STATS_INTERVAL_MS, self._update_stats)
+
+    def _notify_rx(self):
+        # Runs on the reading thread; one <<RxData>> per flush, not per read.
+        if self._rx_notified:
+            return
+        self._rx_notify_ns = monotonic_ns()
+        self._rx_notified = True
+        try:
+            self.event_generate("<<RxData>>", when="tail")
+        except Exception:
+            pass
+
+    def _on_port_event(self, text):
+        # Runs on the reading / reconnect thread, like _notify_rx
+        self._port_events.append((time_ns(), text))
+        self._notify_rx()
 
     def _on_rx_event(self, _event):
         if self.rx_update_pending:
@@ -455,69 +1188,528 @@ class UartTab(ttk.Frame):
 
     def _flush_rx_queue(self):
         self.rx_update_pending = False
+        t0 = perf_counter_ns()
+        notify_ns = self._rx_notify_ns
+        # Cleared before draining: data queued from here on posts a new event.
+        self._rx_notified = False
         if not self.controller:
             return
-        hex_mode = self.controller.hex_mode
-        print_str = self.controller.print_str
-        chunks = []
+        ctrl = self.controller
+        hex_mode = ctrl.hex_mode
+        dumper = self.hex_dumper
+        hex_rows = hex_mode and dumper.width is not None
+        sb = self.scrollback
+        # Read times of the chunks, as wall-clock ns
+        times = []
         try:
-            while True:
-                batch = self.rx_gui_queue.get_nowait()
-                for data in batch:
-                    if hex_mode:
-                        chunks.append(parse_bytes_to_hex_str(data) + "\n")
-                    if print_str or not hex_mode:
-                        txt = self._decode_bytes(data)
-                        if txt:
-                            chunks.append(txt)
+            received = ctrl.log_queue.get_batch(block=False, times=times)
         except queue.Empty:
-            pass
-        if chunks:
-            self._append_rx("".join(chunks))
+            received = []
+        offset = ctrl.clock_offset_ns
+        times = [ts + offset if ts else 0 for ts in times]
+        tx_log = ctrl.tx_log
+        while tx_log:
+            ts, head, size = tx_log.popleft()
+            sb.add_tx_time(ts + offset, format_tx(head, size, hex_mode))
+        self._update_drop_stats()
+        events = self._port_events
+        if events:
+            # Port events go between the chunks read before and after them
+            pos = 0
+            while events:
+                ev_ts, ev_text = events.popleft()
+                k = bisect_right(times, ev_ts, pos)
+                self._append_rx_chunks(received[pos:k], times[pos:k])
+                self._append_port_event(ev_ts, ev_text)
+                pos = k
+            received_rest, times_rest = received[pos:], times[pos:]
+        else:
+            received_rest, times_rest = received, times
+        self._append_rx_chunks(received_rest, times_rest)
+        # Formatting copied everything out; the RX buffers can be reused.
+        release_all(received)
+        if received:
+            self.controller.stats.record_flush(perf_counter_ns() - t0, monotonic_ns() - notify_ns)
+        if self._hex_idle_job is not None:
+            self.after_cancel(self._hex_idle_job)
+            self._hex_idle_job = None
+        if hex_rows and dumper.pending:
+            self._hex_idle_job = self.after(HEX_IDLE_FLUSH_MS, self._flush_hex_row)
+        if ctrl.stop_event.is_set() and not isinstance(ctrl, ReplayController):
+            # Lost without reconnect: show the tab as disconnected
+            self._disconnect()
 
-    def _append_rx(self, text: str):
-        self.rx_text.configure(state="normal")
-        self.rx_text.insert(tk.END, text)
+    def _append_rx_chunks(self, received, times):
+        """Format RX chunks read at `times` (wall ns) and append them to the pane."""
+        if not received:
+            return
+        ctrl = self.controller
+        hex_mode = ctrl.hex_mode
+        print_str = ctrl.print_str
+        dumper = self.hex_dumper
+        hex_rows = hex_mode and dumper.width is not None
+        decoder = self.rx_decoder
+        framer = self.framer
+        styles = None
+        line_times = None
+        if framer is not None:
+            # Fed per chunk so each frame (one line) gets the time of the read that completed it
+            frames = []
+            frame_times = []
+            for data, ts in zip(received, times):
+                for item in framer.feed(data):
+                    frames.append(item)
+                    frame_times.append(ts)
+            styles = self._frame_lines(frames)
+            text = "".join(seg for seg, _tag in styles)
+            line_times = frame_times + [0] if frames else None
+        elif hex_rows:
+            # Row layouts are cut at stream offsets, so a batch is formatted in
+            # one go and each row is stamped with the read holding its first byte.
+            raw = b"".join(received)
+            sizes = [len(data) for data in received]
+            p0 = dumper.pos
+            text = dumper.feed(raw)
+            w = dumper.width
+            rows = text.count("\n")
+            first = (dumper.pos // w - rows + 1) * w - p0
+            line_times = [times[0]] + times_at(range(first, first + rows * w, w), sizes, times)
+        elif hex_mode:
+            pieces = []
+            for data in received:
+                piece = dumper.feed(data)
+                if print_str:
+                    piece += decoder.decode(data)
+                pieces.append(piece)
+            text = "".join(pieces)
+            line_times = line_start_times(text, [len(p) for p in pieces], times)
+        else:
+            # Decoding keeps every newline, so line starts can be found in the raw bytes.
+            raw = b"".join(received)
+            line_times = line_start_times(raw, [len(data) for data in received], times)
+            if decoder.ansi_color:
+                styles = decoder.decode_styled(raw)
+                text = "".join(seg for seg, _tag in styles)
+            else:
+                text = decoder.decode(raw)
+        if text:
+            self._append_rx(text, styles, line_times)
+
+    def _append_port_event(self, ts, text):
+        """A lost / reconnected notice as its own highlighted line in the RX pane."""
+        line = f"[{text}]\n"
+        if self.scrollback.partial:
+            line = "\n" + line
+        self._append_rx(line, [(line, PORT_EVENT_TAG)], [ts] * line.count("\n") + [0])
+
+    def _frame_lines(self, frames):
+        """[(text, tag)] for framer output: one line per frame, bad ones tagged."""
+        print_str = self.print_str_var.get()
+        runs = []  # [tag, [lines]]
+        for frame, err in frames:
+            tag = BAD_FRAME_TAG if err else None
+            if not runs or runs[-1][0] != tag:
+                runs.append((tag, []))
+            runs[-1][1].append(format_frame(frame, err, print_str))
+        return [("".join(lines), tag) for tag, lines in runs]
+
+    def _rebuild_framer(self):
+        spec = self.framing_var.get().strip()
+        try:
+            framer = make_framer(spec)
+        except ValueError as e:
+            messagebox.showerror("UART Tool", str(e))
+            self.framing_var.set("None")
+            framer = None
+        self.framer = framer
+
+    def _queue_limits(self):
+        """(max bytes, policy) for the RX queues from the settings."""
+        try:
+            max_bytes = int(float(self.queue_mb_var.get().strip()) * 1024 * 1024)
+        except ValueError:
+            max_bytes = DEFAULT_QUEUE_BYTES
+        max_bytes = max(64 * 1024, max_bytes)
+        return max_bytes, OVERFLOW_POLICIES.get(self.overflow_var.get(), POLICY_BLOCK)
+
+    def _apply_queue_limits(self):
+        max_bytes, policy = self._queue_limits()
+        if self.controller:
+            self.controller.log_queue.set_limits(max_bytes, policy)
+
+    def _update_drop_stats(self):
+        if not self.controller:
+            return
+        dropped = self.controller.dropped_bytes
+        chunks = self.controller.dropped_chunks
+        if not chunks:
+            text = ""
+        elif dropped >= 1024 * 1024:
+            text = f"Dropped {dropped / (1024 * 1024):.1f} MB ({chunks} chunks)"
+        else:
+            text = f"Dropped {dropped / 1024:.1f} KB ({chunks} chunks)"
+        if text != self.rx_drop_var.get():
+            self.rx_drop_var.set(text)
+
+    def _flush_hex_row(self):
+        self._hex_idle_job = None
+        text = self.hex_dumper.flush()
+        if text:
+            self._append_rx(text)
+
+    def _append_rx(self, text: str, styles=None, times=None):
+        """
+        Append RX text; `styles` is the same text split into [(text, tag)] runs
+        and `times` the line timestamps from line_start_times().
+        """
+        sb = self.scrollback
+        widget_lines = self._rx_widget_lines()
+        at_tail = self.rx_view_start + widget_lines >= sb.end_line
+        if text.startswith("\b"):
+            # Backspaces reaching into text shown by an earlier flush
+            body = text.lstrip("\b")
+            count = len(text) - len(body)
+            erased = sb.backspace(count)
+            if erased and at_tail:
+                self.rx_text.configure(state="normal")
+                self.rx_text.delete(f"end-{erased + 1}c", "end-1c")
+                self.rx_text.configure(state="disabled")
+            text = body
+            if styles:
+                styles = list(styles)
+                styles[0] = (styles[0][0][count:], styles[0][1])
+            if not text:
+                return
+        # Overlong lines come back broken, as the widget must show them
+        text, styles = sb.append(text, styles, times)
+        self._schedule_ts_gutter()
+        if self.search is not None and self._search_job is None:
+            self._search_job = self.after(SEARCH_POLL_MS, self._feed_search)
         should_scroll = self.rx_autoscroll or self.rx_force_scroll_once
+        self._rx_internal_scroll = True
+        self.rx_text.configure(state="normal")
+        if should_scroll and not at_tail:
+            # View was parked in old history: jump back to the newest lines.
+            self._rx_load_view(sb.end_line - self.rx_view_lines)
+        elif at_tail and (should_scroll or widget_lines < 2 * self.rx_view_lines):
+            if styles:
+                # One insert per flush; each merged run carries its tag.
+                self._ensure_sgr_tags({tag for _seg, tag in styles})
+                args = []
+                for seg, tag in styles:
+                    args.append(seg)
+                    args.append(tag or "")
+                self.rx_text.insert(tk.END, *args)
+            else:
+                self.rx_text.insert(tk.END, text)
+            # Past this the view detaches from the tail and new data only goes
+            # to the scrollback until the user scrolls down again.
         if should_scroll:
-            self._rx_internal_scroll = True
+            self._rx_trim_view()
             self.rx_text.see(tk.END)
-            self._rx_internal_scroll = False
             self.rx_autoscroll = True
             self.rx_force_scroll_once = False
         self.rx_text.configure(state="disabled")
+        self._rx_internal_scroll = False
+
+    def _rx_widget_lines(self) -> int:
+        return int(self.rx_text.index("end-1c").split(".")[0])
+
+    def _apply_ts_mode(self):
+        """Show or hide the timestamp gutter; the RX text itself is never re-rendered."""
+        canvas = self.rx_ts_canvas
+        if self.ts_mode_var.get() == "Off":
+            canvas.delete("all")
+            canvas.pack_forget()
+            return
+        canvas.configure(width=self.mono_font.measure("[00:00:00.000]") + 8, background=self.rx_text.cget("background"))
+        if not canvas.winfo_ismapped():
+            canvas.pack(side=tk.LEFT, fill=tk.Y, before=self.rx_text)
+        self._schedule_ts_gutter()
+
+    def _schedule_ts_gutter(self):
+        if self._ts_gutter_job is None and self.ts_mode_var.get() != "Off":
+            self._ts_gutter_job = self.after_idle(self._draw_ts_gutter)
+
+    def _draw_ts_gutter(self):
+        """Label the lines currently on screen, nothing else."""
+        self._ts_gutter_job = None
+        canvas = self.rx_ts_canvas
+        canvas.delete("all")
+        mode = self.ts_mode_var.get()
+        if mode == "Off":
+            return
+        text = self.rx_text
+        x = int(canvas.cget("width")) - 4
+        first = int(text.index("@0,0").split(".")[0])
+        last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0])
+        for line in range(first, last + 1):
+            info = text.dlineinfo(f"{line}.0")
+            if info is None:
+                continue
+            label = self._ts_label(mode, self.rx_view_start + line - 1)
+            if label:
+                canvas.create_text(x, info[1], anchor="ne", text=label, font=self.mono_font, fill=TIMESTAMP_FG)
+
+    def _ts_label(self, mode: str, index: int) -> str:
+        sb = self.scrollback
+        ts = sb.line_time(index)
+        if mode == "Since Prev Line":
+            base = sb.line_time(index - 1)
+        elif mode == "Since TX":
+            base = sb.tx_before(ts)
+        else:
+            base = 0
+        return time_label(mode, ts, base)
+
+    def _rx_trim_view(self):
+        excess = self._rx_widget_lines() - self.rx_view_lines
+        if excess <= self.rx_view_lines // 4:
+            return
+        if self.rx_text.tag_ranges(tk.SEL):
+            # Keep the user's selection intact; trim on a later flush.
+            return
+        self.rx_text.delete("1.0", f"{excess + 1}.0")
+        self.rx_view_start += excess
+
+    def _rx_load_view(self, start: int, top: Optional[int] = None):
+        """Fill rx_text with the scrollback window starting near `start`."""
+        sb = self.scrollback
+        end = min(sb.end_line, max(start, sb.first_line) + self.rx_view_lines)
+        start = max(sb.first_line, end - self.rx_view_lines)
+        prev_state = self.rx_text.cget("state")
+        self.rx_text.configure(state="normal")
+        self.rx_text.delete("1.0", tk.END)
+        self.rx_text.insert("1.0", sb.text(start, end))
+        ranges = {}
+        for line, col, end_line, end_col, tag in sb.runs_in(start, end):
+            if line < start:
+                line, col = start, 0
+            ranges.setdefault(tag, []).extend((f"{line - start + 1}.{col}", f"{end_line - start + 1}.{end_col}"))
+        if ranges:
+            self._ensure_sgr_tags(ranges)
+            for tag, idx in ranges.items():
+                self.rx_text.tag_add(tag, *idx)
+        self.rx_text.configure(state=prev_state)
+        self.rx_view_start = start
+        if top is not None:
+            top = max(start, min(top, end - 1))
+            self.rx_text.yview(f"{top - start + 1}.0")
+
+    def _rx_recenter_view(self):
+        top = self.rx_view_start + int(self.rx_text.index("@0,0").split(".")[0]) - 1
+        self._rx_internal_scroll = True
+        self._rx_load_view(top - self.rx_view_lines // 2, top=top)
+        self._rx_internal_scroll = False
+
+    def _apply_history_limits(self):
+        try:
+            max_lines = int(self.history_lines_var.get().strip())
+            max_bytes = int(float(self.history_mb_var.get().strip()) * 1024 * 1024)
+        except ValueError:
+            return
+        if max_lines > 0 and max_bytes > 0:
+            self.scrollback.set_limits(max_lines, max_bytes)
 
     def _clear_rx(self):
+        self.hex_dumper.reset()
+        if self.framer is not None:
+            self.framer.reset()
+        self.scrollback.clear()
+        self.rx_view_start = 0
         self.rx_text.configure(state="normal")
         self.rx_text.delete("1.0", tk.END)
         self.rx_text.configure(state="disabled")
         self.rx_autoscroll = True
         self.rx_force_scroll_once = False
+        if self.search is not None:
+            # Line numbers restart with the history: search it afresh
+            self._search_key = None
+            self._current_search()
+
+    def _focus_search(self, _event=None):
+        self.search_entry.focus_set()
+        self.search_entry.select_range(0, tk.END)
+        return "break"
+
+    def _clear_search(self, _event=None):
+        self.search_var.set("")
+        self._current_search()
+
+    def _current_search(self) -> Optional[RxSearch]:
+        """The search for the query and options now in the bar, started on first use."""
+        key = (self.search_var.get(), self.search_regex_var.get(), self.search_case_var.get())
+        if key == self._search_key:
+            return self.search
+        self._search_key = key
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+        self._search_line = None
+        self.rx_text.tag_remove(SEARCH_TAG, "1.0", tk.END)
+        self.search_status_var.set("")
+        if key[0]:
+            try:
+                self.search = RxSearch(key[0], regex=key[1], ignore_case=not key[2])
+            except re.error as e:
+                self.search_status_var.set(f"Bad pattern: {e}")
+            else:
+                self.search.feed(self.scrollback)
+                if self._search_poll_job is None:
+                    self._poll_search()
+        self._refresh_filter_window()
+        return self.search
+
+    def _feed_search(self):
+        # New finished lines only; the worker never rescans older ones.
+        self._search_job = None
+        if self.search is not None:
+            self.search.feed(self.scrollback)
+            if self._search_poll_job is None:
+                self._poll_search()
+
+    def _poll_search(self):
+        self._search_poll_job = None
+        search = self.search
+        if search is None:
+            return
+        count = len(search.results) - bisect_left(search.results, self.scrollback.first_line)
+        status = f"{count} matching lines"
+        if search.busy:
+            status += " (searching...)"
+            self._search_poll_job = self.after(SEARCH_POLL_MS, self._poll_search)
+        self.search_status_var.set(status)
+        self._refresh_filter_window()
+
+    def _search_step(self, backward=False):
+        search = self._current_search()
+        if search is None:
+            return
+        sb = self.scrollback
+        here = self._search_line
+        if here is None:
+            # Start from the top of the view (included when going forward)
+            here = self.rx_view_start + int(self.rx_text.index("@0,0").split(".")[0]) - 1
+            here = here if backward else here - 1
+        line = search.prev_before(here) if backward else search.next_after(max(here, sb.first_line - 1))
+        if line is not None and line < sb.first_line:
+            line = None
+        if line is None:
+            if search.busy:
+                self.after(SEARCH_POLL_MS, lambda: self._search_step(backward))
+                return
+            # Wrap around
+            line = search.prev_before(sb.end_line) if backward else search.next_after(sb.first_line - 1)
+            if line is None or line < sb.first_line:
+                self.search_status_var.set("No matches")
+                return
+        self._search_line = line
+        self._rx_goto_line(line)
+
+    def _rx_goto_line(self, index: int):
+        """Bring an absolute line into view and highlight the search match on it."""
+        sb = self.scrollback
+        if not sb.first_line <= index < sb.end_line:
+            return
+        self.rx_autoscroll = False
+        self._rx_internal_scroll = True
+        if not self.rx_view_start <= index < self.rx_view_start + self._rx_widget_lines():
+            self._rx_load_view(index - self.rx_view_lines // 2, top=index)
+        line = index - self.rx_view_start + 1
+        self.rx_text.see(f"{line}.0")
+        self.rx_text.tag_remove(SEARCH_TAG, "1.0", tk.END)
+        m = self.search.regex.search(sb.get_line(index)) if self.search is not None else None
+        if m is not None and m.end() > m.start():
+            self.rx_text.tag_add(SEARCH_TAG, f"{line}.{m.start()}", f"{line}.{m.end()}")
+        else:
+            self.rx_text.tag_add(SEARCH_TAG, f"{line}.0", f"{line}.end")
+        self.rx_text.tag_raise(SEARCH_TAG)
+        self.rx_text.tag_raise(tk.SEL)
+        self._rx_internal_scroll = False
+
+    def _open_filter_window(self):
+        if self._current_search() is None:
+            self._focus_search()
+            return
+        if self.filter_window is None or not self.filter_window.win.winfo_exists():
+            self.filter_window = FilterWindow(self)
+        self.filter_window.render()
+        self.filter_window.win.deiconify()
+        self.filter_window.win.lift()
+
+    def _refresh_filter_window(self):
+        fw = self.filter_window
+        if fw is not None:
+            try:
+                fw.render()
+            except tk.TclError:
+                self.filter_window = None
 
     def _confirm_close_tab(self):
         if messagebox.askyesno("UART Tool", "Close this tab? Current connection will be disconnected."):
             self.app.close_tab(self)
 
     def _export_rx(self):
-        port = self.port_var.get().strip() or "uart"
+        if self.export_window is None or not self.export_window.win.winfo_exists():
+            self.export_window = ExportWindow(self)
+        self.export_window.win.deiconify()
+        self.export_window.win.lift()
+
+    def _capture_source(self):
+        """(capture path, port) holding this tab's raw RX bytes, or None."""
+        ctrl = self.controller
+        if isinstance(ctrl, ReplayController):
+            return ctrl.path, ctrl.replay_port
+        if ctrl is not None and ctrl.capture is not None:
+            # Make what was recorded so far readable
+            ctrl.capture.flush()
+            return ctrl.capture.path, None
+        if ctrl is not None and ctrl.autolog is not None and ctrl.autolog.path:
+            # The auto log's current file (earlier ones may be rotated away)
+            ctrl.autolog.flush()
+            return ctrl.autolog.path, None
+        if self._last_capture and os.path.exists(self._last_capture):
+            return self._last_capture, None
+        return None
+
+    def _selected_lines(self):
+        """Absolute (first, last) lines touched by the RX selection, or None."""
+        ranges = self.rx_text.tag_ranges(tk.SEL)
+        if not ranges:
+            return None
+        first = int(str(ranges[0]).split(".")[0])
+        last_index = str(ranges[-1])
+        last = int(last_index.split(".")[0])
+        if last_index.endswith(".0") and last > first:
+            # A selection ending at a line start does not include that line
+            last -= 1
+        return self.rx_view_start + first - 1, self.rx_view_start + last - 1
+
+    def _toggle_capture(self):
+        if not self.controller:
+            messagebox.showwarning("UART Tool", "Not connected.")
+            return
+        if self.controller.capture:
+            self.controller.stop_capture()
+            self.record_btn.configure(text="Record")
+            return
+        port = os.path.basename(self.port_var.get().strip()) or "uart"
         ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_name = f"{port}_{ts}.log"
         path = filedialog.asksaveasfilename(
-            title="Export RX Log",
-            defaultextension=".log",
-            initialfile=default_name,
-            filetypes=[("Log Files", "*.log"), ("Text Files", "*.txt"), ("All Files", "*.*")],
+            title="Record RX/TX Capture",
+            defaultextension=".ucap",
+            initialfile=f"{port}_{ts}.ucap",
+            filetypes=[("UART Captures", "*.ucap"), ("All Files", "*.*")],
         )
         if not path:
             return
         try:
-            self.rx_text.configure(state="normal")
-            data = self.rx_text.get("1.0", tk.END)
-            self.rx_text.configure(state="disabled")
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(data)
+            self.controller.start_capture(path)
         except Exception as e:
-            messagebox.showerror("UART Tool", f"Export failed: {e}")
+            messagebox.showerror("UART Tool", f"Record failed: {e}")
+            return
+        self._last_capture = path
+        self.record_btn.configure(text="Stop Rec")
 
     def _apply_rx_color(self):
         name = self.rx_color_var.get()
@@ -542,73 +1734,32 @@ class UartTab(ttk.Frame):
             except tk.TclError:
                 pass
 
-    def _decode_bytes(self, data: bytes) -> str:
-        enc = self.encoding_var.get().strip() or "utf-8"
-        try:
-            text = data.decode(enc, errors="ignore")
-        except Exception:
-            try:
-                text = data.decode("utf-8", errors="ignore")
-            except Exception:
-                return ""
-        if self.strip_ansi_var.get():
-            text = self._strip_ansi_with_carry(text)
-        if self.normalize_ctrl_var.get():
-            text = self._normalize_cr_bs(text)
-        return text
-
-    def _strip_ansi_with_carry(self, text: str) -> str:
-        if self.ansi_carry:
-            text = self.ansi_carry + text
-            self.ansi_carry = ""
-        # If trailing ESC sequence is incomplete, keep it for next chunk
-        last_esc = text.rfind("\x1b")
-        if last_esc != -1:
-            tail = text[last_esc:]
-            if not self._ansi_sequence_complete(tail):
-                self.ansi_carry = tail
-                text = text[:last_esc]
-        return self._strip_ansi(text)
-
-    def _ansi_sequence_complete(self, text: str) -> bool:
-        if not text.startswith("\x1b"):
-            return True
-        patterns = [
-            r"^\x1B\[[0-?]*[ -/]*[@-~]",  # CSI ... Cmd
-            r"^\x1B\][^\x07]*(?:\x07|\x1B\\)",  # OSC ... BEL or ST
-            r"^\x1B[@-Z\\-_]",  # 2-byte sequences
-            r"^\x1B7",  # DECSC
-            r"^\x1B8",  # DECRC
-        ]
-        for pat in patterns:
-            if re.match(pat, text):
-                return True
-        return False
-
-    def _strip_ansi(self, text: str) -> str:
-        # CSI and OSC sequences
-        ansi_re = re.compile(
-            r"\x1B\[[0-?]*[ -/]*[@-~]|"  # CSI ... Cmd
-            r"\x1B\][^\x07]*(?:\x07|\x1B\\)|"  # OSC ... BEL or ST
-            r"\x1B[@-Z\\-_]|"  # 2-byte sequences
-            r"\x1B7|\x1B8"  # DECSC/DECRC
+    def _rebuild_decoder(self, *_args):
+        """Compile the RX text pipeline for the current encoding/ANSI/control settings."""
+        self.rx_decoder = StreamDecoder(
+            encoding=self.encoding_var.get().strip() or "utf-8",
+            strip_ansi=self.strip_ansi_var.get(),
+            normalize_ctrl=self.normalize_ctrl_var.get(),
+            ansi_color=self.ansi_color_var.get(),
         )
-        text = ansi_re.sub("", text)
-        # Normalize stray carriage returns
-        text = text.replace("\r\n", "\n")
-        return text
-
-    def _normalize_cr_bs(self, text: str) -> str:
-        # Remove carriage returns and apply backspaces in-place
-        text = text.replace("\r", "")
-        out = []
-        for ch in text:
-            if ch == "\b":
-                if out:
-                    out.pop()
-            else:
-                out.append(ch)
-        return "".join(out)
+
+    def _ensure_sgr_tags(self, tags):
+        """Configure rx_text tags for SGR styles seen for the first time."""
+        for tag in tags:
+            if tag is None or tag in self._sgr_tags:
+                continue
+            fg, bg, bold, underline, inverse = SGR_TAG_STYLES[tag]
+            if inverse:
+                fg, bg = bg or "#ffffff", fg or "#000000"
+            opts = {"foreground": fg or "", "background": bg or ""}
+            if bold:
+                opts["font"] = self.bold_font
+            if underline:
+                opts["underline"] = 1
+            self.rx_text.tag_configure(tag, **opts)
+            self._sgr_tags.add(tag)
+        # Selection highlight must stay visible on coloured text
+        self.rx_text.tag_raise(tk.SEL)
 
     def _push_history(self, text: str):
         if self.tx_history and self.tx_history[-1] == text:
@@ -640,10 +1791,47 @@ class UartTab(ttk.Frame):
         return "break"
 
     def _on_rx_scrollbar(self, *args):
-        self.rx_text.yview(*args)
+        if args and args[0] == "moveto":
+            # The scrollbar spans the whole scrollback, not just rx_text.
+            sb = self.scrollback
+            frac = max(0.0, min(1.0, float(args[1])))
+            target = min(sb.end_line - 1, sb.first_line + int(frac * (sb.end_line - sb.first_line)))
+            widget_lines = self._rx_widget_lines()
+            if self.rx_view_start <= target < self.rx_view_start + widget_lines:
+                self.rx_text.yview(f"{target - self.rx_view_start + 1}.0")
+            else:
+                self._rx_load_view(target - self.rx_view_lines // 2, top=target)
+        else:
+            self.rx_text.yview(*args)
         if not self._rx_internal_scroll:
             self._update_rx_autoscroll_state()
 
+    def _on_rx_yscroll(self, first, last):
+        sb = self.scrollback
+        total = max(1, sb.end_line - sb.first_line)
+        widget_lines = self._rx_widget_lines()
+        base = self.rx_view_start - sb.first_line
+        lo = (base + float(first) * widget_lines) / total
+        hi = (base + float(last) * widget_lines) / total
+        self.rx_scroll.set(max(0.0, min(1.0, lo)), max(0.0, min(1.0, hi)))
+        self._schedule_ts_gutter()
+        if not self._rx_internal_scroll and not self._rx_edge_check_pending:
+            self._rx_edge_check_pending = True
+            self.after_idle(self._rx_check_view_edges)
+
+    def _rx_check_view_edges(self):
+        """Slide the rx_text window when the viewport nears either end of it."""
+        self._rx_edge_check_pending = False
+        sb = self.scrollback
+        widget_lines = self._rx_widget_lines()
+        margin = self.rx_view_lines // 10
+        top = int(self.rx_text.index("@0,0").split(".")[0])
+        bottom = int(self.rx_text.index(f"@0,{self.rx_text.winfo_height()}").split(".")[0])
+        if top <= margin and self.rx_view_start > sb.first_line:
+            self._rx_recenter_view()
+        elif bottom >= widget_lines - margin and self.rx_view_start + widget_lines < sb.end_line:
+            self._rx_recenter_view()
+
     def _on_rx_user_scroll(self, event=None):
         # Wheel up means user intent to inspect history; stop auto-follow
         # immediately so incoming RX data does not snap view back to bottom.
@@ -660,19 +1848,486 @@ class UartTab(ttk.Frame):
             return
         try:
             _first, last = self.rx_text.yview()
-            self.rx_autoscroll = float(last) >= 0.999
+            at_tail = self.rx_view_start + self._rx_widget_lines() >= self.scrollback.end_line
+            self.rx_autoscroll = at_tail and float(last) >= 0.999
         except Exception:
             self.rx_autoscroll = True
 
     def on_close(self):
         self._disconnect()
+        if self.search is not None:
+            self.search.cancel()
+        if self.export_window is not None:
+            self.export_window.close()
         try:
-            if hasattr(self, "settings_win") and self.settings_win.winfo_exists():
+            if self.settings_win is not None and self.settings_win.winfo_exists():
                 self.settings_win.destroy()
         except Exception:
             pass
 
 
+class FilterWindow:
+    """
+    'Show only matching lines' view of a tab's search. It is a virtual list:
+    only the rows that fit on screen are rendered, so it stays quick with
+    millions of matches. Double-click a row to jump to it in the RX pane.
+    """
+
+    def __init__(self, tab: UartTab):
+        self.tab = tab
+        self.top = 0
+        self.follow = False
+        self._shown = []
+        self.win = tk.Toplevel(tab)
+        self.win.geometry("1000x500")
+        frame = ttk.Frame(self.win, padding=3)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.text = tk.Text(frame, wrap="none", state="disabled", font=tab.mono_font, cursor="arrow")
+        self.scroll = ttk.Scrollbar(frame, command=self._on_scrollbar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.bind("<Configure>", lambda _e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self._move(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda _e: self._move(-3))
+        self.text.bind("<Button-5>", lambda _e: self._move(3))
+        self.text.bind("<Prior>", lambda _e: self._move(-self._rows()))
+        self.text.bind("<Next>", lambda _e: self._move(self._rows()))
+        self.text.bind("<Double-Button-1>", self._on_double_click)
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+
+    def close(self):
+        self.tab.filter_window = None
+        self.win.destroy()
+
+    def _rows(self) -> int:
+        return max(1, self.text.winfo_height() // self.tab.mono_font.metrics("linespace"))
+
+    def _results(self):
+        """(results, first usable index): lines trimmed from the history are skipped."""
+        search = self.tab.search
+        if search is None:
+            return [], 0
+        return search.results, bisect_left(search.results, self.tab.scrollback.first_line)
+
+    def render(self):
+        results, lo = self._results()
+        total = len(results) - lo
+        rows = self._rows()
+        if self.follow:
+            self.top = total - rows
+        self.top = max(0, min(self.top, total - rows))
+        sb = self.tab.scrollback
+        self._shown = list(results[lo + self.top:lo + self.top + rows])
+        body = "\n".join(f"{i + 1:>10}  {sb.get_line(i)}" for i in self._shown)
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", body)
+        self.text.configure(state="disabled")
+        if total > rows:
+            self.scroll.set(self.top / total, (self.top + rows) / total)
+        else:
+            self.scroll.set(0.0, 1.0)
+        search = self.tab.search
+        self.win.title(f"Filter: {search.pattern} ({total} lines)" if search is not None else "Filter")
+
+    def _move(self, delta: int):
+        self.top += delta
+        results, lo = self._results()
+        self.follow = delta > 0 and self.top + self._rows() >= len(results) - lo
+        self.render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        results, lo = self._results()
+        total = len(results) - lo
+        if args[0] == "moveto":
+            self._move(int(float(args[1]) * total) - self.top)
+        elif args[0] == "scroll":
+            step = self._rows() if args[2] == "pages" else 1
+            self._move(int(args[1]) * step)
+
+    def _on_double_click(self, event):
+        row = int(self.text.index(f"@{event.x},{event.y}").split(".")[0]) - 1
+        if 0 <= row < len(self._shown):
+            self.tab._search_line = self._shown[row]
+            self.tab._rx_goto_line(self._shown[row])
+        return "break"
+
+
+class ExportWindow:
+    """
+    Export dialog of a tab. The chosen lines or capture records are written
+    by an ExportJob thread and this window only polls its progress, so the
+    RX pane keeps running during a long export. Rendered text comes from the
+    scrollback; raw bytes and hex dumps need the tab's capture (recording,
+    last recorded or replayed), as the scrollback only holds rendered text.
+    """
+
+    FORMATS = {"Rendered text": FORMAT_TEXT, "Raw bytes": FORMAT_RAW, "Hex dump": FORMAT_HEX}
+    RANGES = ["All", "Selection", "Time range"]
+
+    def __init__(self, tab: UartTab):
+        self.tab = tab
+        self.job = None
+        self._poll_job = None
+        sb = tab.scrollback
+        self.format_var = tk.StringVar(value="Rendered text")
+        self.range_var = tk.StringVar(value="Selection" if tab._selected_lines() else "All")
+        self.ts_mode_var = tk.StringVar(value=tab.ts_mode_var.get())
+        self.from_var = tk.StringVar(value=self._clock(sb.line_time(sb.first_line)))
+        self.to_var = tk.StringVar(value="")
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.status_var = tk.StringVar(value="")
+
+        self.win = tk.Toplevel(tab)
+        self.win.title("Export RX Log")
+        self.win.resizable(False, False)
+        frame = ttk.Frame(self.win, padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text="Format").grid(row=0, column=0, sticky="w")
+        ttk.Combobox(
+            frame,
+            textvariable=self.format_var,
+            width=16,
+            values=list(self.FORMATS),
+            state="readonly",
+        ).grid(row=0, column=1, columnspan=2, sticky="w", padx=6, pady=2)
+        ttk.Label(frame, text="Timestamps").grid(row=1, column=0, sticky="w")
+        self.ts_mode_entry = ttk.Combobox(
+            frame,
+            textvariable=self.ts_mode_var,
+            width=16,
+            values=TIMESTAMP_MODES,
+            state="readonly",
+        )
+        self.ts_mode_entry.grid(row=1, column=1, columnspan=2, sticky="w", padx=6, pady=2)
+        ttk.Label(frame, text="Range").grid(row=2, column=0, sticky="w")
+        ranges = ttk.Frame(frame)
+        ranges.grid(row=2, column=1, columnspan=2, sticky="w", padx=6, pady=2)
+        for name in self.RANGES:
+            ttk.Radiobutton(ranges, text=name, value=name, variable=self.range_var).pack(side=tk.LEFT, padx=(0, 6))
+        ttk.Label(frame, text="From / To").grid(row=3, column=0, sticky="w")
+        ttk.Entry(frame, textvariable=self.from_var, width=14).grid(row=3, column=1, sticky="w", padx=6, pady=2)
+        ttk.Entry(frame, textvariable=self.to_var, width=14).grid(row=3, column=2, sticky="w", pady=2)
+        ttk.Progressbar(frame, variable=self.progress_var, maximum=100.0, length=320).grid(
+            row=4, column=0, columnspan=3, sticky="ew", pady=(10, 2))
+        ttk.Label(frame, textvariable=self.status_var).grid(row=5, column=0, columnspan=3, sticky="w")
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=6, column=0, columnspan=3, sticky="e", pady=(8, 0))
+        self.export_btn = ttk.Button(buttons, text="Export...", command=self._start)
+        self.export_btn.pack(side=tk.LEFT)
+        self.cancel_btn = ttk.Button(buttons, text="Cancel", command=self._cancel, state="disabled")
+        self.cancel_btn.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Button(buttons, text="Close", command=self.close).pack(side=tk.LEFT, padx=(6, 0))
+        self.format_var.trace_add("write", lambda *_: self._on_format())
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self._on_format()
+
+    @staticmethod
+    def _clock(ts: int) -> str:
+        if not ts:
+            return ""
+        return datetime.fromtimestamp(ts / 1e9).strftime("%H:%M:%S.%f")[:-3]
+
+    def _on_format(self):
+        text = self.FORMATS[self.format_var.get()] == FORMAT_TEXT
+        self.ts_mode_entry.configure(state="readonly" if text else "disabled")
+        if not text and self.tab._capture_source() is None:
+            self.status_var.set(NO_CAPTURE_MSG)
+        else:
+            self.status_var.set("")
+
+    def close(self):
+        if self.job is not None:
+            self.job.cancel()
+        if self._poll_job is not None:
+            self.win.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.tab.export_window = None
+        self.win.destroy()
+
+    def _span(self):
+        """(from, to) wall ns of the time range fields; None if both are empty."""
+        sb = self.tab.scrollback
+        ref = sb.line_time(sb.first_line) or time_ns()
+        t0 = parse_time(self.from_var.get(), ref)
+        t1 = parse_time(self.to_var.get(), ref)
+        if t0 is None and t1 is None:
+            return None
+        if t0 is not None and t1 is not None and t1 <= t0:
+            # A range running past midnight
+            t1 += 86400 * 1000000000
+        return t0, t1
+
+    def _lines_span(self, first: int, last: int):
+        """Wall-clock span covering lines [first, last], for capture exports."""
+        sb = self.tab.scrollback
+        t0 = 0
+        for i in range(first, max(sb.first_line, first - 1000) - 1, -1):
+            t0 = sb.line_time(i)
+            if t0:
+                break
+        t1 = sb.line_time(last + 1)
+        return t0 or None, t1 or None
+
+    def _start(self):
+        if self.job is not None:
+            return
+        tab = self.tab
+        sb = tab.scrollback
+        fmt = self.FORMATS[self.format_var.get()]
+        span = None
+        lines = None
+        if self.range_var.get() == "Selection":
+            lines = tab._selected_lines()
+            if lines is None:
+                messagebox.showwarning("UART Tool", "Nothing is selected in the RX pane.", parent=self.win)
+                return
+        elif self.range_var.get() == "Time range":
+            try:
+                span = self._span()
+            except ValueError as e:
+                messagebox.showerror("UART Tool", str(e), parent=self.win)
+                return
+        source = None
+        if fmt != FORMAT_TEXT:
+            source = tab._capture_source()
+            if source is None:
+                messagebox.showwarning("UART Tool", NO_CAPTURE_MSG, parent=self.win)
+                return
+            if lines is not None:
+                span = self._lines_span(*lines)
+        port = os.path.basename(tab.port_var.get().strip()) or "uart"
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        ext = ".bin" if fmt == FORMAT_RAW else ".log"
+        path = filedialog.asksaveasfilename(
+            parent=self.win,
+            title="Export RX Log",
+            defaultextension=ext,
+            initialfile=f"{port}_{ts}{ext}",
+            filetypes=[("Log Files", "*.log"), ("Text Files", "*.txt"), ("Binary Files", "*.bin"),
+                       ("All Files", "*.*")],
+        )
+        if not path:
+            return
+        if fmt == FORMAT_TEXT:
+            start, end = (lines[0], lines[1] + 1) if lines else (sb.first_line, sb.end_line)
+            start = max(start, sb.first_line)
+            finished = sb.end_line - 1
+            partial = sb.partial if end > finished and sb.partial else None
+            end = min(end, finished)
+            mode = self.ts_mode_var.get()
+            mode = None if mode == "Off" else mode
+            times = None
+            times_first = max(sb.first_line, start - 1)
+            if mode is not None or span is not None:
+                times = sb.line_times(times_first, end + 1)
+            chunks = text_chunks(sb.snapshot(start, end), start, end, partial, times, times_first, mode,
+                                 sb.tx_times() if mode == "Since TX" else None, span)
+        else:
+            chunks = capture_chunks(source[0], fmt, span, source[1])
+        self.job = ExportJob(path, chunks, binary=fmt == FORMAT_RAW).start()
+        self.export_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal")
+        self.progress_var.set(0.0)
+        self._poll()
+
+    def _cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def _poll(self):
+        self._poll_job = None
+        job = self.job
+        if job is None:
+            return
+        self.progress_var.set(job.progress * 100)
+        if not job.done.is_set():
+            self.status_var.set(f"Writing... {format_size(job.written)}")
+            self._poll_job = self.win.after(EXPORT_POLL_MS, self._poll)
+            return
+        self.job = None
+        self.export_btn.configure(state="normal")
+        self.cancel_btn.configure(state="disabled")
+        if job.error is not None:
+            self.status_var.set(f"Export failed: {job.error}")
+        elif job.cancelled:
+            self.progress_var.set(0.0)
+            self.status_var.set("Export cancelled.")
+        else:
+            self.status_var.set(f"Wrote {format_size(job.written)} to {os.path.basename(job.path)}")
+
+
+class TimelineWindow:
+    """
+    Merged, time-ordered view of the RX lines and TX writes of the selected
+    tabs, one colour per tab. Like FilterWindow it only renders the rows on
+    screen: each page is a k-way merge read straight from the tabs'
+    scrollbacks (see timeline.py) and is re-read while following the live
+    end. Double-click an RX row to jump to it in its tab.
+    """
+
+    def __init__(self, app: "UartGuiApp"):
+        self.app = app
+        self.follow = True
+        self.top_ts = 0
+        self.top_skip = 0  # rows sharing top_ts that are scrolled past
+        self._shown = []
+        self._selected = {}  # tab -> BooleanVar
+        self._poll_job = None
+        self.win = tk.Toplevel(app.root)
+        self.win.title("Timeline")
+        self.win.geometry("1100x550")
+        self.tabs_bar = ttk.Frame(self.win, padding=(3, 3, 3, 0))
+        self.tabs_bar.pack(fill=tk.X)
+        frame = ttk.Frame(self.win, padding=3)
+        frame.pack(fill=tk.BOTH, expand=True)
+        self.font = app.tabs[0].mono_font if app.tabs else tkfont.nametofont("TkFixedFont")
+        self.text = tk.Text(frame, wrap="none", state="disabled", font=self.font, cursor="arrow")
+        self.scroll = ttk.Scrollbar(frame, command=self._on_scrollbar)
+        self.scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        for i, color in enumerate(TIMELINE_COLORS):
+            self.text.tag_configure(f"src{i}", foreground=color)
+        self.text.tag_configure("tx", background=TIMELINE_TX_BG)
+        self.text.bind("<Configure>", lambda _e: self.render())
+        self.text.bind("<MouseWheel>", lambda e: self._move(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda _e: self._move(-3))
+        self.text.bind("<Button-5>", lambda _e: self._move(3))
+        self.text.bind("<Prior>", lambda _e: self._move(-self._rows()))
+        self.text.bind("<Next>", lambda _e: self._move(self._rows()))
+        self.text.bind("<End>", lambda _e: self._follow())
+        self.text.bind("<Double-Button-1>", self._on_double_click)
+        self.win.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh_sources()
+        self._poll()
+
+    def close(self):
+        if self._poll_job is not None:
+            self.win.after_cancel(self._poll_job)
+            self._poll_job = None
+        self.app.timeline_window = None
+        self.win.destroy()
+
+    def _color_index(self, tab) -> int:
+        return self.app.tabs.index(tab) % len(TIMELINE_COLORS)
+
+    def refresh_sources(self):
+        """Rebuild the tab checkboxes after tabs were opened, closed or renamed."""
+        for child in self.tabs_bar.winfo_children():
+            child.destroy()
+        self._selected = {tab: self._selected.get(tab) or tk.BooleanVar(value=True) for tab in self.app.tabs}
+        for tab, var in self._selected.items():
+            tk.Checkbutton(
+                self.tabs_bar,
+                text=self.app.notebook.tab(tab, "text"),
+                variable=var,
+                fg=TIMELINE_COLORS[self._color_index(tab)],
+                command=self.render,
+            ).pack(side=tk.LEFT, padx=(0, 8))
+        ttk.Button(self.tabs_bar, text="Follow", command=self._follow).pack(side=tk.RIGHT)
+        self._tab_names = [self.app.notebook.tab(tab, "text") for tab in self.app.tabs]
+
+    def _sources(self) -> list:
+        return [tab for tab in self.app.tabs if tab in self._selected and self._selected[tab].get()]
+
+    def _rows(self) -> int:
+        return max(1, self.text.winfo_height() // self.font.metrics("linespace"))
+
+    def render(self):
+        tabs = self._sources()
+        sources = [tab.scrollback for tab in tabs]
+        rows = self._rows()
+        if self.follow:
+            page = rows_before(sources, END, rows)
+            self.top_ts, self.top_skip = (page[0][0], 0) if page else (0, 0)
+        else:
+            page = rows_from(sources, self.top_ts, self.top_skip + rows)[self.top_skip:]
+        self._shown = [(tabs[i], ts, kind) for ts, i, kind, _text in page]
+        names = [self.app.notebook.tab(tab, "text") for tab in tabs]
+        lines = []
+        for ts, i, kind, text in page:
+            clock = datetime.fromtimestamp(ts / 1e9).strftime("%H:%M:%S.%f")[:-3] if ts else " " * 12
+            lines.append(f"{clock}  {names[i][:14]:<14} {'TX' if kind == KIND_TX else 'RX'}  {text}")
+        self.text.configure(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        for row, (tab, _ts, kind) in enumerate(self._shown, 1):
+            self.text.tag_add(f"src{self._color_index(tab)}", f"{row}.0", f"{row}.end")
+            if kind == KIND_TX:
+                self.text.tag_add("tx", f"{row}.0", f"{row}.end")
+        self.text.configure(state="disabled")
+        first, last = time_bounds(sources)
+        if page and last > first:
+            span = last - first
+            self.scroll.set((page[0][0] - first) / span, 1.0 if self.follow else (page[-1][0] - first) / span)
+        else:
+            self.scroll.set(0.0, 1.0)
+        self.win.title(f"Timeline ({len(tabs)} tabs)" + ("" if self.follow else " - paused, End to follow"))
+
+    def _follow(self):
+        self.follow = True
+        self.render()
+        return "break"
+
+    def _move(self, delta: int):
+        sources = [tab.scrollback for tab in self._sources()]
+        rows = self._rows()
+        if delta > 0:
+            if self.follow:
+                return "break"
+            k = self.top_skip + delta
+            page = rows_from(sources, self.top_ts, k + rows)
+            if k + rows >= len(page):
+                self.follow = True
+            else:
+                ts = page[k][0]
+                self.top_ts = ts
+                self.top_skip = sum(1 for row in page[:k] if row[0] == ts)
+        elif delta < 0:
+            self.follow = False
+            k = -delta
+            if self.top_skip >= k:
+                self.top_skip -= k
+            else:
+                page = rows_before(sources, self.top_ts, k - self.top_skip)
+                if page:
+                    self.top_ts = page[0][0]
+                self.top_skip = 0
+        self.render()
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            frac = float(args[1])
+            first, last = time_bounds([tab.scrollback for tab in self._sources()])
+            self.follow = frac >= 0.999
+            self.top_ts = first + int(max(0.0, frac) * (last - first))
+            self.top_skip = 0
+            self.render()
+        elif args[0] == "scroll":
+            step = self._rows() if args[2] == "pages" else 1
+            self._move(int(args[1]) * step)
+
+    def _on_double_click(self, event):
+        row = int(self.text.index(f"@{event.x},{event.y}").split(".")[0]) - 1
+        if 0 <= row < len(self._shown):
+            tab, ts, kind = self._shown[row]
+            if kind != KIND_TX and tab in self.app.tabs:
+                self.app.select_tab(tab)
+                tab._rx_goto_line(tab.scrollback.line_at_time(ts))
+        return "break"
+
+    def _poll(self):
+        self._poll_job = None
+        names = [self.app.notebook.tab(tab, "text") for tab in self.app.tabs]
+        if names != self._tab_names or set(self._selected) != set(self.app.tabs):
+            self.refresh_sources()
+        if self.follow:
+            self.render()
+        self._poll_job = self.win.after(TIMELINE_POLL_MS, self._poll)
+
+
 class UartGuiApp:
     def __init__(self, root: tk.Tk):
         self.root = root
@@ -682,6 +2337,7 @@ class UartGuiApp:
 
         self.global_font = None
         self.exit_requested = False
+        self.timeline_window = None
 
         container = ttk.Frame(self.root)
         container.pack(fill=tk.BOTH, expand=True)
@@ -689,6 +2345,10 @@ class UartGuiApp:
         self.notebook = ttk.Notebook(container)
         self.notebook.pack(fill=tk.BOTH, expand=True)
 
+        # Port lists follow the registry's background scans (hotplug included)
+        get_registry().add_listener(self._on_ports_changed)
+        self.root.bind("<<PortsChanged>>", self._refresh_port_lists)
+
         self.tabs = []
         self.add_tab = None
         self._add_plus_tab()
@@ -725,6 +2385,23 @@ class UartGuiApp:
             self.notebook.add(tab, text=tab.label)
         return tab
 
+    def _on_ports_changed(self, _added, _removed):
+        # Runs on the registry thread
+        try:
+            self.root.event_generate("<<PortsChanged>>", when="tail")
+        except Exception:
+            pass
+
+    def _refresh_port_lists(self, _event=None):
+        for tab in self.tabs:
+            tab._refresh_ports()
+
+    def open_timeline(self):
+        if self.timeline_window is None or not self.timeline_window.win.winfo_exists():
+            self.timeline_window = TimelineWindow(self)
+        self.timeline_window.win.deiconify()
+        self.timeline_window.win.lift()
+
     def select_tab(self, tab: UartTab):
         self.notebook.select(tab)
 
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import sys
+from array import array
+
+from uarttool.utils import HEX_HI, HEX_LO, parse_bytes_to_hex_str
+
+# Non-printable bytes show as '.' in the ASCII gutter
+ASCII_TABLE = bytes(b if 0x20 <= b < 0x7f else 0x2e for b in range(256))
+
+STYLES = ('0x', 'plain')
+
+# Below this many bytes, gutter/offset rows are filled in by one %-format
+SMALL_ROWS_BYTES = 512
+
+
+def hex_tokens(data, style='0x') -> str:
+    """'0xaa 0xbb' ('aa bb' for plain) for a whole buffer in one pass."""
+    if style == '0x':
+        return parse_bytes_to_hex_str(data)
+    return data.hex(' ') if data else ''
+
+
+class HexDumper:
+    """
+    Streaming hex formatter.
+
+    width=None keeps the historical layout (one line per chunk). With a width
+    of 8/16/32 rows are cut at fixed stream offsets regardless of how the data
+    was split into reads. Without the ASCII gutter an unfinished row is written
+    straight away and continued by the next feed(); with the gutter it is held
+    back until complete or until flush() pads it out. After a flush the next
+    row keeps its column, so offsets stay aligned to the row width.
+    """
+
+    def __init__(self, width=None, style='0x', offset=False, ascii=False):
+        if style not in STYLES:
+            raise ValueError('unknown hex style {}'.format(style))
+        self.width = width
+        self.style = style
+        self.offset = offset
+        self.ascii = ascii
+        self._tw = 5 if style == '0x' else 3  # token width incl. separator
+        if width:
+            self._build_template()
+        self.reset()
+
+    def _build_template(self):
+        w = self.width
+        row = b'00000000  ' if self.offset else b''
+        self._tok_base = len(row)
+        row += ((b'0x   ' if self.style == '0x' else b'   ') * w)[:-1]
+        if self.ascii:
+            row += b'  |'
+            self._asc_base = len(row)
+            row += b' ' * w + b'|'
+        self._tpl = row + b'\n'
+        self._fmt = ('%08x  ' if self.offset else '') + '%s' + ('  |%s|' if self.ascii else '') + '\n'
+
+    def reset(self):
+        self.pos = 0
+        self._held = b''
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._held)
+
+    def feed(self, data) -> str:
+        if not data:
+            return ''
+        w = self.width
+        if w is None:
+            return self._chunk_line(data)
+        if not self._held and not (self.pos % w or len(data) % w):
+            # Whole rows from a row boundary: nothing to continue or hold back
+            text = self._rows(data, self.pos)
+            self.pos += len(data)
+            return text
+        if self.ascii:
+            return self._feed_held(data)
+        return self._feed_open(data)
+
+    def flush(self) -> str:
+        """Emit a held-back partial row (gutter layouts only)."""
+        if not self._held:
+            return ''
+        start = self.pos - len(self._held)
+        text = self._row(self._held, start, start % self.width)
+        self._held = b''
+        return text
+
+    def _chunk_line(self, data) -> str:
+        line = hex_tokens(data, self.style)
+        if self.offset:
+            line = '{:08x}  {}'.format(self.pos & 0xFFFFFFFF, line)
+        if self.ascii:
+            line = '{}  |{}|'.format(line, bytes(data).translate(ASCII_TABLE).decode('ascii'))
+        self.pos += len(data)
+        return line + '\n'
+
+    def _feed_open(self, data) -> str:
+        w = self.width
+        mv = memoryview(data)
+        n = len(mv)
+        col = self.pos % w
+        out = []
+        i = 0
+        if col:
+            i = min(w - col, n)
+            out.append(' ' + hex_tokens(mv[:i], self.style))
+            if col + i == w:
+                out.append('\n')
+        full_end = i + (n - i) // w * w
+        if full_end > i:
+            out.append(self._rows(mv[i:full_end], self.pos + i))
+        if full_end < n:
+            if self.offset:
+                out.append('{:08x}  '.format((self.pos + full_end) & 0xFFFFFFFF))
+            out.append(hex_tokens(mv[full_end:], self.style))
+        self.pos += n
+        return ''.join(out)
+
+    def _feed_held(self, data) -> str:
+        w = self.width
+        buf = self._held + data if self._held else bytes(data)
+        start = self.pos - len(self._held)
+        self.pos += len(data)
+        col = start % w
+        out = []
+        i = 0
+        if col:
+            if len(buf) < w - col:
+                self._held = buf
+                return ''
+            i = w - col
+            out.append(self._row(buf[:i], start, col))
+        full_end = i + (len(buf) - i) // w * w
+        if full_end > i:
+            out.append(self._rows(buf[i:full_end], start + i))
+        self._held = buf[full_end:]
+        return ''.join(out)
+
+    def _rows(self, data, start) -> str:
+        """
+        Format whole rows; len(data) is a multiple of width and start is row
+        aligned. A row template is repeated once per row and every column is
+        filled with one strided slice assignment, so the work done in Python
+        depends on the row width, not on the amount of data.
+        """
+        data = bytes(data)
+        w = self.width
+        nrows = len(data) // w
+        if (self.offset or self.ascii) and len(data) < SMALL_ROWS_BYTES:
+            # Column fills cost O(width) calls; a few rows are cheaper sliced
+            # out of whole-buffer hex and ASCII strings into one format.
+            return self._rows_fmt(data, start, nrows)
+        tw = self._tw
+        tpl = self._tpl
+        stride = len(tpl)
+        p = self._tok_base + (2 if self.style == '0x' else 0)
+        out = bytearray(tpl) * nrows
+        hi = data.translate(HEX_HI)
+        lo = data.translate(HEX_LO)
+        if stride == tw * w:
+            # Tokens only: the token stride runs straight across row ends.
+            out[p::tw] = hi
+            out[p + 1::tw] = lo
+            return out.decode('ascii')
+        for k in range(w):
+            q = p + tw * k
+            out[q::stride] = hi[k::w]
+            out[q + 1::stride] = lo[k::w]
+        if self.ascii:
+            asc = data.translate(ASCII_TABLE)
+            for k in range(w):
+                out[self._asc_base + k::stride] = asc[k::w]
+        if self.offset:
+            if start + nrows * w <= 0xFFFFFFFF:
+                offs = array('I', range(start, start + nrows * w, w))
+            else:
+                offs = array('I', [(start + r * w) & 0xFFFFFFFF for r in range(nrows)])
+            if sys.byteorder == 'little':
+                offs.byteswap()
+            ob = offs.tobytes()
+            ohi = ob.translate(HEX_HI)
+            olo = ob.translate(HEX_LO)
+            for j in range(4):
+                out[2 * j::stride] = ohi[j::4]
+                out[2 * j + 1::stride] = olo[j::4]
+        return out.decode('ascii')
+
+    def _rows_fmt(self, data, start, nrows) -> str:
+        w = self.width
+        span = self._tw * w
+        tokens = hex_tokens(data, self.style)
+        asc = data.translate(ASCII_TABLE).decode('ascii') if self.ascii else None
+        args = []
+        for r in range(nrows):
+            if self.offset:
+                args.append((start + r * w) & 0xFFFFFFFF)
+            args.append(tokens[span * r:span * (r + 1) - 1])
+            if asc is not None:
+                args.append(asc[w * r:w * (r + 1)])
+        return (self._fmt * nrows) % tuple(args)
+
+    def _row(self, chunk, start, col) -> str:
+        """One row that may begin at column `col` and end before the row width."""
+        w = self.width
+        tw = self._tw
+        body = ' ' * (tw * col) + hex_tokens(chunk, self.style)
+        line = body.ljust(tw * w - 1) if self.ascii else body
+        if self.ascii:
+            asc = bytes(chunk).translate(ASCII_TABLE).decode('ascii')
+            line = '{}  |{}|'.format(line, (' ' * col + asc).ljust(w))
+        if self.offset:
+            line = '{:08x}  {}'.format((start - col) & 0xFFFFFFFF, line)
+        return line + '\n'
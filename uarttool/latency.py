@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Command round-trip latency.
+
+LatencyTracker hooks a UartController: send_cmd() stamps every write with
+monotonic_ns() and the RX read path stamps the first bytes answering it, in
+the reading thread, so the Tk main loop adds nothing to the figure. Times
+land in one streaming LatencyHistogram per command plus an overall one;
+memory stays fixed however long it runs.
+
+Without a response pattern the first RX chunk after a send answers every
+command still waiting. With one (a regex or 'hex:5aa5'), each match answers
+the oldest waiting command. A command unanswered after `timeout` seconds
+counts as a timeout.
+"""
+
+import csv
+import json
+import math
+import threading
+from collections import deque
+from time import monotonic_ns
+
+from uarttool.utils import compile_expect, parse_bytes_to_hex_str
+
+# Buckets per doubling: each bucket is about 9% wide
+SUB_BUCKETS = 8
+# Bucket 0 is < 1 us, the last one is >= 2**27 us (~134 s)
+MAX_BUCKET = 27 * SUB_BUCKETS + 1
+PERCENTILES = (50, 90, 99, 99.9)
+# Commands waiting for an answer; older ones are counted as timeouts
+MAX_PENDING = 4096
+
+
+class LatencyHistogram:
+    """Log-bucketed latency counts (ns), with exact count/sum/min/max."""
+
+    def __init__(self):
+        self.counts = [0] * (MAX_BUCKET + 1)
+        self.count = 0
+        self.sum_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    @staticmethod
+    def bucket(ns: int) -> int:
+        if ns < 1000:
+            return 0
+        return min(MAX_BUCKET, int(math.log2(ns / 1000.0) * SUB_BUCKETS) + 1)
+
+    def add(self, ns: int):
+        self.counts[self.bucket(ns)] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if self.min_ns is None or ns < self.min_ns:
+            self.min_ns = ns
+        if self.max_ns is None or ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p: float):
+        """Latency (ns) below which p percent of the samples fall; None if empty."""
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(p / 100.0 * self.count)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                break
+        # Geometric middle of the bucket, kept within the observed range
+        mid = 500.0 if i == 0 else 1000.0 * 2 ** ((i - 0.5) / SUB_BUCKETS)
+        return int(min(max(mid, self.min_ns), self.max_ns))
+
+    def summary(self) -> dict:
+        ms = (lambda v: None if v is None else round(v / 1e6, 3))
+        out = {
+            'count': self.count,
+            'mean_ms': ms(self.sum_ns / self.count) if self.count else None,
+            'min_ms': ms(self.min_ns),
+            'max_ms': ms(self.max_ns),
+        }
+        for p in PERCENTILES:
+            out['p{:g}_ms'.format(p)] = ms(self.percentile(p))
+        return out
+
+
+def command_key(cmd: bytes, hex_mode: bool, key_bytes=8) -> str:
+    """Name a command for the per-command tables: leading hex bytes, or the text line."""
+    if hex_mode:
+        key = parse_bytes_to_hex_str(cmd[:key_bytes])
+        return key + ' ...' if len(cmd) > key_bytes else key
+    return cmd.decode('utf-8', errors='replace').strip()[:32]
+
+
+class LatencyTracker:
+    def __init__(self, expect=None, timeout=1.0, key_bytes=8):
+        self.expect = compile_expect(expect) if isinstance(expect, str) else expect
+        self.timeout_ns = int(timeout * 1e9)
+        self.key_bytes = key_bytes
+        self.total = LatencyHistogram()
+        self.commands = {}  # key -> LatencyHistogram
+        self.timeouts = {}  # key -> count
+        self._pending = deque()  # (key, send ns), oldest first
+        self._rx = bytearray()
+        self._lock = threading.Lock()
+        self._ctrl = None
+
+    def attach(self, ctrl):
+        self.detach()
+        self._ctrl = ctrl
+        ctrl.latency = self
+        ctrl.rx_taps.append(self.on_rx)
+        return self
+
+    def detach(self):
+        ctrl = self._ctrl
+        if ctrl is None:
+            return
+        self._ctrl = None
+        if ctrl.latency is self:
+            ctrl.latency = None
+        try:
+            ctrl.rx_taps.remove(self.on_rx)
+        except ValueError:
+            pass
+
+    def on_send(self, cmd: bytes, ts: int, hex_mode=False):
+        key = command_key(cmd, hex_mode, self.key_bytes)
+        with self._lock:
+            self._expire(ts)
+            if len(self._pending) >= MAX_PENDING:
+                self._timeout(self._pending.popleft()[0])
+            self._pending.append((key, ts))
+
+    def on_rx(self, data):
+        now = monotonic_ns()
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return
+            self._expire(now)
+            if self.expect is None:
+                while pending:
+                    self._answer(pending.popleft(), now)
+                return
+            rx = self._rx
+            rx += data
+            pos = 0
+            for m in self.expect.finditer(rx):
+                pos = m.end()
+                if not pending:
+                    break
+                self._answer(pending.popleft(), now)
+            if pos:
+                del rx[:pos]
+            if len(rx) > 64 * 1024:
+                del rx[:len(rx) - 32 * 1024]
+
+    def _answer(self, item, now):
+        key, ts = item
+        hist = self.commands.get(key)
+        if hist is None:
+            hist = self.commands[key] = LatencyHistogram()
+        hist.add(now - ts)
+        self.total.add(now - ts)
+
+    def _timeout(self, key):
+        self.timeouts[key] = self.timeouts.get(key, 0) + 1
+
+    def _expire(self, now):
+        pending = self._pending
+        while pending and now - pending[0][1] >= self.timeout_ns:
+            self._timeout(pending.popleft()[0])
+
+    def reset(self):
+        with self._lock:
+            self.total = LatencyHistogram()
+            self.commands.clear()
+            self.timeouts.clear()
+            self._pending.clear()
+            self._rx.clear()
+
+    def rows(self) -> list:
+        """Percentile table: one dict per command, then an '(all)' row."""
+        with self._lock:
+            self._expire(monotonic_ns())
+            keys = sorted(set(self.commands) | set(self.timeouts))
+            rows = []
+            for key in keys:
+                row = {'command': key, 'timeouts': self.timeouts.get(key, 0)}
+                row.update((self.commands.get(key) or LatencyHistogram()).summary())
+                rows.append(row)
+            row = {'command': '(all)', 'timeouts': sum(self.timeouts.values())}
+            row.update(self.total.summary())
+            rows.append(row)
+        return rows
+
+    def export(self, path: str):
+        """Write the percentile table as CSV, or as JSON with the raw buckets if path ends in .json."""
+        rows = self.rows()
+        if path.lower().endswith('.json'):
+            with self._lock:
+                buckets = {key: hist.counts for key, hist in self.commands.items()}
+            doc = {'sub_buckets': SUB_BUCKETS, 'commands': rows, 'buckets': buckets}
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(doc, f, indent=1)
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def format_summary(self) -> str:
+        """Short overall line for the stats strip."""
+        hist = self.total
+        timeouts = sum(self.timeouts.values())
+        if not hist.count and not timeouts:
+            return ''
+        s = hist.summary()
+        line = 'rtt p50 {} p99 {} ms ({})'.format(s['p50_ms'], s['p99_ms'], hist.count)
+        if timeouts:
+            line += ' timeouts {}'.format(timeouts)
+        return line
+
+    def format_report(self) -> str:
+        lines = ['{:<32} {:>7} {:>8} {:>9} {:>9} {:>9} {:>9}'.format(
+            'command', 'count', 'timeouts', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms')]
+        for r in self.rows():
+            lines.append('{:<32} {:>7} {:>8} {:>9} {:>9} {:>9} {:>9}'.format(
+                r['command'], r['count'], r['timeouts'], str(r['p50_ms']), str(r['p90_ms']), str(r['p99_ms']),
+                str(r['max_ms'])))
+        return '\n'.join(lines)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Process-wide cache of the serial ports present, kept current in the background.
+
+Enumerating with list_ports.comports() probes sysfs (or the registry) for
+every adapter, which gets slow with many USB adapters and must not run on the
+Tk thread each time a port list is shown. PortRegistry does it once on its own
+thread and then only follows changes: on Linux it watches /dev with inotify
+(falling back to a cheap directory listing every POLL_S) and probes just the
+device nodes that were added or removed. Elsewhere comports() is re-run every
+POLL_S, still off the caller's thread. Readers get the cached list instantly.
+
+A port's identity (port_identity()) is its USB serial number, else its USB
+path, else its device name, so a board that re-enumerates as another ttyUSBn
+is still found by find().
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+from time import sleep
+
+from serial.tools import list_ports
+
+DEV_DIR = '/dev'
+# Device nodes pyserial's Linux comports() looks at
+LINUX_PREFIXES = ('ttyS', 'ttyUSB', 'ttyXRUSB', 'ttyACM', 'ttyAMA', 'rfcomm', 'ttyAP', 'ttyGS')
+# Rescan interval without inotify
+POLL_S = 1.0
+# udev creates, renames and chmods a node in a burst; changes are gathered this long
+SETTLE_S = 0.05
+# How long ports() waits for the first scan by default
+FIRST_SCAN_S = 2.0
+
+_IN_ATTRIB = 0x4
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def port_identity(info) -> tuple:
+    """What survives re-enumeration: USB serial number, else USB path, else the device name."""
+    if info.serial_number:
+        return ('serial', info.vid, info.pid, info.serial_number)
+    if info.location:
+        return ('location', info.location)
+    return ('device', info.device)
+
+
+def _inotify_watch(path):
+    """Non-blocking inotify fd watching `path` for nodes coming and going; None where unavailable."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        mask = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_ATTRIB
+        if libc.inotify_add_watch(fd, path.encode(), mask) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except Exception:
+        return None
+
+
+def _event_names(buf) -> set:
+    names = set()
+    pos = 0
+    while pos + _EVENT_HEADER.size <= len(buf):
+        _wd, _mask, _cookie, size = _EVENT_HEADER.unpack_from(buf, pos)
+        pos += _EVENT_HEADER.size
+        name = bytes(buf[pos:pos + size]).rstrip(b'\0')
+        pos += size
+        if name:
+            names.add(os.fsdecode(name))
+    return names
+
+
+class PortRegistry:
+    def __init__(self):
+        self._ports = {}  # device -> ListPortInfo
+        self._hidden = set()  # Linux nodes probed and found not to be real ports
+        self._cond = threading.Condition()
+        self._scanned = False
+        self._rescan = False
+        self.generation = 0  # bumped after every scan, changed or not
+        self._listeners = []
+        self._linux = sys.platform.startswith('linux') and os.path.isdir(DEV_DIR)
+        self._inotify = _inotify_watch(DEV_DIR) if self._linux else None
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='uart-ports')
+        self._thread.start()
+
+    def ports(self, timeout=FIRST_SCAN_S) -> list:
+        """The ports present, sorted by device; waits up to `timeout` for the first scan."""
+        with self._cond:
+            if not self._scanned and timeout:
+                self._cond.wait_for(lambda: self._scanned, timeout)
+            return sorted(self._ports.values(), key=lambda p: p.device)
+
+    def identity(self, device: str, timeout=FIRST_SCAN_S):
+        """port_identity() of `device`; None if it is not a port the registry knows."""
+        for info in self.ports(timeout):
+            if info.device == device:
+                return port_identity(info)
+        return None
+
+    def find(self, identity, prefer=None):
+        """Device of a present port with `identity`, `prefer` if that one matches; else None."""
+        found = None
+        for info in self.ports(0):
+            if port_identity(info) == identity:
+                if info.device == prefer:
+                    return prefer
+                found = found or info.device
+        return found
+
+    def wait_change(self, generation: int, timeout: float) -> int:
+        """Block until a scan newer than `generation` ran (or timeout); the current generation."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+    def refresh(self, timeout=FIRST_SCAN_S) -> list:
+        """Probe every port again (e.g. a Refresh button) and return the new list."""
+        with self._cond:
+            generation = self.generation
+            self._rescan = True
+        self._wake()
+        self.wait_change(generation, timeout)
+        return self.ports(0)
+
+    def add_listener(self, fn):
+        """fn(added, removed) is called from the registry thread with ListPortInfo lists."""
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        try:
+            self._listeners.remove(fn)
+        except ValueError:
+            pass
+
+    def _wake(self):
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass
+
+    def _run(self):
+        self._publish(self._scan_all(reprobe=True))
+        while True:
+            try:
+                names = self._wait()
+                with self._cond:
+                    full, self._rescan = self._rescan, False
+                if full:
+                    ports = self._scan_all(reprobe=True)
+                elif names is None:
+                    ports = self._scan_all(reprobe=False)
+                else:
+                    ports = self._scan_names(names)
+            except Exception:
+                sleep(POLL_S)
+                continue
+            self._publish(ports)
+
+    def _wait(self):
+        """Names of /dev entries that changed; None when everything should be compared."""
+        fds = [self._wake_r] if self._inotify is None else [self._wake_r, self._inotify]
+        ready, _w, _x = select.select(fds, [], [], None if self._inotify is not None else POLL_S)
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        if self._inotify is None or self._inotify not in ready:
+            return None
+        sleep(SETTLE_S)
+        buf = bytearray()
+        try:
+            while True:
+                buf += os.read(self._inotify, 65536)
+        except BlockingIOError:
+            pass
+        return {name for name in _event_names(buf) if name.startswith(LINUX_PREFIXES)}
+
+    def _scan_all(self, reprobe: bool) -> dict:
+        if not self._linux:
+            try:
+                return {info.device: info for info in list_ports.comports()}
+            except Exception:
+                return dict(self._ports)
+        try:
+            present = {name for name in os.listdir(DEV_DIR) if name.startswith(LINUX_PREFIXES)}
+        except OSError:
+            return dict(self._ports)
+        if reprobe:
+            self._hidden.clear()
+            return self._probe(present, {})
+        known = {os.path.basename(d) for d in self._ports} | self._hidden
+        return self._scan_names(present ^ known)
+
+    def _scan_names(self, names) -> dict:
+        """The cached ports with just `names` (entries of /dev) probed again."""
+        ports = {dev: info for dev, info in self._ports.items() if os.path.basename(dev) not in names}
+        self._hidden.difference_update(names)
+        return self._probe({name for name in names if os.path.exists(os.path.join(DEV_DIR, name))}, ports)
+
+    def _probe(self, names, ports) -> dict:
+        from serial.tools.list_ports_linux import SysFS
+        for name in names:
+            device = os.path.join(DEV_DIR, name)
+            try:
+                info = SysFS(device)
+            except Exception:
+                continue
+            if info.subsystem == 'platform':
+                # Built-in UART that is not actually there, as comports() hides it
+                self._hidden.add(name)
+            else:
+                ports[device] = info
+        return ports
+
+    def _publish(self, ports):
+        old = self._ports
+        added = [info for dev, info in ports.items() if old.get(dev) is not info]
+        removed = [info for dev, info in old.items() if ports.get(dev) is not info]
+        with self._cond:
+            self._ports = ports
+            self._scanned = True
+            self.generation += 1
+            self._cond.notify_all()
+        if added or removed:
+            for fn in list(self._listeners):
+                try:
+                    fn(added, removed)
+                except Exception:
+                    pass
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> PortRegistry:
+    """The process-wide port registry, created (and its first scan started) on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PortRegistry()
+        return _registry
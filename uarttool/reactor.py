@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import os
+import selectors
+import threading
+from collections import deque
+
+# How often a paused handler (its consumer was full) is offered another go
+RETRY_S = 0.01
+
+
+class Reactor:
+    """
+    One thread watching every open port's file descriptor with selectors
+    (epoll on Linux) instead of one polling reader thread per port.
+
+    add(fd, callback) calls callback() from the reactor thread whenever fd is
+    readable. A callback returning True pauses its fd: the reactor stops
+    watching it and calls it again every RETRY_S until it returns False, so a
+    full consumer pushes back onto the port without blocking the other ports.
+    If the callback raises, the fd is removed and on_error(exc) is called.
+    Registration changes are queued to the reactor thread, so the selector is
+    only ever touched from there.
+    """
+
+    def __init__(self):
+        self._sel = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._handlers = {}  # fd -> (callback, on_error)
+        self._paused = set()
+        self._cmds = deque()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, fd: int, callback, on_error=None):
+        self._call(self._add, fd, callback, on_error)
+
+    def remove(self, fd: int):
+        """Stop watching fd; returns once the reactor no longer touches it."""
+        if threading.current_thread() is self._thread:
+            self._remove(fd)
+        else:
+            self._call(self._remove, fd, wait=True)
+
+    def _call(self, fn, *args, wait=False):
+        done = threading.Event() if wait else None
+        with self._lock:
+            self._cmds.append((fn, args, done))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="uart-reactor")
+                self._thread.start()
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass  # a wakeup is already pending
+        if done is not None:
+            done.wait(1.0)
+
+    def _add(self, fd, callback, on_error):
+        self._remove(fd)
+        self._handlers[fd] = (callback, on_error)
+        self._sel.register(fd, selectors.EVENT_READ, fd)
+
+    def _remove(self, fd):
+        if self._handlers.pop(fd, None) is None:
+            return
+        if fd in self._paused:
+            self._paused.discard(fd)
+        else:
+            try:
+                self._sel.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+
+    def _run_cmds(self):
+        try:
+            while True:
+                os.read(self._wake_r, 4096)
+        except BlockingIOError:
+            pass
+        while self._cmds:
+            fn, args, done = self._cmds.popleft()
+            try:
+                fn(*args)
+            except Exception:
+                pass
+            if done is not None:
+                done.set()
+
+    def _dispatch(self, fd):
+        handler = self._handlers.get(fd)
+        if handler is None:
+            return
+        callback, on_error = handler
+        try:
+            pause = callback()
+        except Exception as e:
+            self._remove(fd)
+            if on_error is not None:
+                try:
+                    on_error(e)
+                except Exception:
+                    pass
+            return
+        if fd not in self._handlers:
+            return  # removed by its own callback
+        if pause and fd not in self._paused:
+            self._sel.unregister(fd)
+            self._paused.add(fd)
+        elif not pause and fd in self._paused:
+            self._paused.discard(fd)
+            self._sel.register(fd, selectors.EVENT_READ, fd)
+
+    def _run(self):
+        select = self._sel.select
+        while True:
+            events = select(RETRY_S if self._paused else None)
+            for key, _mask in events:
+                if key.data is None:
+                    self._run_cmds()
+                else:
+                    self._dispatch(key.data)
+            for fd in list(self._paused):
+                self._dispatch(fd)
+
+
+_reactor = None
+_reactor_lock = threading.Lock()
+
+
+def get_reactor() -> Reactor:
+    """The process-wide reactor, created on first use."""
+    global _reactor
+    with _reactor_lock:
+        if _reactor is None:
+            _reactor = Reactor()
+        return _reactor
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import os
+from time import monotonic_ns
+
+from uarttool.bytequeue import DEFAULT_QUEUE_BYTES, POLICY_BLOCK
+from uarttool.capture import CaptureReader, DIR_RX, DIR_TX
+from uarttool.uart import TX_LOG_BYTES, UartController
+
+
+class ReplayController(UartController):
+    """
+    Plays a capture file back through the normal RX pipeline.
+
+    It behaves like a connected UartController whose RX thread reads records
+    from the capture instead of a port: chunks land in log_queue exactly as
+    live reads would. speed is 1.0 for original timing, N for N times faster
+    and 0 for as fast as the consumer can take it.
+    """
+
+    def __init__(self, path: str, speed=1.0, hex_mode=False, print_str=False, port=None, include_tx=False,
+                 start_ts=None, queue_bytes=DEFAULT_QUEUE_BYTES, queue_policy=POLICY_BLOCK):
+        self.path = path
+        self.speed = speed
+        self.replay_port = port
+        self.include_tx = include_tx
+        self.replay_start_ts = start_ts
+        self.reader = CaptureReader(path)
+        super().__init__(port=path, baudrate=0, hex_mode=hex_mode, print_str=print_str, queue_bytes=queue_bytes,
+                         queue_policy=queue_policy)
+        self.port = 'replay:{}'.format(os.path.basename(path))
+        # Chunks keep their recorded times, so they map to the capture's clock
+        self.clock_offset_ns = self.reader.wall_ns - self.reader.mono_ns
+        self.finished = False
+        if speed <= 0:
+            # As fast as possible: a slow consumer throttles the replay
+            # instead of losing records.
+            self.log_queue.set_limits(policy=POLICY_BLOCK)
+
+    def _open_serial(self, port, baudrate, timeout, write_timeout):
+        return None
+
+    def send_cmd(self, cmd: bytes, block=True):
+        # Nothing to talk to; TX typed during a replay is dropped.
+        return
+
+    def read_ser_response_continuously(self):
+        queue_rx = self._queue_rx
+        wait = self.stop_event.wait
+        is_set = self.stop_event.is_set
+        speed = self.speed
+        want_port = self.replay_port
+        wanted_dirs = (DIR_RX, DIR_TX) if self.include_tx else (DIR_RX,)
+        reader = self.reader
+        if self.replay_start_ts is not None:
+            records = reader.records_from_time(self.replay_start_ts)
+        else:
+            records = reader.records()
+        first_ts = None
+        wall0 = 0
+        payload = None
+        try:
+            for _off, ts, direction, port, payload in records:
+                if is_set():
+                    break
+                if direction == DIR_TX and (want_port is None or port == want_port):
+                    self.tx_log.append((ts, bytes(payload[:TX_LOG_BYTES]), len(payload)))
+                if direction not in wanted_dirs or (want_port is not None and port != want_port):
+                    continue
+                if speed > 0:
+                    if first_ts is None:
+                        first_ts = ts
+                        wall0 = monotonic_ns()
+                    delay = wall0 + (ts - first_ts) / speed - monotonic_ns()
+                    if delay > 0 and wait(delay / 1e9):
+                        break
+                data = bytes(payload)
+                self.stats.add_rx(len(data))
+                cap = self.capture
+                if cap is not None:
+                    cap.write(direction, data, self.port)
+                queue_rx(data, ts)
+        finally:
+            # Drop the last mmap slice so the reader can unmap cleanly.
+            payload = None
+            records.close()
+            reader.close()
+        self.finished = True
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import threading
+from collections import deque
+from time import monotonic_ns, perf_counter
+
+from uarttool.latency import LatencyHistogram
+from uarttool.utils import compile_expect, convert_cmd_to_bytes
+
+# Unmatched RX kept for response matching
+MAX_RESPONSE_BUFFER = 64 * 1024
+
+
+def load_script(lines, hex_mode=True, end=b'') -> list:
+    """
+    Pre-parse command lines to bytes once. Blank lines and '#' comments are
+    skipped; in hex mode a line is '0x5a 0xa6' style tokens (commas allowed),
+    otherwise it is sent as UTF-8 text. `end` is appended to every command.
+    """
+    if isinstance(lines, str):
+        with open(lines, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    commands = []
+    for n, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if hex_mode:
+            cmd = convert_cmd_to_bytes(line.replace(',', ' ').split())
+            if cmd is None:
+                raise ValueError('line {}: not hex bytes: {}'.format(n, line))
+        else:
+            cmd = line.encode('utf-8')
+        commands.append(cmd + end)
+    return commands
+
+
+class ScriptRunner:
+    """
+    Streams pre-parsed commands to a UartController from a worker thread.
+
+    Without `expect` commands go out paced only by `delay` (seconds between
+    commands). With `expect` every RX match answers the oldest command in
+    flight; up to `window` commands may be in flight at once (1 = strict
+    request/response), and a command unanswered after `timeout` counts as a
+    timeout and frees its slot. Commands that may go out together are joined
+    into one write. The whole list runs `repeat` times.
+    """
+
+    def __init__(self, ctrl, commands, delay=0.0, expect=None, timeout=1.0, repeat=1, window=1, on_done=None):
+        self.ctrl = ctrl
+        self.commands = list(commands)
+        self.delay = max(0.0, delay)
+        self.expect = compile_expect(expect) if isinstance(expect, str) else expect
+        self.timeout = timeout
+        self.timeout_ns = int(timeout * 1e9)
+        self.repeat = max(1, repeat)
+        self.window = max(1, window)
+        self.on_done = on_done
+        self.total = len(self.commands) * self.repeat
+        self.sent = 0
+        self.answered = 0
+        self.timeouts = 0
+        self.rtt = LatencyHistogram()
+        self.started = None
+        self.finished = None
+        self._inflight = deque()  # send times (monotonic ns) of unanswered commands
+        self._rx = bytearray()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        # Set once the run is over (finished, stopped or failed)
+        self.done = threading.Event()
+
+    def start(self):
+        if self.expect is not None:
+            self.ctrl.rx_taps.append(self._on_rx)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="uart-script")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _on_rx(self, data):
+        # Reading thread: match responses and wake the sender.
+        now = monotonic_ns()
+        with self._cond:
+            rx = self._rx
+            rx += data
+            pos = 0
+            for m in self.expect.finditer(rx):
+                pos = m.end()
+                if self._inflight:
+                    self.rtt.add(now - self._inflight.popleft())
+                    self.answered += 1
+            if pos:
+                del rx[:pos]
+                self._cond.notify_all()
+            if len(rx) > MAX_RESPONSE_BUFFER:
+                del rx[:len(rx) - MAX_RESPONSE_BUFFER // 2]
+
+    def _expire(self, now):
+        inflight = self._inflight
+        while inflight and now - inflight[0] >= self.timeout_ns:
+            inflight.popleft()
+            self.timeouts += 1
+
+    def _run(self):
+        send = self.ctrl.send_batch
+        commands = self.commands
+        n = len(commands)
+        expect = self.expect
+        cond = self._cond
+        self.started = perf_counter()
+        i = 0
+        try:
+            while i < self.total and not self._stop.is_set():
+                # Commands to put in the next write
+                k = 1 if self.delay else min(self.total - i, 64)
+                if expect is not None:
+                    with cond:
+                        while True:
+                            now = monotonic_ns()
+                            self._expire(now)
+                            free = self.window - len(self._inflight)
+                            if free > 0 or self._stop.is_set():
+                                break
+                            cond.wait((self._inflight[0] + self.timeout_ns - now) / 1e9)
+                    k = min(k, free)
+                if k <= 0:
+                    break
+                batch = [commands[(i + j) % n] for j in range(k)]
+                if expect is not None:
+                    with cond:
+                        self._inflight.extend([monotonic_ns()] * k)
+                send(batch)
+                i += k
+                self.sent = i
+                if self.delay and self._stop.wait(self.delay):
+                    break
+            # Sends only queue the commands: the run ends once the port took them
+            while not self.ctrl.drain_tx(0.2) and not self._stop.is_set():
+                pass
+            if expect is not None:
+                # Give the last commands their chance to be answered
+                with cond:
+                    while self._inflight and not self._stop.is_set():
+                        now = monotonic_ns()
+                        self._expire(now)
+                        if self._inflight:
+                            cond.wait((self._inflight[0] + self.timeout_ns - now) / 1e9)
+        finally:
+            self.finished = perf_counter()
+            if expect is not None:
+                try:
+                    self.ctrl.rx_taps.remove(self._on_rx)
+                except ValueError:
+                    pass
+            self.done.set()
+            if self.on_done is not None:
+                try:
+                    self.on_done(self)
+                except Exception:
+                    pass
+
+    def report(self) -> dict:
+        end = self.finished or perf_counter()
+        elapsed = max(end - (self.started or end), 1e-9)
+        rtt = self.rtt.summary()
+        return {
+            'total': self.total,
+            'sent': self.sent,
+            'answered': self.answered,
+            'timeouts': self.timeouts,
+            'elapsed_s': elapsed,
+            'commands_per_s': self.sent / elapsed,
+            'rtt_ms': {
+                'p50': rtt['p50_ms'],
+                'p90': rtt['p90_ms'],
+                'p99': rtt['p99_ms'],
+                'max': rtt['max_ms'],
+            },
+        }
+
+    def format_report(self) -> str:
+        r = self.report()
+        line = 'script: sent {}/{} in {:.2f}s ({:.1f} cmd/s)'.format(
+            r['sent'], r['total'], r['elapsed_s'], r['commands_per_s'])
+        if self.expect is not None:
+            rtt = r['rtt_ms']
+            line += ', answered {}, timeouts {}, rtt p50 {} p99 {} max {} ms'.format(
+                r['answered'], r['timeouts'], rtt['p50'], rtt['p99'], rtt['max'])
+        return line
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+# TX times kept for 'since last TX' lookups
+MAX_TX_TIMES = 100000
+# Longest stored line; a stream that never sends a newline is broken here
+MAX_LINE_CHARS = 16384
+# Bytes one styled run takes: its start line plus four more int64 fields
+RUN_BYTES = 40
+
+
+def break_long_lines(text, styles, times, col, limit=MAX_LINE_CHARS):
+    """
+    Insert newlines into `text` (and its `styles` runs) so that no line, the
+    open one already `col` chars long included, grows past `limit`. `times`
+    (see line_start_times) gets a 0 for each forced line. Returns (text,
+    styles, times); unchanged when nothing is too long.
+    """
+    if col + len(text) <= limit:
+        return text, styles, times
+    breaks = []  # offsets in text that start a forced line
+    forced = []  # per newline in order (up to the last break): True if forced
+    pos = 0
+    n = len(text)
+    while True:
+        room = limit - col
+        if n - pos <= room:
+            break
+        nl = text.find("\n", pos, pos + room + 1)
+        if nl != -1:
+            forced.append(False)
+            pos = nl + 1
+        else:
+            pos += room
+            breaks.append(pos)
+            forced.append(True)
+        col = 0
+    if not breaks:
+        return text, styles, times
+    text = _insert_newlines(text, breaks)
+    if styles:
+        out = []
+        off = 0
+        i = 0
+        for seg, tag in styles:
+            end = off + len(seg)
+            inside = []
+            while i < len(breaks) and breaks[i] < end:
+                inside.append(breaks[i] - off)
+                i += 1
+            out.append((_insert_newlines(seg, inside) if inside else seg, tag))
+            off = end
+        styles = out
+    if times:
+        rest = iter(times[1:])
+        new_times = [times[0]]
+        for is_forced in forced:
+            new_times.append(0 if is_forced else next(rest, 0))
+        new_times.extend(rest)
+        times = new_times
+    return text, styles, times
+
+
+def _insert_newlines(s, offsets):
+    parts = []
+    last = 0
+    for k in offsets:
+        parts.append(s[last:k])
+        last = k
+    parts.append(s[last:])
+    return "\n".join(parts)
+
+
+def line_start_times(data, sizes, times) -> list:
+    """
+    Line timestamps for Scrollback.append(): `data` (str or bytes) is made of
+    pieces of the given sizes, each read at the matching time. Returns the
+    first piece's time (for the line already open) and, per newline, the time
+    of the piece holding the next line's first character, or 0 when nothing of
+    that line has arrived yet.
+    """
+    if not times:
+        return None
+    out = [times[0]]
+    nl = "\n" if isinstance(data, str) else b"\n"
+    n = len(data)
+    i = 0
+    end = sizes[0]
+    pos = data.find(nl)
+    while pos != -1:
+        start = pos + 1
+        if start >= n:
+            out.append(0)
+            break
+        while end <= start:
+            i += 1
+            end += sizes[i]
+        out.append(times[i])
+        pos = data.find(nl, start)
+    return out
+
+
+def times_at(offsets, sizes, times) -> list:
+    """
+    Read time of the byte at each offset into pieces of the given sizes: 0
+    past the end (not arrived yet), the first piece's time before the start.
+    """
+    ends = list(accumulate(sizes))
+    total = ends[-1] if ends else 0
+    out = []
+    for off in offsets:
+        if off >= total:
+            out.append(0)
+        elif off < 0:
+            out.append(times[0])
+        else:
+            out.append(times[bisect_right(ends, off)])
+    return out
+
+
+class Scrollback:
+    """
+    Line store behind the RX pane.
+
+    Finished lines are packed into blocks of BLOCK_LINES lines (one str plus an
+    offset array), so a long history costs little more than its text. Line
+    numbers are absolute: they keep counting when old blocks are dropped to
+    honour max_lines / max_bytes. The last line is always the unterminated one.
+
+    Styled text (ANSI colours) is kept as runs of (line, col) ranges with a tag
+    id in flat arrays, so a re-rendered window can be re-tagged cheaply. Runs
+    count RUN_BYTES each towards max_bytes.
+
+    Every line also has the wall-clock time (ns) its first byte was read, 0 if
+    unknown, and TX writes (time and a short rendering) are kept alongside, so
+    timestamps can be shown or hidden for any part of the history without
+    touching the text, and the history can be merged with other ports' by time.
+
+    No line is longer than MAX_LINE_CHARS: longer ones are broken (see
+    break_long_lines), so even a stream without newlines stays within max_bytes.
+    """
+
+    BLOCK_LINES = 1024
+
+    def __init__(self, max_lines=2000000, max_bytes=256 * 1024 * 1024):
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        self._blocks = []  # [(text, offsets)], each holding BLOCK_LINES lines
+        self._tail = []  # finished lines not packed yet
+        self._partial = []  # pieces of the unterminated last line
+        self._partial_len = 0
+        self.first_line = 0
+        self.nbytes = 0
+        self._run_starts = array("q")  # start line of each styled run
+        self._runs = array("q")  # start col, end line, end col, tag id per run
+        self._tag_ids = {}
+        self.tag_names = []
+        self._line_ts = array("q", [0])  # one per line, the partial one included
+        self._tx_ts = array("q")
+        self._tx_text = []
+
+    @property
+    def end_line(self) -> int:
+        """Absolute index one past the last line (the partial line counts)."""
+        return self.first_line + len(self._blocks) * self.BLOCK_LINES + len(self._tail) + 1
+
+    @property
+    def partial(self) -> str:
+        parts = self._partial
+        if len(parts) > 1:
+            parts[:] = ["".join(parts)]
+        return parts[0] if parts else ""
+
+    def append(self, text: str, styles=None, times=None):
+        """
+        Append text; `styles` optionally splits it into [(text, tag or None)]
+        runs. `times` (see line_start_times) stamps the lines it starts.
+        Returns (text, styles) as stored, with any forced line breaks.
+        """
+        if not text:
+            return text, styles
+        text, styles, times = break_long_lines(text, styles, times, self._partial_len)
+        if styles:
+            self._add_runs(styles)
+        self.nbytes += len(text)
+        line_ts = self._line_ts
+        if times and not line_ts[-1]:
+            line_ts[-1] = times[0]
+        if "\n" not in text:
+            self._partial.append(text)
+            self._partial_len += len(text)
+            if self.nbytes > self.max_bytes:
+                self._trim()
+            return text, styles
+        lines = text.split("\n")
+        new = len(lines) - 1
+        if times and len(times) == new + 1:
+            line_ts.extend(times[1:])
+        else:
+            line_ts.extend([0] * new)
+        self._partial.append(lines[0])
+        lines[0] = self.partial
+        last = lines.pop()
+        self._partial = [last] if last else []
+        self._partial_len = len(last)
+        self._tail.extend(lines)
+        if len(self._tail) >= self.BLOCK_LINES:
+            self._pack()
+        self._trim()
+        return text, styles
+
+    def backspace(self, count: int) -> int:
+        """Erase up to `count` chars from the end of the partial line; returns how many."""
+        partial = self.partial
+        count = min(count, len(partial))
+        if count:
+            self._partial = [partial[:-count]]
+            self._partial_len -= count
+            self.nbytes -= count
+            self._cut_runs(self.end_line - 1, self._partial_len)
+        return count
+
+    def _cut_runs(self, line, col):
+        """Drop or shorten the styled runs that reach past (line, col)."""
+        starts = self._run_starts
+        runs = self._runs
+        while starts:
+            k = len(starts) - 1
+            if runs[4 * k + 1] < line or runs[4 * k + 2] <= col:
+                break
+            if starts[k] == line and runs[4 * k] >= col:
+                del starts[k]
+                del runs[4 * k:]
+                self.nbytes -= RUN_BYTES
+            else:
+                runs[4 * k + 2] = col
+                break
+
+    def _add_runs(self, styles):
+        line = self.end_line - 1
+        col = self._partial_len
+        starts = self._run_starts
+        runs = self._runs
+        for seg, tag in styles:
+            start_line, start_col = line, col
+            nl = seg.count("\n")
+            if nl:
+                line += nl
+                col = len(seg) - seg.rfind("\n") - 1
+            else:
+                col += len(seg)
+            if tag is None:
+                continue
+            tag_id = self._tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = self._tag_ids[tag] = len(self.tag_names)
+                self.tag_names.append(tag)
+            starts.append(start_line)
+            runs.extend((start_col, line, col, tag_id))
+            self.nbytes += RUN_BYTES
+
+    def runs_in(self, start: int, end: int):
+        """Yield (line, col, end_line, end_col, tag) for styled runs touching [start, end)."""
+        starts = self._run_starts
+        runs = self._runs
+        i = bisect_left(starts, start)
+        if i > 0 and runs[4 * (i - 1) + 1] >= start:
+            i -= 1
+        names = self.tag_names
+        while i < len(starts) and starts[i] < end:
+            k = 4 * i
+            yield starts[i], runs[k], runs[k + 1], runs[k + 2], names[runs[k + 3]]
+            i += 1
+
+    def _pack(self):
+        n = self.BLOCK_LINES
+        tail = self._tail
+        done = 0
+        while len(tail) - done >= n:
+            lines = tail[done:done + n]
+            offsets = array("L", accumulate((len(s) + 1 for s in lines), initial=0))
+            self._blocks.append(("\n".join(lines), offsets))
+            done += n
+        del tail[:done]
+
+    def _trim(self):
+        blocks = self._blocks
+        n = self.BLOCK_LINES
+        first = self.first_line
+        starts = self._run_starts
+        drop = 0
+        count = self.end_line - first
+        size = self.nbytes
+        freed = 0  # styled runs wholly within the lines dropped so far
+        while drop < len(blocks) and (count > self.max_lines or size > self.max_bytes):
+            size -= len(blocks[drop][0]) + 1
+            count -= n
+            drop += 1
+            k = self._runs_before(first + drop * n)
+            size -= (k - freed) * RUN_BYTES
+            freed = k
+        # Few but long lines never fill a block: drop unpacked ones too
+        tail = self._tail
+        lines = 0
+        if drop == len(blocks):
+            while lines < len(tail) and (count > self.max_lines or size > self.max_bytes):
+                size -= len(tail[lines]) + 1
+                count -= 1
+                lines += 1
+                k = self._runs_before(first + drop * n + lines)
+                size -= (k - freed) * RUN_BYTES
+                freed = k
+        if drop or lines:
+            dropped = drop * n + lines
+            del blocks[:drop]
+            del tail[:lines]
+            self.first_line += dropped
+            del self._line_ts[:dropped]
+            del starts[:freed]
+            del self._runs[:4 * freed]
+            self.nbytes = size
+
+    def _runs_before(self, line) -> int:
+        """Number of leading styled runs that end before `line`."""
+        i = bisect_left(self._run_starts, line)
+        if i > 0 and self._runs[4 * (i - 1) + 1] >= line:
+            # Still reaches into `line`
+            i -= 1
+        return i
+
+    def set_limits(self, max_lines=None, max_bytes=None):
+        if max_lines:
+            self.max_lines = max_lines
+        if max_bytes:
+            self.max_bytes = max_bytes
+        self._trim()
+
+    def line_time(self, index: int) -> int:
+        """Wall-clock ns of the line's first byte; 0 if unknown or out of range."""
+        i = index - self.first_line
+        line_ts = self._line_ts
+        return line_ts[i] if 0 <= i < len(line_ts) else 0
+
+    def line_times(self, start: int, end: int) -> array:
+        """Copy of the times of lines [start, end) (from first_line on), for another thread."""
+        first = self.first_line
+        return self._line_ts[max(0, start - first):max(0, end - first)]
+
+    def tx_times(self) -> array:
+        return self._tx_ts[:]
+
+    def add_tx_time(self, ts: int, text=""):
+        tx = self._tx_ts
+        if tx and ts < tx[-1]:
+            return
+        tx.append(ts)
+        self._tx_text.append(text)
+        if len(tx) > MAX_TX_TIMES:
+            drop = len(tx) - MAX_TX_TIMES // 2
+            del tx[:drop]
+            del self._tx_text[:drop]
+
+    def tx_before(self, ts: int) -> int:
+        """Latest TX time at or before `ts`; 0 if there is none."""
+        tx = self._tx_ts
+        i = bisect_right(tx, ts)
+        return tx[i - 1] if i else 0
+
+    def _time_or_before(self, i: int) -> int:
+        """Time of stored line i, or of the nearest earlier line that has one."""
+        line_ts = self._line_ts
+        # Untimed lines come in short runs; give up on a long one
+        stop = max(-1, i - 4096)
+        while i > stop:
+            if line_ts[i]:
+                return line_ts[i]
+            i -= 1
+        return 0
+
+    def line_at_time(self, ts: int) -> int:
+        """Absolute index of the first line read at or after `ts` (end_line if none)."""
+        lo, hi = 0, len(self._line_ts)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._time_or_before(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self.first_line + lo
+
+    def _shown_end(self) -> int:
+        # An empty last line has nothing to show yet
+        return self.end_line if self.partial else self.end_line - 1
+
+    def _timed_lines(self, start: int, end: int) -> list:
+        end = min(end, self._shown_end())
+        out = []
+        i = start - self.first_line
+        ts = self._time_or_before(i - 1) if i > 0 else 0
+        line_ts = self._line_ts
+        for lines in self.iter_blocks(start, end):
+            for line in lines:
+                ts = line_ts[i] or ts
+                out.append((ts, line))
+                i += 1
+        return out
+
+    def lines_from(self, ts: int, limit: int) -> list:
+        """(time, text) of up to `limit` lines read at or after `ts`; untimed lines take the previous time."""
+        start = self.line_at_time(ts)
+        return self._timed_lines(start, start + limit)
+
+    def lines_preceding(self, ts: int, limit: int) -> list:
+        """(time, text) of up to `limit` lines read before `ts`, oldest first."""
+        end = min(self.line_at_time(ts), self._shown_end())
+        return self._timed_lines(max(self.first_line, end - limit), end)
+
+    def tx_from(self, ts: int, limit: int) -> list:
+        """(time, text) of up to `limit` TX writes at or after `ts`."""
+        i = bisect_left(self._tx_ts, ts)
+        return list(zip(self._tx_ts[i:i + limit], self._tx_text[i:i + limit]))
+
+    def tx_preceding(self, ts: int, limit: int) -> list:
+        """(time, text) of up to `limit` TX writes before `ts`, oldest first."""
+        i = bisect_left(self._tx_ts, ts)
+        j = max(0, i - limit)
+        return list(zip(self._tx_ts[j:i], self._tx_text[j:i]))
+
+    def snapshot(self, start: int, end: int) -> list:
+        """
+        (first line, text, offsets) pieces covering lines [start, end) of the
+        finished lines, for scanning on another thread: packed blocks are
+        shared as they are (they never change), unpacked lines are joined into
+        a new piece. A piece may begin before `start`.
+        """
+        n = self.BLOCK_LINES
+        first = self.first_line
+        start = max(start, first)
+        end = min(end, self.end_line - 1)
+        out = []
+        if start >= end:
+            return out
+        blocks = self._blocks
+        b = (start - first) // n
+        while b < len(blocks) and first + b * n < end:
+            text, offs = blocks[b]
+            out.append((first + b * n, text, offs))
+            b += 1
+        tail_first = first + len(blocks) * n
+        if end > tail_first:
+            lines = self._tail[max(0, start - tail_first):end - tail_first]
+            if lines:
+                offs = array("L", accumulate((len(s) + 1 for s in lines), initial=0))
+                out.append((max(start, tail_first), "\n".join(lines), offs))
+        return out
+
+    def get_line(self, index: int) -> str:
+        for lines in self.iter_blocks(index, index + 1):
+            return lines[0]
+        raise IndexError(index)
+
+    def get_lines(self, start: int, end: int) -> list:
+        out = []
+        for lines in self.iter_blocks(start, end):
+            out.extend(lines)
+        return out
+
+    def text(self, start: int, end: int) -> str:
+        return "\n".join(self.get_lines(start, end))
+
+    def iter_blocks(self, start=None, end=None):
+        """Yield lists of consecutive lines in [start, end), one block at a time."""
+        n = self.BLOCK_LINES
+        first = self.first_line
+        start = first if start is None else max(first, start)
+        end = self.end_line if end is None else min(self.end_line, end)
+        if start >= end:
+            return
+        i, stop = start - first, end - first
+        packed = len(self._blocks) * n
+        while i < stop and i < packed:
+            b, k = divmod(i, n)
+            k_end = min(n, k + (stop - i))
+            text, offs = self._blocks[b]
+            yield text[offs[k]:offs[k_end] - 1].split("\n")
+            i += k_end - k
+        if i < stop:
+            rest = self._tail + [self.partial]
+            yield rest[i - packed:stop - packed]
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+import queue
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from time import sleep
+
+
+class RxSearch:
+    """
+    Incremental line search over a Scrollback.
+
+    feed() (Tk thread) hands the finished lines not searched yet to a worker
+    thread as an immutable snapshot of scrollback blocks; the worker runs the
+    pattern over each block's text in one go and records the absolute line
+    number of every matching line in `results`, in order. Each line is
+    scanned once: later feeds only cover lines finished since the previous
+    one, and the unterminated last line waits until it is complete. Matches
+    in lines the scrollback has trimmed are dropped from `results` on the
+    next feed(), so a search on a live port stays as bounded as the history.
+    """
+
+    def __init__(self, pattern: str, regex=False, ignore_case=False):
+        if not pattern:
+            raise ValueError('empty search pattern')
+        flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+        self.pattern = pattern
+        self.regex = re.compile(pattern if regex else re.escape(pattern), flags)
+        self.results = array('q')
+        self.scanned_lines = 0
+        self._next_line = 0  # first finished line not handed to the worker yet
+        self._jobs = queue.Queue()
+        self._cancelled = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name='rx-search')
+        self._thread.start()
+
+    def feed(self, scrollback):
+        first = scrollback.first_line
+        results = self.results
+        if results and results[0] < first:
+            # Readers are on this (Tk) thread and the worker only appends,
+            # so the front can go without a lock
+            del results[:bisect_left(results, first)]
+        end = scrollback.end_line - 1
+        start = max(self._next_line, first)
+        if end <= start:
+            return
+        self._jobs.put((scrollback.snapshot(start, end), start))
+        self._next_line = end
+
+    def cancel(self):
+        self._cancelled = True
+        self._jobs.put(None)
+
+    @property
+    def busy(self) -> bool:
+        return self._jobs.unfinished_tasks > 0
+
+    def next_after(self, line: int):
+        results = self.results
+        i = bisect_right(results, line)
+        return results[i] if i < len(results) else None
+
+    def prev_before(self, line: int):
+        results = self.results
+        i = bisect_left(results, line)
+        return results[i - 1] if i else None
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None or self._cancelled:
+                return
+            pieces, start = job
+            for first, text, offsets in pieces:
+                if self._cancelled:
+                    return
+                self._scan(first, text, offsets, start)
+                # Let the Tk thread run between blocks
+                sleep(0)
+            self._jobs.task_done()
+
+    def _scan(self, first, text, offsets, start):
+        search = self.regex.search
+        append = self.results.append
+        nlines = len(offsets) - 1
+        k = max(0, start - first)
+        pos = offsets[k] if k < nlines else len(text) + 1
+        end = len(text)
+        while pos <= end:
+            m = search(text, pos)
+            if m is None:
+                break
+            k = bisect_right(offsets, m.start()) - 1
+            append(first + k)
+            pos = offsets[k + 1]
+        self.scanned_lines += nlines - max(0, start - first)
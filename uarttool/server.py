@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Share an open port over TCP or a Unix socket.
+
+PortServer hooks a UartController's rx_taps: each RX chunk is copied once
+into a shared ring buffer however many clients are connected, so the reading
+thread pays the same for fifty subscribers as for one. A single selector
+thread sends every client the ring from its own cursor. A client may fall at
+most `client_bytes` behind; past that its policy applies: POLICY_DROP_OLDEST
+skips it forward to the newest `client_bytes` (counted in its dropped bytes),
+POLICY_DISCONNECT closes it. Either way the reader and the other clients
+carry on. Bytes sent by clients go to the controller's TX queue in arrival
+order; a client is not read while that queue is full.
+"""
+
+import os
+import queue
+import selectors
+import socket
+import threading
+
+from uarttool.bytequeue import POLICY_DROP_OLDEST
+from uarttool.stats import format_size
+
+POLICY_DISCONNECT = 'disconnect'
+SERVER_POLICIES = (POLICY_DROP_OLDEST, POLICY_DISCONNECT)
+
+DEFAULT_CLIENT_BYTES = 1024 * 1024
+# Most bytes handed to one send() call
+MAX_SEND = 256 * 1024
+RECV_BYTES = 4096
+# Select timeout while some client waits for room in the TX queue
+RETRY_S = 0.05
+
+
+def parse_address(address: str):
+    """'unix:/path' -> (AF_UNIX, path); 'host:port', ':port' or 'port' -> (AF_INET, (host, port))."""
+    address = address.strip()
+    if address.startswith('unix:'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix sockets are not supported here')
+        return socket.AF_UNIX, address[5:]
+    host, _sep, port = address.rpartition(':')
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError('bad server address {!r} (use HOST:PORT or unix:PATH)'.format(address))
+    return socket.AF_INET, (host or '127.0.0.1', port)
+
+
+class _Client:
+    __slots__ = ('sock', 'name', 'cursor', 'sent', 'dropped', 'want_write', 'tx_pending')
+
+    def __init__(self, sock, name, cursor):
+        self.sock = sock
+        self.name = name
+        self.cursor = cursor  # absolute ring position of the next byte to send
+        self.sent = 0
+        self.dropped = 0
+        self.want_write = False
+        self.tx_pending = None  # data read while the TX queue was full
+
+
+class PortServer:
+    def __init__(self, ctrl, address: str, client_bytes=DEFAULT_CLIENT_BYTES, policy=POLICY_DROP_OLDEST):
+        if policy not in SERVER_POLICIES:
+            raise ValueError('unknown client policy {}'.format(policy))
+        self.ctrl = ctrl
+        self.address = address
+        self.client_bytes = client_bytes
+        self.policy = policy
+        self.clients = {}  # fd -> _Client
+        self.accepted = 0
+        self.dropped_bytes = 0
+        self.disconnected = 0
+        self.tx_bytes = 0
+        # Room for the allowed lag, one send in flight and new data arriving meanwhile
+        self._size = 2 * client_bytes + MAX_SEND
+        self._ring = bytearray(self._size)
+        self._view = memoryview(self._ring)
+        self._end = 0  # absolute position one past the newest RX byte
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._wake_pending = False
+        self._tx_blocked = []
+        family, addr = parse_address(address)
+        self._unix_path = addr if family == socket.AF_UNIX else None
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.remove(self._unix_path)
+        self._listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(addr)
+        self._listener.listen(16)
+        self._listener.setblocking(False)
+        if family != socket.AF_UNIX:
+            self.address = '{}:{}'.format(*self._listener.getsockname()[:2])
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._sel = selectors.DefaultSelector()
+        self._sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._sel.register(self._listener, selectors.EVENT_READ, self._listener)
+        ctrl.rx_taps.append(self._on_rx)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='uart-server')
+        self._thread.start()
+
+    # Reading thread
+
+    def _on_rx(self, data):
+        n = len(data)
+        size = self._size
+        with self._lock:
+            if n > size:
+                self._end += n - size
+                data = data[n - size:]
+                n = size
+            pos = self._end % size
+            first = min(n, size - pos)
+            self._ring[pos:pos + first] = data[:first]
+            if first < n:
+                self._ring[:n - first] = data[first:]
+            self._end += n
+        if self.clients:
+            self._wake()
+
+    def _wake(self):
+        if self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            os.write(self._wake_w, b'\0')
+        except BlockingIOError:
+            pass
+
+    # Server thread
+
+    def _run(self):
+        sel = self._sel
+        try:
+            while not self._stopped:
+                events = sel.select(RETRY_S if self._tx_blocked else None)
+                for key, mask in events:
+                    data = key.data
+                    if data is None:
+                        self._drain_wake()
+                        for client in list(self.clients.values()):
+                            if not client.want_write:
+                                self._send(client)
+                            elif self._end - client.cursor > self.client_bytes:
+                                # Stuck on a full socket: its policy still applies
+                                self._overflow(client, self._end - client.cursor)
+                    elif data is self._listener:
+                        self._accept()
+                    elif data.sock.fileno() in self.clients:
+                        if mask & selectors.EVENT_WRITE:
+                            self._send(data)
+                        if mask & selectors.EVENT_READ and data.sock.fileno() in self.clients:
+                            self._recv(data)
+                if self._tx_blocked:
+                    self._retry_tx()
+        finally:
+            for client in list(self.clients.values()):
+                self._close_client(client)
+            sel.close()
+
+    def _drain_wake(self):
+        try:
+            while os.read(self._wake_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        # Only now: a _wake() before this line finds the flag set and writes
+        # nothing, but its data is in the ring and the caller sends it next.
+        self._wake_pending = False
+
+    def _accept(self):
+        try:
+            sock, peer = self._listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        sock.setblocking(False)
+        # Keep the kernel from hiding megabytes of lag behind client_bytes
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, min(MAX_SEND, self.client_bytes))
+        if sock.family != getattr(socket, 'AF_UNIX', None):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        name = '{}:{}'.format(*peer[:2]) if isinstance(peer, tuple) else 'unix#{}'.format(self.accepted + 1)
+        client = _Client(sock, name, self._end)
+        self.clients[sock.fileno()] = client
+        self.accepted += 1
+        self._sel.register(sock, selectors.EVENT_READ, client)
+
+    def _close_client(self, client):
+        self.clients.pop(client.sock.fileno(), None)
+        if client in self._tx_blocked:
+            self._tx_blocked.remove(client)
+        try:
+            self._sel.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        try:
+            client.sock.close()
+        except OSError:
+            pass
+
+    def _overflow(self, client, lag) -> bool:
+        """Apply the client policy once it lags by `lag` bytes; False if it was closed."""
+        if self.policy == POLICY_DISCONNECT:
+            self.disconnected += 1
+            self._close_client(client)
+            return False
+        skip = lag - self.client_bytes
+        client.cursor += skip
+        client.dropped += skip
+        self.dropped_bytes += skip
+        return True
+
+    def _send(self, client):
+        size = self._size
+        view = self._view
+        sock = client.sock
+        blocked = False
+        while True:
+            lag = self._end - client.cursor
+            if lag > self.client_bytes and not self._overflow(client, lag):
+                return
+            lag = min(lag, self.client_bytes)
+            if lag <= 0:
+                break
+            pos = client.cursor % size
+            k = min(lag, size - pos, MAX_SEND)
+            try:
+                n = sock.send(view[pos:pos + k])
+            except BlockingIOError:
+                n = 0
+            except OSError:
+                self._close_client(client)
+                return
+            if self._end - client.cursor > size:
+                # Overwritten while it was being sent: the bytes are suspect
+                if not self._overflow(client, self._end - client.cursor):
+                    return
+                continue
+            client.cursor += n
+            client.sent += n
+            if n < k:
+                blocked = True
+                break
+        if blocked != client.want_write:
+            client.want_write = blocked
+            self._update_events(client)
+
+    def _update_events(self, client):
+        events = 0 if client.tx_pending is not None else selectors.EVENT_READ
+        if client.want_write:
+            events |= selectors.EVENT_WRITE
+        try:
+            if events:
+                self._sel.modify(client.sock, events, client)
+            else:
+                self._sel.unregister(client.sock)
+        except KeyError:
+            if events:
+                self._sel.register(client.sock, events, client)
+
+    def _recv(self, client):
+        try:
+            data = client.sock.recv(RECV_BYTES)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._close_client(client)
+            return
+        if not self._queue_tx(data):
+            # Port is behind: stop reading this client until there is room
+            client.tx_pending = data
+            self._tx_blocked.append(client)
+            self._update_events(client)
+
+    def _queue_tx(self, data) -> bool:
+        try:
+            self.ctrl.send_batch((data,), block=False)
+        except queue.Full:
+            return False
+        except RuntimeError:
+            return True  # port closed: nothing to write it to
+        self.tx_bytes += len(data)
+        return True
+
+    def _retry_tx(self):
+        for client in list(self._tx_blocked):
+            if not self._queue_tx(client.tx_pending):
+                break
+            client.tx_pending = None
+            self._tx_blocked.remove(client)
+            self._update_events(client)
+
+    def close(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        try:
+            self.ctrl.rx_taps.remove(self._on_rx)
+        except ValueError:
+            pass
+        self._wake()
+        self._thread.join(1.0)
+        self._listener.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        if self._unix_path:
+            try:
+                os.remove(self._unix_path)
+            except OSError:
+                pass
+
+    def format_summary(self) -> str:
+        line = 'serve {} clients {}'.format(self.address, len(self.clients))
+        if self.dropped_bytes:
+            line += ' dropped {}'.format(format_size(self.dropped_bytes))
+        if self.disconnected:
+            line += ' kicked {}'.format(self.disconnected)
+        return line
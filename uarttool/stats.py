@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+from time import monotonic_ns
+
+
+class PortStats:
+    """
+    Live counters for one port.
+
+    The RX/TX paths only bump plain integer attributes; everything derived
+    (rates, averages, maxima over an interval) is worked out in snapshot(),
+    which the GUI calls about once a second. Maxima are reset by each
+    snapshot, so they describe the interval since the previous one.
+    """
+
+    def __init__(self):
+        self.rx_bytes = 0
+        self.rx_chunks = 0
+        self.rx_chunk_max = 0
+        self.tx_bytes = 0
+        self.tx_writes = 0
+        self.flushes = 0
+        self.flush_ns = 0
+        self.flush_ns_max = 0
+        self.lag_ns = 0
+        self.lag_ns_max = 0
+        self._prev = (monotonic_ns(), 0, 0, 0, 0, 0)
+
+    def add_rx(self, n: int):
+        self.rx_bytes += n
+        self.rx_chunks += 1
+        if n > self.rx_chunk_max:
+            self.rx_chunk_max = n
+
+    def record_flush(self, flush_ns: int, lag_ns: int):
+        """One GUI flush: time spent formatting/inserting and read-to-insert lag."""
+        self.flushes += 1
+        self.flush_ns += flush_ns
+        if flush_ns > self.flush_ns_max:
+            self.flush_ns_max = flush_ns
+        self.lag_ns = lag_ns
+        if lag_ns > self.lag_ns_max:
+            self.lag_ns_max = lag_ns
+
+    def snapshot(self, log_queue=None) -> dict:
+        now = monotonic_ns()
+        ts, rx_bytes, tx_bytes, rx_chunks, flushes, flush_ns = self._prev
+        dt = max(now - ts, 1) / 1e9
+        d_chunks = self.rx_chunks - rx_chunks
+        d_flushes = self.flushes - flushes
+        snap = {
+            'rx_bytes': self.rx_bytes,
+            'tx_bytes': self.tx_bytes,
+            'rx_bytes_per_s': (self.rx_bytes - rx_bytes) / dt,
+            'tx_bytes_per_s': (self.tx_bytes - tx_bytes) / dt,
+            'rx_chunks': self.rx_chunks,
+            'chunk_avg': (self.rx_bytes - rx_bytes) / d_chunks if d_chunks else 0,
+            'chunk_max': self.rx_chunk_max,
+            'flushes': self.flushes,
+            'flush_ms_avg': (self.flush_ns - flush_ns) / d_flushes / 1e6 if d_flushes else 0.0,
+            'flush_ms_max': self.flush_ns_max / 1e6,
+            'lag_ms': self.lag_ns / 1e6,
+            'lag_ms_max': self.lag_ns_max / 1e6,
+        }
+        if log_queue is not None:
+            snap['queue_chunks'] = log_queue.qsize()
+            snap['queue_bytes'] = log_queue.nbytes
+            snap['dropped_bytes'] = log_queue.dropped_bytes
+            snap['dropped_chunks'] = log_queue.dropped_chunks
+        self._prev = (now, self.rx_bytes, self.tx_bytes, self.rx_chunks, self.flushes, self.flush_ns)
+        self.rx_chunk_max = 0
+        self.flush_ns_max = 0
+        self.lag_ns_max = 0
+        return snap
+
+
+def format_size(n) -> str:
+    if n >= 1024 * 1024:
+        return '{:.1f} MB'.format(n / (1024 * 1024))
+    if n >= 1024:
+        return '{:.1f} KB'.format(n / 1024)
+    return '{:.0f} B'.format(n)
+
+
+def format_stats(snap: dict) -> str:
+    """One-line summary of a snapshot, for the stats strip and --stats."""
+    parts = [
+        'RX {}/s'.format(format_size(snap['rx_bytes_per_s'])),
+        'TX {}/s'.format(format_size(snap['tx_bytes_per_s'])),
+        'chunk {:.0f}/{} B'.format(snap['chunk_avg'], snap['chunk_max']),
+    ]
+    if 'queue_bytes' in snap:
+        parts.append('queue {} ({})'.format(snap['queue_chunks'], format_size(snap['queue_bytes'])))
+    if snap['flushes']:
+        parts.append('flush {:.1f}/{:.1f} ms'.format(snap['flush_ms_avg'], snap['flush_ms_max']))
+        parts.append('lag {:.0f}/{:.0f} ms'.format(snap['lag_ms'], snap['lag_ms_max']))
+    if snap.get('dropped_chunks'):
+        parts.append('dropped {}'.format(format_size(snap['dropped_bytes'])))
+    return '  '.join(parts)
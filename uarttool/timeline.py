@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Time-ordered merge of several ports' histories.
+
+A source is a Scrollback: its RX lines and TX writes are each already in
+time order, so one page of the merged timeline is a streaming k-way
+heapq.merge of at most `limit` entries per stream and source. Only what is
+shown is ever read, however long the histories grow, and a page is simply
+re-read as new data arrives. Rows are (wall ns, source index, kind, text).
+"""
+
+import heapq
+from itertools import islice
+
+from uarttool.utils import parse_bytes_to_hex_str
+
+KIND_RX = 0
+KIND_TX = 1
+
+# Past every timestamp: rows_before(sources, END) is the tail of the timeline
+END = 2 ** 63 - 1
+
+
+def format_tx(head: bytes, size: int, hex_mode=False) -> str:
+    """Render the kept head of a TX write for display, marking cut-off writes."""
+    if hex_mode:
+        text = parse_bytes_to_hex_str(head)
+    else:
+        text = head.decode('utf-8', errors='replace').replace('\r', '\\r').replace('\n', '\\n')
+    if size > len(head):
+        text += ' ... ({} bytes)'.format(size)
+    return text
+
+
+def _rows(index, sb, ts, limit, before):
+    if before:
+        rx, tx = sb.lines_preceding(ts, limit), sb.tx_preceding(ts, limit)
+    else:
+        rx, tx = sb.lines_from(ts, limit), sb.tx_from(ts, limit)
+    return heapq.merge(
+        ((t, index, KIND_RX, text) for t, text in rx),
+        ((t, index, KIND_TX, text) for t, text in tx),
+    )
+
+
+def rows_from(sources, ts: int, limit: int) -> list:
+    """The first `limit` rows at or after `ts` across all sources."""
+    merged = heapq.merge(*(_rows(i, sb, ts, limit, False) for i, sb in enumerate(sources)))
+    return list(islice(merged, limit))
+
+
+def rows_before(sources, ts: int, limit: int) -> list:
+    """The last `limit` rows before `ts` across all sources, oldest first."""
+    merged = list(heapq.merge(*(_rows(i, sb, ts, limit, True) for i, sb in enumerate(sources))))
+    return merged[-limit:] if limit else []
+
+
+def time_bounds(sources):
+    """(first, last) wall ns over all sources; (0, 0) while they are empty."""
+    first = last = 0
+    for sb in sources:
+        for t, _text in sb.lines_from(0, 1) + sb.tx_from(0, 1):
+            if t and (not first or t < first):
+                first = t
+        for t, _text in sb.lines_preceding(END, 1) + sb.tx_preceding(END, 1):
+            last = max(last, t)
+    return first, last
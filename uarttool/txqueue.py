@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+Port writes from one dedicated thread.
+
+Writing (and draining) on the caller's thread froze the Tk loop for up to
+write_timeout on a slow device, and a timed-out write was lost without a
+word. A TxQueue takes each payload as a TxJob into a ByteQueue bounded by
+bytes: callers that may wait (scripts, stdin) block while the port is behind,
+the Tk thread gets queue.Full instead. One thread writes the jobs in order,
+TX_CHUNK bytes at a time, so a multi-MB file never sits in one write and can
+be cancelled between chunks. Small jobs queued together still go out as one
+write. An optional rate (bytes/s) paces the chunks for devices without flow
+control. Every job reports its progress and error; a failed or cancelled job
+does not hold up the ones behind it.
+"""
+
+import os
+import queue
+import threading
+from time import monotonic, sleep
+
+from uarttool.bytequeue import ByteQueue, POLICY_BLOCK
+
+TX_CHUNK = 4096
+TX_QUEUE_BYTES = 4 * 1024 * 1024
+# Chunks per second when rate limited, so the pacing stays smooth
+RATE_STEPS = 20
+
+
+class TxJob:
+    """One payload (bytes, or a file streamed from disk) on its way to the port."""
+
+    def __init__(self, data=None, cmds=(), path=None):
+        self.path = path
+        self.cmds = cmds  # commands in the payload, for latency stamping
+        if path is not None:
+            self._file = open(path, 'rb')
+            self.size = os.fstat(self._file.fileno()).st_size
+            self._view = None
+        else:
+            self._file = None
+            self._view = memoryview(data)
+            self.size = len(data)
+        self.sent = 0
+        self.error = None
+        self.cancelled = False
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        return self.sent / self.size if self.size else 1.0
+
+    @property
+    def small(self) -> bool:
+        return self._file is None and self.size <= TX_CHUNK
+
+    def cancel(self):
+        """Stop after the chunk being written; what was sent stays sent."""
+        self.cancelled = True
+
+    def read(self, n: int):
+        if self._file is not None:
+            return self._file.read(n)
+        return self._view[self.sent:self.sent + n]
+
+    def _finish(self, error=None):
+        if error is not None and self.error is None:
+            self.error = error
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        self.finished = monotonic()
+        self.done.set()
+
+    def format_report(self) -> str:
+        elapsed = max((self.finished or monotonic()) - (self.started or monotonic()), 1e-9)
+        line = 'tx {} of {} bytes in {:.2f}s ({:.1f} KiB/s)'.format(
+            self.sent, self.size, elapsed, self.sent / elapsed / 1024)
+        if self.error is not None:
+            line += ', failed: {}'.format(self.error)
+        elif self.cancelled:
+            line += ', cancelled'
+        return line
+
+
+class TxQueue:
+    def __init__(self, ctrl, max_bytes=TX_QUEUE_BYTES, rate=0):
+        self.ctrl = ctrl
+        self.rate = rate  # bytes/s, 0 for as fast as the port takes them
+        self.failed_jobs = 0
+        self._queue = ByteQueue(max_bytes, POLICY_BLOCK)
+        self._stopped = False
+        self._next_write = 0.0  # earliest monotonic() for the next chunk when rate limited
+        self._unfinished = 0
+        self._idle = threading.Condition()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, data, cmds=(), block=True, timeout=None) -> TxJob:
+        """Queue `data` (cmds: the commands in it); queue.Full if not block and the queue is full."""
+        return self.put_job(TxJob(data, cmds), block, timeout)
+
+    def put_file(self, path: str) -> TxJob:
+        """Stream the file at `path` to the port; the job is queued behind what is waiting."""
+        return self.put_job(TxJob(path=path), block=False)
+
+    def put_job(self, job: TxJob, block=True, timeout=None) -> TxJob:
+        if self._stopped:
+            raise RuntimeError('port closed')
+        with self._idle:
+            self._unfinished += 1
+        try:
+            # A file only holds one chunk in memory at a time
+            self._queue.put(job, block, timeout, size=job.size if job._file is None else TX_CHUNK)
+        except queue.Full:
+            self._job_done()
+            raise
+        self._ensure_thread()
+        return job
+
+    def drain(self, timeout=None) -> bool:
+        """Wait until every queued job has been written (or failed); False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._unfinished, timeout)
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._queue.nbytes
+
+    def close(self):
+        """Stop the thread; jobs still queued fail with 'port closed'."""
+        self._stopped = True
+        try:
+            jobs = self._queue.get_batch(block=False)
+        except queue.Empty:
+            jobs = []
+        for job in jobs:
+            job._finish(RuntimeError('port closed'))
+            self._job_done()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(1.0)
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name='uart-tx-queue')
+                self._thread.start()
+
+    def _job_done(self):
+        with self._idle:
+            self._unfinished -= 1
+            if not self._unfinished:
+                self._idle.notify_all()
+
+    def _run(self):
+        get_batch = self._queue.get_batch
+        while not self._stopped:
+            try:
+                jobs = get_batch(timeout=0.2, max_bytes=TX_CHUNK)
+            except queue.Empty:
+                continue
+            group = []
+            for job in jobs:
+                if job.small and not self.rate:
+                    group.append(job)
+                    continue
+                if group:
+                    self._write_group(group)
+                    group = []
+                self._write_job(job)
+            if group:
+                self._write_group(group)
+
+    def _write_group(self, jobs):
+        """Small jobs queued together: one write, as send_batch always did."""
+        now = monotonic()
+        for job in [job for job in jobs if job.cancelled]:
+            # Cancelled while queued: nothing of it goes out
+            job.started = now
+            job._finish()
+            self._job_done()
+            jobs.remove(job)
+        if not jobs:
+            return
+        for job in jobs:
+            job.started = now
+        payload = b''.join(job.read(job.size) for job in jobs)
+        cmds = [cmd for job in jobs for cmd in job.cmds]
+        try:
+            self.ctrl._write(payload, cmds, len(payload))
+        except Exception as e:
+            for job in jobs:
+                self._fail(job, e)
+            return
+        for job in jobs:
+            job.sent = job.size
+            job._finish()
+            self._job_done()
+
+    def _write_job(self, job):
+        job.started = monotonic()
+        while job.sent < job.size:
+            if job.cancelled or self._stopped:
+                break
+            rate = self.rate
+            n = TX_CHUNK if not rate else max(1, min(TX_CHUNK, int(rate / RATE_STEPS)))
+            try:
+                chunk = job.read(n)
+                if not len(chunk):
+                    break
+                if rate:
+                    self._pace(len(chunk), rate)
+                self.ctrl._write(chunk, job.cmds if job.sent == 0 else (), job.size if job.sent == 0 else 0)
+            except Exception as e:
+                self._fail(job, e)
+                return
+            job.sent += len(chunk)
+        job._finish(RuntimeError('port closed') if self._stopped and job.sent < job.size else None)
+        self._job_done()
+
+    def _pace(self, n: int, rate: int):
+        now = monotonic()
+        if self._next_write > now:
+            sleep(self._next_write - now)
+        else:
+            # Idle time earns no credit: a new burst starts at the rate
+            self._next_write = now
+        self._next_write += n / rate
+
+    def _fail(self, job, err):
+        self.failed_jobs += 1
+        job._finish(err)
+        self._job_done()
+        self.ctrl._emit('TX failed after {} of {} bytes: {}'.format(job.sent, job.size, err))
@@ -1,27 +1,105 @@
 #!/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
+import os
+import sys
 import threading
 import queue
-from time import sleep
+from collections import deque
+from time import sleep, monotonic, monotonic_ns, time_ns
 import serial
 
+from uarttool.autolog import AutoLogger
+from uarttool.bufpool import SlabPool, release, release_all
+from uarttool.bytequeue import ByteQueue, DEFAULT_QUEUE_BYTES, POLICY_BLOCK
+from uarttool.capture import CaptureWriter, DIR_RX, DIR_TX
+from uarttool.framer import format_frame
+from uarttool.ports import get_registry
+from uarttool.reactor import get_reactor
+from uarttool.server import PortServer
+from uarttool.stats import PortStats
+from uarttool.txqueue import TxQueue
 from uarttool.utils import convert_cmd_to_bytes, parse_bytes_to_hex_str, get_str_info
 
+# read max chunk size
+MAX_READ = 4096
+# Reads per reactor wakeup, so one busy port cannot starve the others
+READS_PER_WAKEUP = 16
+# Recent TX writes kept for consumers (e.g. 'since last TX' timestamps)
+TX_LOG = 4096
+# Leading bytes of each write kept in tx_log
+TX_LOG_BYTES = 64
+# Reopen attempts while waiting for a lost port without a registry change
+RECONNECT_RETRY_S = 0.25
+
 
 class UartController:
-    def __init__(self, port: str, baudrate: int, hex_mode=False, timeout=0.1, write_timeout=1, print_str=False, end=None):
-        self.ser = self.__open_serial(port, baudrate, timeout, write_timeout)
+    def __init__(self, port: str, baudrate: int, hex_mode=False, timeout=0.1, write_timeout=1, print_str=False, end=None,
+                 queue_bytes=DEFAULT_QUEUE_BYTES, queue_policy=POLICY_BLOCK):
+        self._open_args = (baudrate, timeout, write_timeout)
+        self.ser = self._open_serial(port, *self._open_args)
+        self.port = port
+        # Device actually open; differs from port after reconnecting to a renamed node
+        self.device = port
+        # Reopen the port when it fails, finding it again by port_identity (see set_reconnect)
+        self.reconnect = False
+        self.port_identity = None
+        self.reconnects = 0
+        # Called with a short message when the port is lost or reconnected,
+        # from the reading (or reconnect) thread
+        self.on_event = None
+        # monotonic_ns() of the latest write; recent writes oldest first as
+        # (monotonic ns, first TX_LOG_BYTES bytes, length)
         self.last_sent_ts = 0
+        self.tx_log = deque(maxlen=TX_LOG)
+        # Add to a monotonic_ns() stamp (RX chunk, TX write) to get wall-clock ns
+        self.clock_offset_ns = time_ns() - monotonic_ns()
         self.hex_mode = hex_mode
         self.print_str = print_str
-        self.log_queue = queue.Queue()
+        # RX chunks are memoryviews into pooled slabs; whoever takes them off
+        # log_queue hands them back with bufpool.release() once formatted.
+        self.rx_pool = SlabPool()
+        # RX chunks waiting for the consumer, bounded to queue_bytes
+        self.log_queue = ByteQueue(queue_bytes, queue_policy, on_drop=release)
         self.end = bytes(end, 'utf-8').decode('unicode_escape') if end else None
         self.stop_event = threading.Event()
+        self.log_thread = None
+        self.start_ts = monotonic()
+        self.stats = PortStats()
+        # Optional CaptureWriter recording raw RX/TX records
+        self.capture = None
+        # Optional AutoLogger keeping every RX/TX byte in rotating files
+        self.autolog = None
+        # Optional PortServer sharing the port over TCP / a Unix socket
+        self.server = None
+        # Every write goes through the TX queue's thread; see txqueue.py
+        self.tx_queue = TxQueue(self)
+        # Held around each port write; reconnecting swaps ser under it
+        self._tx_lock = threading.Lock()
+        # Optional HexDumper for hex output; None keeps one 0x line per read
+        self.hex_dumper = None
+        # Optional framer (uarttool.framer); output becomes one hex line per frame
+        self.framer = None
+        # Called (from the reading thread) after new RX data was queued
+        self.on_rx = None
+        # Called with every RX chunk as it is read, e.g. to match responses;
+        # a tap must copy what it keeps, the chunk's buffer is reused later
+        self.rx_taps = []
+        # While True (a file transfer owns the port) RX still reaches rx_taps,
+        # capture and autolog but is not queued for display
+        self.rx_muted = False
+        # LatencyTracker stamping each send_cmd write, see latency.py
+        self.latency = None
+        self._reactor_fd = None
+        self._rx_pending = None
 
-    def send_cmd(self, cmd: bytes):
+    def send_cmd(self, cmd: bytes, block=True):
+        """
+        Queue a command for the TX thread and return its TxJob (None if empty).
+        With block=False a full TX queue raises queue.Full instead of waiting.
+        """
         if not cmd or cmd == b'':
-            return
+            return None
         if self.hex_mode:
             if isinstance(cmd, str):
                 cmd = cmd.replace(',', '')
@@ -30,67 +108,379 @@ class UartController:
         else:
             if isinstance(cmd, str):
                 cmd = cmd.encode('utf-8')
-        try:
-            if cmd:
-                self.ser.write(cmd)
-                self.ser.flush()
-        except serial.SerialTimeoutException:
-            pass
-        except Exception:
-            pass
+        if not cmd:
+            return None
+        return self.tx_queue.put(cmd, (cmd,), block)
+
+    def send_batch(self, cmds, block=True):
+        """Send pre-encoded commands in one write; latency is still tracked per command."""
+        if cmds:
+            return self.tx_queue.put(b''.join(cmds), cmds, block)
+        return None
+
+    def send_file(self, path: str):
+        """Stream a file to the port in chunks behind what is queued; returns its TxJob."""
+        return self.tx_queue.put_file(path)
+
+    def drain_tx(self, timeout=None) -> bool:
+        """Wait until everything queued for TX has been written (or failed)."""
+        return self.tx_queue.drain(timeout)
 
-    def __open_serial(self, port, baudrate, timeout, write_timeout):
+    def _write(self, payload, cmds, size):
+        """
+        Write one chunk; runs on the TX queue's thread and raises on failure
+        (e.g. SerialTimeoutException). `size` is the whole write's length when
+        the chunk starts one, 0 for the chunks that follow.
+        """
+        # Stamped before the write so a fast reply cannot beat it
+        ts = monotonic_ns()
+        if size:
+            lat = self.latency
+            if lat is not None:
+                for cmd in cmds:
+                    lat.on_send(cmd, ts, self.hex_mode)
+        with self._tx_lock:
+            if size:
+                self.last_sent_ts = ts
+                self.tx_log.append((ts, bytes(payload[:TX_LOG_BYTES]), size))
+            self.ser.write(payload)
+            self.ser.flush()
+        self.stats.tx_bytes += len(payload)
+        self.stats.tx_writes += 1
+        cap = self.capture
+        if cap is not None:
+            cap.write(DIR_TX, payload, self.port, ts)
+        log = self.autolog
+        if log is not None:
+            log.write(DIR_TX, payload, self.port, ts)
+
+    def _open_serial(self, port, baudrate, timeout, write_timeout):
         try:
-            ser = serial.Serial(port=port, baudrate=baudrate, timeout=timeout, write_timeout=write_timeout)
+            ser = serial.serial_for_url(port, baudrate=baudrate, timeout=timeout, write_timeout=write_timeout)
             if ser.is_open:
                 return ser
         except Exception as e:
             raise e
         raise RuntimeError('Cannot open port {}'.format(port))
 
+    @property
+    def rx_bytes(self) -> int:
+        return self.stats.rx_bytes
+
+    @property
+    def dropped_bytes(self) -> int:
+        return self.log_queue.dropped_bytes
+
+    @property
+    def dropped_chunks(self) -> int:
+        return self.log_queue.dropped_chunks
+
+    def set_reconnect(self, enabled=True):
+        """Reopen the port if it fails, looking it up again by USB serial number or path."""
+        if enabled and self.port_identity is None:
+            self.port_identity = get_registry().identity(self.device)
+        self.reconnect = enabled
+
+    def _emit(self, text: str):
+        cb = self.on_event
+        if cb is not None:
+            try:
+                cb(text)
+            except Exception:
+                pass
+
+    def _reopen(self, err) -> bool:
+        """
+        Called from the reading side after the port failed with `err`: wait
+        until the device is back, under any name with the same identity, and
+        open it again with the same settings. False if stopped meanwhile.
+        """
+        self._emit('{} lost: {}'.format(self.device, err))
+        lost = monotonic()
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+        registry = get_registry()
+        generation = registry.generation
+        while not self.stop_event.is_set():
+            if self.port_identity is not None:
+                device = registry.find(self.port_identity, prefer=self.device)
+            else:
+                device = self.device
+            if device:
+                try:
+                    ser = self._open_serial(device, *self._open_args)
+                except Exception:
+                    ser = None
+                if ser is not None:
+                    with self._tx_lock:
+                        self.ser = ser
+                    if self.stop_event.is_set():
+                        ser.close()
+                        return False
+                    self.device = device
+                    self.reconnects += 1
+                    self._emit('{} reconnected after {:.2f}s'.format(device, monotonic() - lost))
+                    return True
+            # Woken as soon as the registry sees a node appear (or change permissions)
+            generation = registry.wait_change(generation, RECONNECT_RETRY_S)
+        return False
+
+    def _notify_rx(self):
+        cb = self.on_rx
+        if cb is not None:
+            try:
+                cb()
+            except Exception:
+                pass
+
+    def _record_rx(self, data) -> int:
+        """Account for a chunk just read; returns its read time (monotonic ns)."""
+        ts = monotonic_ns()
+        self.stats.add_rx(len(data))
+        cap = self.capture
+        if cap is not None:
+            cap.write(DIR_RX, data, self.port, ts)
+        log = self.autolog
+        if log is not None:
+            log.write(DIR_RX, data, self.port, ts)
+        taps = self.rx_taps
+        if taps:
+            for tap in taps:
+                try:
+                    tap(data)
+                except Exception:
+                    pass
+        return ts
+
+    def _queue_rx(self, data, ts=0):
+        # Only a blocking queue raises Full; keep waiting for room until stopped.
+        qput = self.log_queue.put
+        while True:
+            try:
+                qput(data, timeout=0.2, ts=ts)
+                break
+            except queue.Full:
+                if self.stop_event.is_set():
+                    release(data)
+                    return
+        self._notify_rx()
+
+    def _rx_fd(self):
+        """The port's file descriptor if it can be read directly (POSIX), else None."""
+        if not hasattr(os, 'readv'):
+            return None
+        try:
+            return self.ser.fileno()
+        except Exception:
+            return None
+
+    def _direct_readinto(self):
+        """
+        readinto() straight on the port's file descriptor where there is one
+        (POSIX). pyserial's own readinto() reads into a new bytes object and
+        copies, so it is only used for blocking waits and other backends.
+        """
+        fd = self._rx_fd()
+        if fd is None:
+            return None
+        readv = os.readv
+
+        def readinto(view):
+            try:
+                return readv(fd, [view])
+            except BlockingIOError:
+                return 0
+        return readinto
+
     def read_ser_response_continuously(self):
         ser = self.ser
-        qput = self.log_queue.put_nowait
-        # read max chunk size
-        max_read = 4096
+        queue_rx = self._queue_rx
+        pool = self.rx_pool
+        reserve = pool.reserve
+        readinto_waiting = self._direct_readinto() or ser.readinto
+        failing = False
         while not self.stop_event.is_set():
             try:
                 waiting = ser.in_waiting
                 if waiting:
-                    to_read = min(waiting, max_read)
-                    data = ser.read(to_read)
+                    n = readinto_waiting(reserve(min(waiting, MAX_READ)))
                 else:
-                    data = ser.read(1024)  # block until at least 1 byte or timeout
-                if data:
-                    try:
-                        qput(data)
-                    except queue.Full:
-                        sleep(1e-2)
-            except Exception:
+                    # Block for one byte only: loop:// and win32 return a larger
+                    # read only once it is full or timed out, late by the timeout.
+                    # Whatever came with that byte is taken right after it.
+                    view = reserve(MAX_READ)
+                    n = ser.readinto(view[:1])
+                    if n:
+                        waiting = ser.in_waiting
+                        if waiting:
+                            n += readinto_waiting(view[1:1 + min(waiting, MAX_READ - 1)])
+                if n:
+                    failing = False
+                    data = pool.commit(n)
+                    ts = self._record_rx(data)
+                    if self.rx_muted:
+                        release(data)
+                    else:
+                        queue_rx(data, ts)
+            except Exception as e:
+                if self.reconnect and not self.stop_event.is_set():
+                    if not self._reopen(e):
+                        break
+                    ser = self.ser
+                    readinto_waiting = self._direct_readinto() or ser.readinto
+                    continue
+                if not failing:
+                    failing = True
+                    self._emit('{} read error: {}'.format(self.device, e))
                 sleep(1e-2)
+        pool.close()
         self.stop()
 
-    def log_serial_data(self):
-        hex_mode = self.hex_mode
-        print_str_flag = self.print_str
-        while not self.stop_event.is_set():
+    def _on_readable(self):
+        """
+        Reactor callback: read what the port has without blocking. Returns
+        True to be paused while log_queue is full under the blocking policy;
+        the chunk that did not fit is kept and offered again first.
+        """
+        put = self.log_queue.put
+        queued = False
+        if self._rx_pending is not None:
+            data, ts = self._rx_pending
+            try:
+                put(data, block=False, ts=ts)
+            except queue.Full:
+                return True
+            self._rx_pending = None
+            queued = True
+        fd = self._reactor_fd
+        pool = self.rx_pool
+        readv = os.readv
+        for _ in range(READS_PER_WAKEUP):
             try:
-                data = self.log_queue.get(timeout=0.2)
+                n = readv(fd, [pool.reserve(MAX_READ)])
+            except BlockingIOError:
+                break
+            if not n:
+                raise serial.SerialException('device reports readiness to read but returned no data')
+            data = pool.commit(n)
+            ts = self._record_rx(data)
+            if self.rx_muted:
+                release(data)
+            else:
+                try:
+                    put(data, block=False, ts=ts)
+                except queue.Full:
+                    self._rx_pending = (data, ts)
+                    break
+                queued = True
+            if n < MAX_READ:
+                break
+        if queued:
+            self._notify_rx()
+        return self._rx_pending is not None
+
+    def _on_reactor_error(self, err):
+        # Port went away (unplugged, closed underneath us)
+        if not self.reconnect or self.stop_event.is_set():
+            self._emit('{} lost: {}'.format(self.device, err))
+            # Not on the reactor thread: it serves every other open port
+            threading.Thread(target=self.stop, daemon=True, name='uart-stop').start()
+            return
+        # The reactor already dropped the fd; a chunk still waiting in
+        # _rx_pending is queued first once the port is back.
+        self._reactor_fd = None
+        threading.Thread(target=self._reconnect_rx, args=(err,), daemon=True, name='uart-reconnect').start()
+
+    def _reconnect_rx(self, err):
+        if self._reopen(err):
+            self._start_rx()
+            return
+        pending, self._rx_pending = self._rx_pending, None
+        if pending is not None:
+            release(pending[0])
+        self.rx_pool.close()
+
+    def _start_rx(self):
+        fd = self._rx_fd()
+        if fd is None:
+            self.__start_rx_thread()
+            return
+        # Readable ports are served by the shared reactor thread.
+        self._reactor_fd = fd
+        get_reactor().add(fd, self._on_readable, self._on_reactor_error)
+
+    def _stop_rx(self):
+        fd, self._reactor_fd = self._reactor_fd, None
+        if fd is None:
+            return
+        get_reactor().remove(fd)
+        pending, self._rx_pending = self._rx_pending, None
+        if pending is not None:
+            release(pending[0])
+        self.rx_pool.close()
+
+    def log_serial_data(self, out=None):
+        """
+        Drain log_queue to a binary stream (stdout by default). Chunks are
+        batched so each wakeup costs one write/flush no matter how many reads
+        the RX thread made in between.
+        """
+        out = out if out is not None else sys.stdout.buffer
+        get_batch = self.log_queue.get_batch
+        max_batch = 1 << 20
+        while True:
+            try:
+                batch = get_batch(timeout=0.2, max_bytes=max_batch)
             except queue.Empty:
+                if self.stop_event.is_set():
+                    break
                 continue
             try:
-                if hex_mode:
-                    hex_str = parse_bytes_to_hex_str(data)
-                    # hex lines should have newline
-                    print(hex_str)
-                if print_str_flag or not hex_mode:
-                    txt = get_str_info(data)
-                    if txt:
-                        print(txt, end='')
+                out.write(self.format_batch(batch))
+                out.flush()
+            except Exception:
+                pass
+            release_all(batch)
+        tail = ''
+        if self.framer is not None:
+            tail = ''.join(format_frame(frame, err, self.print_str) for frame, err in self.framer.flush())
+        elif self.hex_dumper is not None:
+            tail = self.hex_dumper.flush()
+        if tail:
+            try:
+                out.write(tail.encode('utf-8'))
+                out.flush()
             except Exception:
                 pass
         self.stop()
 
+    def format_batch(self, batch) -> bytes:
+        framer = self.framer
+        if framer is not None:
+            print_str_flag = self.print_str
+            frames = framer.feed(b''.join(batch))
+            return ''.join(format_frame(frame, err, print_str_flag) for frame, err in frames).encode('utf-8')
+        if not self.hex_mode:
+            return b''.join(batch)
+        dumper = self.hex_dumper
+        if dumper is not None and dumper.width:
+            # Row layouts are cut at stream offsets, so the batch is formatted in one go
+            return dumper.feed(b''.join(batch)).encode('ascii')
+        print_str_flag = self.print_str
+        parts = []
+        for data in batch:
+            if dumper is not None:
+                parts.append(dumper.feed(data))
+            else:
+                # hex lines should have newline
+                parts.append(parse_bytes_to_hex_str(data))
+                parts.append('\n')
+            if print_str_flag:
+                parts.append(get_str_info(data))
+        return ''.join(parts).encode('utf-8')
+
     def trans_cmd_to_tx(self):
         """
         Read from stdin and send. Input is string; append end (string) if configured.
@@ -116,20 +506,74 @@ class UartController:
         tx_thread = threading.Thread(target=self.trans_cmd_to_tx, daemon=True, name="uart-tx")
         tx_thread.start()
 
-    def __start_log_thread(self):
-        log_thread = threading.Thread(target=self.log_serial_data, name="uart-log")
-        log_thread.start()
+    def __start_log_thread(self, out=None):
+        self.log_thread = threading.Thread(target=self.log_serial_data, args=(out,), name="uart-log")
+        self.log_thread.start()
 
-    def run(self):
-        self.__start_rx_thread()
-        self.__start_tx_thread()
-        self.__start_log_thread()
+    def run(self, out=None, read_stdin=True):
+        self.start_ts = monotonic()
+        self._start_rx()
+        if read_stdin:
+            self.__start_tx_thread()
+        self.__start_log_thread(out)
 
     def run_no_stdin(self):
-        self.__start_rx_thread()
+        self.start_ts = monotonic()
+        self._start_rx()
+
+    def start_capture(self, path: str):
+        self.stop_capture()
+        self.capture = CaptureWriter(path)
+        return self.capture
+
+    def stop_capture(self):
+        cap, self.capture = self.capture, None
+        if cap is not None:
+            cap.close()
+
+    def start_autolog(self, directory: str, **kwargs):
+        """Log every RX/TX byte under `directory`; kwargs go to AutoLogger."""
+        self.stop_autolog()
+        name = str(self.port)
+        if name.startswith('/dev/'):
+            name = name[5:]
+        kwargs.setdefault('prefix', ''.join(c if c.isalnum() or c in '-.' else '_' for c in name) or 'uart')
+        self.autolog = AutoLogger(directory, **kwargs)
+        return self.autolog
+
+    def stop_autolog(self):
+        log, self.autolog = self.autolog, None
+        if log is not None:
+            log.close()
+
+    def start_server(self, address: str, **kwargs):
+        """Publish the port on `address` ('HOST:PORT' or 'unix:PATH'); kwargs go to PortServer."""
+        self.stop_server()
+        self.server = PortServer(self, address, **kwargs)
+        return self.server
+
+    def stop_server(self):
+        server, self.server = self.server, None
+        if server is not None:
+            server.close()
+
+    def stats_snapshot(self) -> dict:
+        """Counters and rates since the previous snapshot (see PortStats)."""
+        return self.stats.snapshot(self.log_queue)
+
+    def throughput_report(self) -> str:
+        elapsed = max(monotonic() - self.start_ts, 1e-9)
+        rate = self.rx_bytes / elapsed
+        return 'rx {} bytes in {:.2f}s ({:.1f} KiB/s), dropped {} bytes in {} chunks'.format(
+            self.rx_bytes, elapsed, rate / 1024, self.dropped_bytes, self.dropped_chunks)
 
     def stop(self):
         self.stop_event.set()
+        self.tx_queue.close()
+        self._stop_rx()
+        self.stop_server()
+        self.stop_capture()
+        self.stop_autolog()
         try:
             if self.ser and self.ser.is_open:
                 try:
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
+import re
 from typing import List
 
 # Precompute hex table for fast conversion
 HEX_TABLE = [f"0x{b:02x}" for b in range(256)]
+# bytes.translate tables giving the high / low hex digit of every byte
+HEX_HI = bytes(b'0123456789abcdef'[b >> 4] for b in range(256))
+HEX_LO = bytes(b'0123456789abcdef'[b & 0xF] for b in range(256))
 
 
 def convert_cmd_to_bytes(datas: List[hex]):
@@ -17,13 +21,23 @@ def convert_cmd_to_bytes(datas: List[hex]):
 
 
 def parse_bytes_to_hex_str(byte_data: bytes):
-    # Use lookup table for speed
-    return ' '.join(HEX_TABLE[b] for b in byte_data)
+    # Bulk conversion: translate the buffer into its high and low hex digits in
+    # C, then drop them into a repeated '0x?? ' template with strided slices.
+    n = len(byte_data)
+    if not n:
+        return ''
+    if not isinstance(byte_data, (bytes, bytearray)):
+        byte_data = bytes(byte_data)
+    out = bytearray(b'0x   ') * n
+    out[2::5] = byte_data.translate(HEX_HI)
+    out[3::5] = byte_data.translate(HEX_LO)
+    del out[-1]
+    return out.decode('ascii')
 
 
 def get_str_info(response: bytes):
     try:
-        return response.decode('utf-8', errors='ignore')
+        return str(response, 'utf-8', errors='ignore')
     except Exception:
         return ''
 
@@ -35,3 +49,12 @@ def parse_str_to_bytes(str_data: str):
         return ' '.join(f"0x{byte:02x}" for byte in b)
     except Exception:
         return ''
+
+
+def compile_expect(pattern: str):
+    """Response pattern: a regex, or 'hex:5aa5' for literal bytes; '' for none."""
+    if not pattern:
+        return None
+    if pattern.startswith('hex:'):
+        return re.compile(re.escape(bytes.fromhex(pattern[4:])))
+    return re.compile(pattern.encode('utf-8'))
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+# -*- encoding: utf-8 -*-
+
+"""
+XMODEM and YMODEM file transfer over an open UartController.
+
+A transfer runs on its own thread while the port stays open: replies arrive
+through an rx_taps hook (RX is kept out of the display meanwhile, see
+UartController.rx_muted) and blocks go out through the TX queue. Files are
+read and written one block at a time, never whole. The CRC is
+binascii.crc_hqx, the table-driven CRC-16/XMODEM in C.
+
+Protocols (PROTOCOLS):
+  xmodem     128-byte blocks, CRC or checksum, whichever the receiver asks for
+  xmodem-1k  1024-byte blocks with CRC
+  ymodem     batch of files, each announced by a name/size block 0; 1K blocks
+  ymodem-g   YMODEM streamed without per-block ACKs, for error-free links
+             (USB adapters); any error aborts the transfer
+
+Both sides time out and retry as the protocols specify: a block is tried
+MAX_RETRIES times, the sender waits BLOCK_TIMEOUT_S for each ACK, and the
+receiver NAKs a block that is corrupt or stalls for CHAR_TIMEOUT_S. Two CANs
+from the peer abort, cancel() sends them.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from binascii import crc_hqx
+from collections import deque
+from time import monotonic, perf_counter
+
+from uarttool.stats import format_size
+
+SOH = 0x01
+STX = 0x02
+EOT = 0x04
+ACK = 0x06
+NAK = 0x15
+CAN = 0x18
+SUB = 0x1A
+CRC = 0x43  # 'C': receiver asks for CRC blocks
+GMODE = 0x47  # 'G': receiver asks for YMODEM-g streaming
+
+PROTOCOLS = ('xmodem', 'xmodem-1k', 'ymodem', 'ymodem-g')
+
+# Sender: how long the receiver has to start, and to answer one block
+START_TIMEOUT_S = 60.0
+BLOCK_TIMEOUT_S = 10.0
+# Receiver: longest gap inside a block, and between requests to start
+CHAR_TIMEOUT_S = 1.0
+REQUEST_INTERVAL_S = 3.0
+MAX_RETRIES = 10
+# Blocks a streaming sender lets the TX queue hold, so progress tracks the wire
+STREAM_BLOCKS = 16
+# 'C' requests before an xmodem receiver falls back to checksum blocks
+CRC_TRIES = 3
+ABORT = bytes([CAN]) * 8
+
+
+class TransferError(Exception):
+    pass
+
+
+class PeerCancelled(TransferError):
+    pass
+
+
+def make_block(seq: int, data: bytes, size: int, crc=True, pad=SUB) -> bytes:
+    """One framed block: header, `data` padded to `size` (128 or 1024), CRC-16 or checksum."""
+    if len(data) < size:
+        data = data + bytes([pad]) * (size - len(data))
+    seq &= 0xFF
+    head = bytes((SOH if size == 128 else STX, seq, 0xFF - seq))
+    if crc:
+        return head + data + crc_hqx(data, 0).to_bytes(2, 'big')
+    return head + data + bytes((sum(data) & 0xFF,))
+
+
+class _Link:
+    """RX bytes from the reading thread, consumed with timeouts by the transfer thread."""
+
+    def __init__(self, ctrl):
+        self.ctrl = ctrl
+        self.aborted = False
+        self._buf = bytearray()
+        self._cond = threading.Condition()
+
+    def open(self):
+        self.ctrl.rx_taps.append(self._on_rx)
+
+    def close(self):
+        try:
+            self.ctrl.rx_taps.remove(self._on_rx)
+        except ValueError:
+            pass
+
+    def abort(self):
+        with self._cond:
+            self.aborted = True
+            self._cond.notify_all()
+
+    def _on_rx(self, data):
+        with self._cond:
+            self._buf += data
+            self._cond.notify_all()
+
+    def _wait(self, timeout) -> bool:
+        """Wait for more RX; False once `timeout` passed without any."""
+        have = len(self._buf)
+        self._cond.wait(timeout)
+        if self.aborted:
+            raise TransferError('cancelled')
+        return len(self._buf) != have
+
+    def read(self, n: int, timeout: float):
+        """`n` bytes, or None if the line stays quiet for `timeout` before they are all in."""
+        with self._cond:
+            if self.aborted:
+                raise TransferError('cancelled')
+            buf = self._buf
+            while len(buf) < n:
+                if not self._wait(timeout):
+                    return None
+            data = bytes(buf[:n])
+            del buf[:n]
+            return data
+
+    def read_byte(self, timeout: float):
+        data = self.read(1, timeout)
+        return data[0] if data else None
+
+    def pending_cancel(self) -> bool:
+        """Two CANs among what arrived (streaming senders only look, never wait)."""
+        with self._cond:
+            return bytes((CAN, CAN)) in self._buf
+
+    def discard(self):
+        """Drop replies already in, e.g. a late ACK that must not answer the next block."""
+        with self._cond:
+            cancelled = bytes((CAN, CAN)) in self._buf
+            self._buf.clear()
+        if cancelled:
+            raise PeerCancelled('cancelled by peer')
+
+    def purge(self):
+        """Drop RX until the line has been quiet for CHAR_TIMEOUT_S, e.g. the rest of a bad block."""
+        with self._cond:
+            while True:
+                self._buf.clear()
+                if not self._wait(CHAR_TIMEOUT_S):
+                    return
+
+    def write(self, data: bytes):
+        return self.ctrl.tx_queue.put(data)
+
+
+class _Transfer(ABC):
+    direction = ''
+
+    def __init__(self, ctrl, protocol='ymodem', on_done=None):
+        if protocol not in PROTOCOLS:
+            raise ValueError('unknown protocol {} (use {})'.format(protocol, ', '.join(PROTOCOLS)))
+        self.ctrl = ctrl
+        self.protocol = protocol
+        self.batch = protocol.startswith('ymodem')
+        self.on_done = on_done
+        self.name = ''  # file being transferred
+        self.files = []  # paths transferred completely
+        self.total_bytes = 0  # 0 while unknown (XMODEM receive)
+        self.done_bytes = 0
+        self.retries = 0
+        self.error = None
+        self.started = None  # perf_counter() once the peer answered; waiting for it is not timed
+        self.finished = None
+        # Set once the transfer is over (finished, cancelled or failed)
+        self.done = threading.Event()
+        self._link = _Link(ctrl)
+        self._thread = None
+
+    def start(self):
+        self._link.open()
+        self.ctrl.rx_muted = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='uart-xmodem')
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._link.abort()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or perf_counter()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """Bytes/s of file data so far."""
+        elapsed = self.elapsed
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_s(self):
+        """Seconds left at the current rate; None while the size or rate is unknown."""
+        rate = self.rate
+        if not self.total_bytes or not rate:
+            return None
+        return max(0.0, (self.total_bytes - self.done_bytes) / rate)
+
+    def format_progress(self) -> str:
+        line = '{} {} {} {}'.format(self.protocol, self.direction, os.path.basename(self.name),
+                                    format_size(self.done_bytes))
+        if self.total_bytes:
+            line += '/{} ({:.0%})'.format(format_size(self.total_bytes), self.done_bytes / self.total_bytes)
+        line += ' {}/s'.format(format_size(self.rate))
+        eta = self.eta_s
+        if eta is not None:
+            line += ' ETA {:.0f}s'.format(eta)
+        return line
+
+    def format_report(self) -> str:
+        line = '{} {}: {} file(s), {} in {:.2f}s ({}/s), retries {}'.format(
+            self.protocol, self.direction, len(self.files), format_size(self.done_bytes), self.elapsed,
+            format_size(self.rate), self.retries)
+        if self.error is not None:
+            line += ', failed: {}'.format(self.error)
+        return line
+
+    def _run(self):
+        try:
+            self._transfer()
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            if not isinstance(e, PeerCancelled):
+                try:
+                    self.ctrl.tx_queue.put(ABORT)
+                except Exception:
+                    pass
+        finally:
+            self.finished = perf_counter()
+            self._link.close()
+            self.ctrl.rx_muted = False
+            self.done.set()
+            if self.on_done is not None:
+                try:
+                    self.on_done(self)
+                except Exception:
+                    pass
+
+    @abstractmethod
+    def _transfer(self):
+        """Run the protocol on the transfer thread; raise TransferError to fail it."""
+
+    def _peer_cancelled(self) -> bool:
+        """Called after one CAN: a second one right behind it means the peer gave up."""
+        return self._link.read_byte(CHAR_TIMEOUT_S) == CAN
+
+
+class ModemSender(_Transfer):
+    """Send `paths` (one file for XMODEM) to a receiver that is waiting on the port."""
+
+    direction = 'send'
+
+    def __init__(self, ctrl, paths, protocol='ymodem', on_done=None):
+        super().__init__(ctrl, protocol, on_done)
+        self._in_flight = deque()  # TxJobs of streamed blocks not yet on the wire
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        if not self.paths or (not self.batch and len(self.paths) != 1):
+            raise ValueError('{} sends exactly one file'.format(protocol) if not self.batch else 'no files to send')
+        self.total_bytes = sum(os.path.getsize(path) for path in self.paths)
+
+    def _transfer(self):
+        for path in self.paths:
+            self.name = path
+            mode = self._wait_start()
+            if self.batch:
+                self._send_header(path, mode)
+                mode = self._wait_start()
+            self._send_data(path, mode)
+            self.files.append(path)
+        if self.batch:
+            # An empty block 0 ends the batch
+            mode = self._wait_start()
+            self._send(make_block(0, b'', 128, pad=0), 0, stream=mode == GMODE)
+
+    def _wait_start(self) -> int:
+        """The receiver's request: CRC, NAK (checksum) or GMODE."""
+        allowed = (CRC, NAK, GMODE) if self.batch else (CRC, NAK)
+        deadline = monotonic() + START_TIMEOUT_S
+        while True:
+            c = self._link.read_byte(max(0.0, deadline - monotonic()))
+            if c is None:
+                raise TransferError('receiver did not start')
+            if c in allowed:
+                if self.started is None:
+                    self.started = perf_counter()
+                return c
+            if c == CAN and self._peer_cancelled():
+                raise PeerCancelled('cancelled by peer')
+
+    def _wait_reply(self):
+        """ACK, NAK or None when the receiver stays silent for BLOCK_TIMEOUT_S; other bytes are line noise."""
+        while True:
+            c = self._link.read_byte(BLOCK_TIMEOUT_S)
+            if c is None or c in (ACK, NAK):
+                return c
+            if c == CAN and self._peer_cancelled():
+                raise PeerCancelled('cancelled by peer')
+
+    def _send(self, block: bytes, seq: int, stream=False):
+        if stream:
+            in_flight = self._in_flight
+            while len(in_flight) >= STREAM_BLOCKS:
+                self._wait_written(in_flight.popleft())
+            if self._link.pending_cancel():
+                raise PeerCancelled('cancelled by peer')
+            in_flight.append(self._link.write(block))
+            return
+        for _ in range(MAX_RETRIES):
+            self._link.discard()
+            self._link.write(block)
+            if self._wait_reply() == ACK:
+                return
+            self.retries += 1
+        raise TransferError('block {} not acknowledged after {} tries'.format(seq, MAX_RETRIES))
+
+    def _wait_written(self, job):
+        while not job.done.wait(0.2):
+            if self._link.aborted:
+                raise TransferError('cancelled')
+        if job.error is not None:
+            raise TransferError('write failed: {}'.format(job.error))
+
+    def _send_header(self, path: str, mode: int):
+        st = os.stat(path)
+        info = os.path.basename(path).encode('utf-8') + b'\0' + '{} {:o}'.format(st.st_size, int(st.st_mtime)).encode()
+        self._send(make_block(0, info, 128 if len(info) <= 128 else 1024, pad=0), 0, stream=mode == GMODE)
+
+    def _send_data(self, path: str, mode: int):
+        crc = mode != NAK
+        stream = mode == GMODE
+        size = 1024 if crc and self.protocol != 'xmodem' else 128
+        seq = 1
+        with open(path, 'rb') as f:
+            while True:
+                data = f.read(size)
+                if not data:
+                    break
+                if len(data) < size and size == 1024 and -(-len(data) // 128) * 133 < 1029:
+                    # The tail goes cheaper as 128-byte blocks than as one padded 1K block
+                    for i in range(0, len(data), 128):
+                        self._send(make_block(seq, data[i:i + 128], 128, crc), seq, stream)
+                        self.done_bytes += len(data[i:i + 128])
+                        seq += 1
+                    continue
+                self._send(make_block(seq, data, size, crc), seq, stream)
+                self.done_bytes += len(data)
+                seq += 1
+        while self._in_flight:
+            self._wait_written(self._in_flight.popleft())
+        for _ in range(MAX_RETRIES):
+            self._link.write(bytes((EOT,)))
+            # YMODEM receivers NAK the first EOT to be sure of it
+            if self._wait_reply() == ACK:
+                return
+        raise TransferError('end of file not acknowledged')
+
+
+class ModemReceiver(_Transfer):
+    """
+    Receive from a sender on the port: into the file `dest` for XMODEM, into
+    the directory `dest` (created if needed) for YMODEM, keeping the names and
+    sizes the sender announces. XMODEM has no length field, so its last block
+    keeps the sender's padding.
+    """
+
+    direction = 'receive'
+
+    def __init__(self, ctrl, dest, protocol='ymodem', on_done=None):
+        super().__init__(ctrl, protocol, on_done)
+        self.dest = dest
+        self._crc = True
+
+    def _transfer(self):
+        if not self.batch:
+            self.name = self.dest
+            with open(self.dest, 'wb') as f:
+                self._receive_data(f, None)
+            self.files.append(self.dest)
+            return
+        os.makedirs(self.dest, exist_ok=True)
+        while True:
+            header = self._receive_header()
+            if header is None:
+                return
+            name, size, mtime = header
+            path = os.path.join(self.dest, name)
+            self.name = path
+            if size is not None:
+                self.total_bytes += size
+            with open(path, 'wb') as f:
+                self._receive_data(f, size)
+            if mtime:
+                try:
+                    os.utime(path, (mtime, mtime))
+                except OSError:
+                    pass
+            self.files.append(path)
+
+    @property
+    def _stream(self) -> bool:
+        return self.protocol == 'ymodem-g'
+
+    def _packet(self, retry: int, starting: bool):
+        """
+        The next good packet: (seq, data), or EOT. Timeouts and bad blocks
+        are answered with `retry` (the start request, or NAK) up to
+        MAX_RETRIES times; when streaming they abort instead.
+        """
+        link = self._link
+        errors = 0
+        # Longer than the sender waits for an ACK, so a lost ACK is repaired by
+        # the sender resending rather than by both sides at once
+        timeout = REQUEST_INTERVAL_S if starting else 2 * BLOCK_TIMEOUT_S
+        while True:
+            c = link.read_byte(timeout)
+            if c in (SOH, STX):
+                size = 128 if c == SOH else 1024
+                rest = link.read(size + (4 if self._crc else 3), CHAR_TIMEOUT_S)
+                if rest is not None and rest[0] ^ rest[1] == 0xFF:
+                    data = rest[2:2 + size]
+                    if self._crc:
+                        good = crc_hqx(data, 0) == int.from_bytes(rest[-2:], 'big')
+                    else:
+                        good = sum(data) & 0xFF == rest[-1]
+                    if good:
+                        if self.started is None:
+                            self.started = perf_counter()
+                        return rest[0], data
+                fault = 'short block' if rest is None else 'bad block'
+                if rest is not None and not self._stream:
+                    link.purge()
+            elif c == EOT:
+                return EOT
+            elif c == CAN:
+                if self._peer_cancelled():
+                    raise PeerCancelled('cancelled by peer')
+                continue
+            elif c is None:
+                fault = 'timeout'
+            elif starting:
+                continue  # line noise before the sender started
+            else:
+                # A block whose header got corrupted: let it pass, then NAK
+                fault = 'line noise'
+                if not self._stream:
+                    link.purge()
+            if self._stream and not starting:
+                raise TransferError('{} while streaming'.format(fault))
+            errors += 1
+            self.retries += 1
+            if errors >= MAX_RETRIES:
+                raise TransferError('{} after {} tries'.format(fault, MAX_RETRIES))
+            if starting and retry == CRC and not self.batch and self.protocol == 'xmodem' and errors >= CRC_TRIES:
+                # Old senders only know checksums
+                retry = NAK
+                self._crc = False
+            link.write(bytes((retry,)))
+
+    def _receive_header(self):
+        """(name, size, mtime) from block 0; None for the empty block 0 ending the batch."""
+        request = GMODE if self._stream else CRC
+        self._link.write(bytes((request,)))
+        while True:
+            packet = self._packet(request, starting=True)
+            if packet == EOT:
+                # The sender missed our ACK of its last EOT
+                self._link.write(bytes((ACK,)))
+                continue
+            seq, data = packet
+            if seq == 0:
+                break
+        name, _sep, rest = data.partition(b'\0')
+        if not name:
+            self._link.write(bytes((ACK,)))
+            return None
+        name = os.path.basename(name.decode('utf-8', errors='replace').replace('\\', '/'))
+        if name in ('', '.', '..'):
+            raise TransferError('bad file name in header')
+        fields = rest.split(b'\0', 1)[0].split()
+        try:
+            size = int(fields[0]) if fields else None
+            mtime = int(fields[1], 8) if len(fields) > 1 else 0
+        except ValueError:
+            size, mtime = None, 0
+        if not self._stream:
+            self._link.write(bytes((ACK,)))
+        return name, size, mtime
+
+    def _receive_data(self, f, size):
+        link = self._link
+        stream = self._stream
+        request = GMODE if stream else (CRC if self._crc else NAK)
+        link.write(bytes((request,)))
+        expected = 1
+        written = 0
+        eots = 0
+        while True:
+            packet = self._packet(request if expected == 1 else NAK, starting=expected == 1)
+            if packet == EOT:
+                eots += 1
+                if self.batch and not stream and eots == 1:
+                    link.write(bytes((NAK,)))
+                    continue
+                link.write(bytes((ACK,)))
+                return
+            seq, data = packet
+            if seq == expected & 0xFF:
+                if size is not None:
+                    data = data[:size - written]
+                f.write(data)
+                written += len(data)
+                self.done_bytes += len(data)
+                expected += 1
+            elif seq != (expected - 1) & 0xFF:
+                raise TransferError('block {} out of sequence (expected {})'.format(seq, expected & 0xFF))
+            # else: the sender missed our ACK and sent it again
+            if not stream:
+                link.write(bytes((ACK,)))